@@ -1,5 +1,4 @@
-import re
-from handler.tools import MCPTools
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 
 prompt = """
 You are an Order Management AI.
@@ -21,9 +20,56 @@ Rules:
 """
 
 
+def tokenize(text: str):
+    """
+    Split a command once into plain words and a dict of key=value pairs.
+    Words and keys are lower-cased; values run up to the next whitespace and
+    keep their case, since SKUs and tracking numbers are case-sensitive.
+    """
+    words, pairs = [], {}
+    for token in text.split():
+        key, sep, value = token.partition("=")
+        if sep and key and value:
+            pairs[key.lower()] = value
+        else:
+            words.append(token.lower())
+    return words, pairs
+
+
+class Command(NamedTuple):
+    """A CLI verb mapped to a tools method; fields are (key, converter) in call order."""
+    method: str
+    fields: Tuple[Tuple[str, Callable], ...]
+    readonly: bool = False
+
+
+COMMANDS = {
+    "add product": Command("add_product", (("sku", str), ("name", str), ("price", float), ("desc", str))),
+    "get product": Command("get_product", (("id", int),), readonly=True),
+    "find product": Command("get_product_by_sku", (("sku", str),), readonly=True),
+    "add warehouse": Command("add_warehouse", (("name", str), ("location", str))),
+    "create order": Command("add_order", (("number", str), ("status", str))),
+    "add item": Command("add_order_item", (("order_id", int), ("product_id", int), ("qty", int), ("price", float))),
+    "make payment": Command("add_payment", (("order_id", int), ("amount", float), ("method", str), ("status", str))),
+    "ship order": Command("add_shipment", (("order_id", int), ("tracking", str), ("status", str))),
+    "track shipment": Command("get_shipment_by_tracking", (("tracking", str),), readonly=True),
+}
+
+
 class OMSAgent:
     """
     OMSAgent understands user intent and calls MCP tools accordingly.
+
+    Examples:
+        'add product sku=SKU1 name=mouse price=500 desc=wireless'
+        'get product id=1'
+        'find product sku=SKU1'
+        'add warehouse name=wh1 location=bangalore'
+        'create order number=ORD1 status=CREATED'
+        'add item order_id=1 product_id=1 qty=2 price=500'
+        'make payment order_id=1 amount=1000 method=upi status=SUCCESS'
+        'ship order order_id=1 tracking=TRACK1 status=SHIPPED'
+        'track shipment tracking=TRACK1'
     """
 
     def __init__(self, tools):
@@ -34,111 +80,48 @@ class OMSAgent:
         Main agent entrypoint.
         Takes natural language input and routes to MCP tools.
         """
-        text = user_input.lower()
-
-        # ---------- PRODUCT ----------
-        if "add product" in text:
-            return self._add_product(text)
-
-        if "get product" in text:
-            return self._get_product(text)
-
-        # ---------- WAREHOUSE ----------
-        if "add warehouse" in text:
-            return self._add_warehouse(text)
-
-        # ---------- ORDER ----------
-        if "create order" in text:
-            return self._add_order(text)
-
-        if "add item" in text:
-            return self._add_order_item(text)
-
-        # ---------- PAYMENT ----------
-        if "make payment" in text:
-            return self._add_payment(text)
-
-        # ---------- SHIPMENT ----------
-        if "ship order" in text:
-            return self._add_shipment(text)
-
-        return {"status": "error", "message": "Unknown command"}
-
-    # ================= PARSERS =================
-
-    def _add_product(self, text: str):
-        """
-        Example input:
-        'add product sku=SKU1 name=mouse price=500 desc=wireless'
-        """
-        sku = self._extract("sku", text)
-        name = self._extract("name", text)
-        price = float(self._extract("price", text))
-        desc = self._extract("desc", text)
-
-        return self.tools.add_product(sku, name, price, desc)
+        words, pairs = tokenize(user_input)
+        command = self._match(words)
+        if command is None:
+            return {"status": "error", "message": "Unknown command"}
 
-    def _get_product(self, text: str):
-        """
-        Example:
-        'get product id=1'
-        """
-        product_id = int(self._extract("id", text))
-        return self.tools.get_product(product_id)
+        args, problems = self._parse(command, pairs)
+        if problems:
+            return {"status": "error", "message": "; ".join(problems)}
 
-    def _add_warehouse(self, text: str):
-        """
-        'add warehouse name=wh1 location=bangalore'
-        """
-        name = self._extract("name", text)
-        location = self._extract("location", text)
-        return self.tools.add_warehouse(name, location)
+        return getattr(self.tools, command.method)(*args)
 
-    def _add_order(self, text: str):
-        """
-        'create order number=ORD1 status=CREATED'
-        """
-        number = self._extract("number", text)
-        status = self._extract("status", text)
-        return self.tools.add_order(number, status)
-
-    def _add_order_item(self, text: str):
-        """
-        'add item order_id=1 product_id=1 qty=2 price=500'
-        """
-        return self.tools.add_order_item(
-            order_id=int(self._extract("order_id", text)),
-            product_id=int(self._extract("product_id", text)),
-            quantity=int(self._extract("qty", text)),
-            price=float(self._extract("price", text)),
-        )
-
-    def _add_payment(self, text: str):
-        """
-        'make payment order_id=1 amount=1000 method=upi status=SUCCESS'
-        """
-        return self.tools.add_payment(
-            order_id=int(self._extract("order_id", text)),
-            amount=float(self._extract("amount", text)),
-            method=self._extract("method", text),
-            status=self._extract("status", text),
-        )
-
-    def _add_shipment(self, text: str):
-        """
-        'ship order order_id=1 tracking=TRACK1 status=SHIPPED'
-        """
-        return self.tools.add_shipment(
-            order_id=int(self._extract("order_id", text)),
-            tracking_number=self._extract("tracking", text),
-            status=self._extract("status", text),
-        )
+    def is_readonly(self, user_input: str) -> bool:
+        """True if the command only reads, so it may run concurrently with other reads."""
+        command = self._match(tokenize(user_input)[0])
+        return command is not None and command.readonly
 
     # ================= UTIL =================
 
-    def _extract(self, key: str, text: str):
-        match = re.search(rf"{key}=([^\s]+)", text)
-        if not match:
-            raise ValueError(f"Missing {key}")
-        return match.group(1)
-
+    def _match(self, words: List[str]) -> Optional[Command]:
+        """Find the first adjacent pair of plain words that names a command."""
+        for first, second in zip(words, words[1:]):
+            command = COMMANDS.get(f"{first} {second}")
+            if command is not None:
+                return command
+        return None
+
+    def _parse(self, command: Command, pairs: Dict[str, str]):
+        """Convert every field at once, collecting all missing and invalid ones."""
+        args, missing, invalid = [], [], []
+        for key, convert in command.fields:
+            raw = pairs.get(key)
+            if raw is None:
+                missing.append(key)
+                continue
+            try:
+                args.append(convert(raw))
+            except ValueError:
+                invalid.append(f"{key}={raw}")
+
+        problems = []
+        if missing:
+            problems.append(f"Missing {', '.join(missing)}")
+        if invalid:
+            problems.append(f"Invalid {', '.join(invalid)}")
+        return args, problems
@@ -0,0 +1,93 @@
+# batch.py
+"""
+Non-interactive execution of agent commands.
+
+    python main.py --batch commands.txt > results.jsonl
+    cat commands.jsonl | python main.py --batch -
+"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from handler.schema import error_result
+
+
+def read_commands(lines):
+    """
+    Yield (line_no, id, command) from plain-text or JSONL input. JSONL lines
+    are objects with a "command" key and an optional "id" echoed back.
+    """
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            try:
+                entry = json.loads(line)
+                yield line_no, entry.get("id"), entry["command"]
+            except (ValueError, KeyError) as e:
+                yield line_no, None, ValueError(f"Bad JSONL entry: {e}")
+        else:
+            yield line_no, None, line
+
+
+def run_command(agent, command):
+    if isinstance(command, Exception):
+        return error_result(command)
+    try:
+        return agent.handle(command)
+    except Exception as e:
+        return error_result(e)
+
+
+def run_batch(agent, tools, lines, out, workers: int = 4, group_size: int = 500) -> dict:
+    """
+    Execute commands in input order and stream one JSON result per line to out.
+
+    Consecutive write commands (up to group_size) share one transaction;
+    consecutive read commands run on `workers` threads. If a write group's
+    transaction fails as a whole (database busy after retries, writes
+    rejected) every command in it gets that error and the batch goes on.
+    """
+    summary = {"commands": 0, "errors": 0}
+    start = time.perf_counter()
+
+    def emit(segment, results):
+        for (line_no, entry_id, command), result in zip(segment, results):
+            summary["commands"] += 1
+            if not isinstance(result, dict) or result.get("status") != "success":
+                summary["errors"] += 1
+            record = {"line": line_no, "command": str(command), "result": result}
+            if entry_id is not None:
+                record["id"] = entry_id
+            out.write(json.dumps(record, default=str) + "\n")
+
+    def flush(segment, readonly):
+        if not segment:
+            return
+        if readonly:
+            results = list(executor.map(lambda entry: run_command(agent, entry[2]), segment))
+        else:
+            try:
+                results = tools.transaction(lambda: [run_command(agent, entry[2]) for entry in segment])
+            except Exception as e:
+                # Nothing in the group was committed.
+                results = [error_result(e)] * len(segment)
+        emit(segment, results)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        segment, readonly = [], None
+        for entry in read_commands(lines):
+            command = entry[2]
+            is_read = not isinstance(command, Exception) and agent.is_readonly(command)
+            if segment and (is_read != readonly or len(segment) >= group_size):
+                flush(segment, readonly)
+                segment = []
+            segment.append(entry)
+            readonly = is_read
+        flush(segment, readonly)
+
+    elapsed = time.perf_counter() - start
+    summary["seconds"] = round(elapsed, 3)
+    summary["commands_per_sec"] = round(summary["commands"] / elapsed) if elapsed else 0
+    return summary
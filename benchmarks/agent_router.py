@@ -0,0 +1,59 @@
+"""
+Commands per second through OMSAgent.handle.
+
+    python -m benchmarks.agent_router --commands 200000
+
+`parse_only` uses a stub tools object so only routing and parsing are
+measured; `db` runs the same commands against db_tools on a temporary file.
+"""
+import argparse
+import json
+import time
+
+from agent import OMSAgent
+from database.db import close_db, init_db
+from handler.schema import db_tools
+
+from .common import temp_db_path
+
+
+class StubTools:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: {"status": "success"}
+
+
+def commands(n: int):
+    templates = (
+        "add product sku=SKU{i} name=item{i} price=500 desc=wireless",
+        "get product id={p}",
+        "create order number=ORD{i} status=CREATED",
+        "add item order_id={p} product_id={p} qty=2 price=500",
+        "make payment order_id={p} amount=1000 method=upi status=SUCCESS",
+        "ship order order_id={p} tracking=TRACK{i} status=SHIPPED",
+    )
+    return [templates[i % len(templates)].format(i=i, p=i // len(templates) + 1) for i in range(n)]
+
+
+def run(agent, cmds):
+    start = time.perf_counter()
+    for cmd in cmds:
+        agent.handle(cmd)
+    return round(len(cmds) / (time.perf_counter() - start))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--commands", type=int, default=200_000)
+    args = parser.parse_args()
+
+    cmds = commands(args.commands)
+    print(json.dumps({"mode": "parse_only", "commands_per_sec": run(OMSAgent(StubTools()), cmds)}))
+
+    with temp_db_path() as path:
+        conn = init_db(path)
+        print(json.dumps({"mode": "db", "commands_per_sec": run(OMSAgent(db_tools(conn)), cmds[:20_000])}))
+        close_db(conn)
+
+
+if __name__ == "__main__":
+    main()
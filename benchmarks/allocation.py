@@ -0,0 +1,77 @@
+"""
+allocate_orders over batches of pending multi-line orders: plan-only and
+commit, with the time per order and the shipments per order it produced.
+
+    python -m benchmarks.allocation --orders 20000 --batch 1000 5000
+"""
+import argparse
+import json
+import random
+import time
+
+from database.db import close_db, init_db
+from handler.schema import db_tools
+
+from .common import temp_db_path
+
+
+def seed(conn, orders: int, products: int, warehouses: int):
+    rng = random.Random(11)
+    with conn:
+        conn.executemany(
+            "INSERT INTO products (sku, name, price, description) VALUES (?, ?, 10.0, 'd')",
+            ((f"SKU{i}", f"Product {i}") for i in range(products)),
+        )
+        conn.executemany(
+            "INSERT INTO warehouses (name, location) VALUES (?, ?)",
+            ((f"WH{w}", f"City{w}") for w in range(warehouses)),
+        )
+        # Each product is stocked in about half of the warehouses.
+        conn.executemany(
+            "INSERT INTO inventory (product_id, warehouse_id, quantity) VALUES (?, ?, ?)",
+            ((p, w, rng.randint(20, 200)) for p in range(1, products + 1)
+             for w in range(1, warehouses + 1) if rng.random() < 0.5),
+        )
+        conn.executemany(
+            "INSERT INTO orders (order_number, status) VALUES (?, 'CREATED')",
+            ((f"ORD{i}",) for i in range(orders)),
+        )
+        conn.executemany(
+            "INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (?, ?, ?, 10.0)",
+            ((o, p, rng.randint(1, 3)) for o in range(1, orders + 1)
+             for p in rng.sample(range(1, products + 1), rng.randint(1, 6))),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=20_000)
+    parser.add_argument("--products", type=int, default=2_000)
+    parser.add_argument("--warehouses", type=int, default=8)
+    parser.add_argument("--batch", type=int, nargs="+", default=[1000, 5000])
+    args = parser.parse_args()
+
+    with temp_db_path() as path:
+        conn = init_db(path)
+        seed(conn, args.orders, args.products, args.warehouses)
+        tools = db_tools(conn)
+
+        for size in args.batch:
+            result = {"batch": size}
+            for mode, commit in (("plan", False), ("commit", True)):
+                start = time.perf_counter()
+                data = tools.allocate_orders(limit=size, commit=commit)["data"]
+                elapsed = time.perf_counter() - start
+                planned = len(data["orders"])
+                result[f"{mode}_ms"] = round(elapsed * 1000, 1)
+                result[f"{mode}_us_per_order"] = round(elapsed / max(1, size) * 1e6, 1)
+            result["allocated"] = planned
+            result["unallocated"] = len(data["unallocated"])
+            result["shipments_per_order"] = round(data["shipment_count"] / max(1, planned), 3)
+            print(json.dumps(result))
+
+        close_db(conn)
+
+
+if __name__ == "__main__":
+    main()
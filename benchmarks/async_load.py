@@ -0,0 +1,101 @@
+"""
+get_order latency under many concurrent clients: blocking calls on the event
+loop (sync handlers) vs AsyncDbTools (async handlers).
+
+    python -m benchmarks.async_load --clients 500
+
+Clients issue requests on a fixed schedule (open loop) and latency is
+measured from the scheduled time. A few clients also issue a slow
+get_all_products read to show head-of-line blocking in the sync path.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from database.db import ConnectionPool, close_db, init_db
+from handler.async_schema import AsyncDbTools
+from handler.schema import db_tools
+
+from .common import summarize, temp_db_path
+
+
+def seed(path: str, orders: int, products: int):
+    conn = init_db(path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO orders (order_number, status) VALUES (?, 'CREATED')",
+            ((f"ORD{i}",) for i in range(orders)),
+        )
+        conn.executemany(
+            "INSERT INTO products (sku, name, price, description) VALUES (?, 'p', 1.0, 'd')",
+            ((f"SKU{i}",) for i in range(products)),
+        )
+    close_db(conn)
+
+
+async def client(call, slot: int, requests: int, orders: int, interval: float, slow: bool, latencies: list):
+    """
+    Open-loop client: request n is due at a fixed time and its latency is
+    measured from that time, so stalls of the event loop count against it.
+    """
+    rng = random.Random(slot)
+    loop = asyncio.get_running_loop()
+    start = loop.time() + rng.random() * interval
+    for n in range(requests):
+        due = start + n * interval
+        await asyncio.sleep(max(0.0, due - loop.time()))
+        if slow and n == 0:
+            await call("get_all_products")
+            continue
+        await call("get_order", rng.randint(1, orders))
+        latencies.append(loop.time() - due)
+
+
+async def run(call, clients: int, requests: int, orders: int, rate: float, slow_every: int):
+    latencies = []
+    interval = clients / rate
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(call, i, requests, orders, interval, bool(slow_every) and i % slow_every == 0, latencies)
+        for i in range(clients)
+    ))
+    elapsed = time.perf_counter() - start
+    return {**summarize(latencies), "requests_per_sec": round(len(latencies) / elapsed)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=2000.0, help="offered get_order calls per second across all clients")
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--slow-every", type=int, default=100, help="every Nth client starts with get_all_products; 0 disables")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    with temp_db_path() as path:
+        seed(path, args.orders, args.products)
+        pool = ConnectionPool(path)
+        tools = db_tools(pool)
+
+        async def sync_call(method, *params):
+            return getattr(tools, method)(*params)
+
+        adb = AsyncDbTools(tools, max_workers=args.workers, max_concurrency=args.clients)
+
+        async def async_call(method, *params):
+            return await adb.run(method, *params)
+
+        for mode, call in (("sync", sync_call), ("async", async_call)):
+            result = asyncio.run(run(call, args.clients, args.requests, args.orders, args.rate, args.slow_every))
+            print(json.dumps({"mode": mode, "clients": args.clients, **result}))
+
+        adb.close()
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
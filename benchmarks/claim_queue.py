@@ -0,0 +1,92 @@
+"""
+Drain a queue of PAID orders with competing worker processes, each
+claiming batches with claim_next_orders and marking them SHIPPED. Checks
+that no order was processed twice.
+
+    python -m benchmarks.claim_queue --orders 20000 --workers 1 8 --batch 1 10 100
+"""
+import argparse
+import json
+import multiprocessing
+import time
+
+from database.db import close_db, init_db
+from handler.schema import db_tools
+
+from .common import temp_db_path
+
+
+def seed(path: str, orders: int):
+    conn = init_db(path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO orders (order_number, status) VALUES (?, 'PAID')",
+            ((f"ORD{i}",) for i in range(orders)),
+        )
+    close_db(conn)
+
+
+def worker(path: str, name: str, batch: int, start, results):
+    conn = init_db(path)
+    tools = db_tools(conn, cache_size=0)
+    processed, claims = [], 0
+    start.wait()
+    while True:
+        res = tools.claim_next_orders("PAID", batch, worker=name)
+        orders = res["data"]["orders"]
+        if not orders:
+            break
+        claims += 1
+
+        def ship():
+            for order in orders:
+                if tools.update_order_status(order["id"], "SHIPPED", worker=name)["status"] == "success":
+                    processed.append(order["id"])
+
+        tools.transaction(ship)
+    close_db(conn)
+    results.put((processed, claims))
+
+
+def run(path: str, workers: int, batch: int, orders: int):
+    seed(path, orders)
+    ctx = multiprocessing.get_context("spawn")
+    start, results = ctx.Event(), ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(path, f"w{i}", batch, start, results)) for i in range(workers)]
+    for p in procs:
+        p.start()
+    time.sleep(1.0)  # let every worker finish importing and connecting
+    t = time.perf_counter()
+    start.set()
+    outcomes = [results.get() for _ in procs]
+    elapsed = time.perf_counter() - t
+    for p in procs:
+        p.join()
+
+    processed = [order_id for ids, _ in outcomes for order_id in ids]
+    return {
+        "workers": workers,
+        "batch": batch,
+        "orders_per_sec": round(len(processed) / elapsed),
+        "claims_per_sec": round(sum(c for _, c in outcomes) / elapsed),
+        "processed": len(processed),
+        "duplicates": len(processed) - len(set(processed)),
+        "per_worker": [len(ids) for ids, _ in outcomes],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        for batch in args.batch:
+            with temp_db_path() as path:
+                print(json.dumps(run(path, workers, batch, args.orders)))
+
+
+if __name__ == "__main__":
+    main()
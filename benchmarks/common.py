@@ -0,0 +1,44 @@
+# common.py
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def temp_db_path(name: str = "bench.db"):
+    """Yield a path to a database file inside a throwaway directory."""
+    directory = tempfile.mkdtemp(prefix="oms-bench-")
+    try:
+        yield os.path.join(directory, name)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def time_calls(fn, args_list):
+    """Call fn(*args) for every args tuple and return per-call latencies in seconds."""
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples):
+    """Latency summary in microseconds."""
+    ordered = sorted(samples)
+    n = len(ordered)
+
+    def pct(p):
+        return ordered[min(n - 1, int(p * n))] * 1e6
+
+    return {
+        "calls": n,
+        "mean_us": round(statistics.fmean(ordered) * 1e6, 2),
+        "p50_us": round(pct(0.50), 2),
+        "p95_us": round(pct(0.95), 2),
+        "p99_us": round(pct(0.99), 2),
+    }
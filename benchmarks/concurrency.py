@@ -0,0 +1,86 @@
+"""
+Read throughput of get_order with concurrent callers while writes are ongoing.
+
+    python -m benchmarks.concurrency --threads 1 4 16 64
+
+Compares a single shared connection against ConnectionPool.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from database.db import ConnectionPool, close_db, init_db
+from handler.schema import db_tools
+
+from .common import temp_db_path
+
+
+def seed(path: str, orders: int):
+    conn = init_db(path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO orders (order_number, status) VALUES (?, 'CREATED')",
+            ((f"ORD{i}",) for i in range(orders)),
+        )
+    close_db(conn)
+
+
+def run(tools, threads: int, orders: int, duration: float):
+    stop = threading.Event()
+    counts = [0] * threads
+    writes = [0]
+
+    def reader(slot):
+        rng = random.Random(slot)
+        while not stop.is_set():
+            tools.get_order(rng.randint(1, orders))
+            counts[slot] += 1
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            tools.add_order(f"W{threads}-{i}-{time.perf_counter_ns()}", "CREATED")
+            writes[0] += 1
+            i += 1
+
+    with ThreadPoolExecutor(max_workers=threads + 1) as ex:
+        ex.submit(writer)
+        for slot in range(threads):
+            ex.submit(reader, slot)
+        time.sleep(duration)
+        stop.set()
+
+    return {
+        "threads": threads,
+        "reads_per_sec": round(sum(counts) / duration),
+        "writes_per_sec": round(writes[0] / duration),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--duration", type=float, default=3.0)
+    args = parser.parse_args()
+
+    with temp_db_path() as path:
+        seed(path, args.orders)
+
+        for threads in args.threads:
+            conn = init_db(path)
+            result = run(db_tools(conn), threads, args.orders, args.duration)
+            close_db(conn)
+            print(json.dumps({"mode": "shared_connection", **result}))
+
+            pool = ConnectionPool(path)
+            result = run(db_tools(pool), threads, args.orders, args.duration)
+            pool.close()
+            print(json.dumps({"mode": "pool", **result}))
+
+
+if __name__ == "__main__":
+    main()
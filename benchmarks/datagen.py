@@ -0,0 +1,193 @@
+"""
+Deterministic synthetic data for benchmarks: the same scale and seed always
+produce the same database.
+
+    python -m benchmarks.datagen /tmp/oms-bench.db --scale medium
+    python -m benchmarks.datagen /tmp/oms-bench.db --products 200000 --orders 500000
+
+Rows go in through plain INSERTs with every trigger active, so stock levels,
+sales rollups and the search index are populated exactly as in production.
+The target file must not exist yet; this never writes into a live database.
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import time
+from typing import NamedTuple
+
+from database.db import close_db, init_db
+
+
+class Scale(NamedTuple):
+    products: int
+    warehouses: int
+    inventory: int       # (product, warehouse) rows, at most products x warehouses
+    orders: int
+    items_per_order: int  # average; each order gets 1 .. 2 x this many lines
+    payments: int        # at most one per order
+    shipments: int       # at most one per order
+    days: int            # orders are spread over this many days up to END_DATE
+
+
+SCALES = {
+    "tiny": Scale(200, 4, 600, 500, 3, 400, 300, 30),
+    "small": Scale(5_000, 10, 20_000, 20_000, 3, 16_000, 12_000, 90),
+    "medium": Scale(100_000, 20, 400_000, 200_000, 3, 160_000, 120_000, 365),
+    "large": Scale(1_000_000, 50, 4_000_000, 2_000_000, 3, 1_600_000, 1_200_000, 730),
+}
+
+END_DATE = datetime.date(2025, 6, 30)
+# Written to the CURRENT_TIMESTAMP-defaulted columns, which would otherwise
+# differ between runs.
+STAMP = f"{END_DATE.isoformat()} 00:00:00"
+
+ORDER_STATUSES = (("CREATED", 20), ("PAID", 25), ("SHIPPED", 25), ("DELIVERED", 25), ("CANCELLED", 5))
+PAYMENT_STATUSES = (("SUCCESS", 85), ("PENDING", 10), ("FAILED", 5))
+PAYMENT_METHODS = ("UPI", "CARD", "NETBANKING", "COD")
+SHIPMENT_STATUSES = {"CREATED": "PENDING", "PAID": "PENDING", "SHIPPED": "IN_TRANSIT",
+                     "DELIVERED": "DELIVERED", "CANCELLED": "CANCELLED"}
+CITIES = ("Bangalore", "Mumbai", "Delhi", "Chennai", "Hyderabad", "Pune", "Kolkata", "Ahmedabad")
+
+BRANDS = [f"brand{i}" for i in range(100)]
+ADJECTIVES = ("wireless", "compact", "ergonomic", "premium", "portable", "smart", "classic", "slim")
+NOUNS = ("mouse", "keyboard", "lamp", "chair", "desk", "speaker", "charger", "backpack", "bottle",
+         "monitor", "kettle", "jacket", "camera", "router", "watch", "cable")
+
+CHUNK = 10_000
+
+
+def sku(product_id: int) -> str:
+    return f"SKU{product_id:08d}"
+
+
+def order_number(order_id: int) -> str:
+    return f"ORD{order_id:09d}"
+
+
+def tracking_number(order_id: int) -> str:
+    return f"TRK{order_id:010d}"
+
+
+def _weighted(rng, choices):
+    return rng.choices([c for c, _ in choices], [w for _, w in choices])[0]
+
+
+def _spread(n: int, total: int, index: int) -> bool:
+    """True for exactly n of the indexes 1..total, evenly spaced."""
+    return index * n // total != (index - 1) * n // total
+
+
+def check_scale(scale: Scale):
+    if min(scale) < 1:
+        raise ValueError("every count must be >= 1")
+    if scale.inventory > scale.products * scale.warehouses:
+        raise ValueError("inventory cannot exceed products x warehouses")
+    if scale.payments > scale.orders or scale.shipments > scale.orders:
+        raise ValueError("payments and shipments are at most one per order")
+
+
+def generate(conn, scale: Scale, seed: int = 0) -> dict:
+    """
+    Fill an empty, migrated database. Ids are dense and start at 1, so
+    benchmarks can draw random ids from 1..count; SKUs, order numbers and
+    tracking numbers follow sku(), order_number() and tracking_number().
+    Returns the row count of every table written.
+    """
+    check_scale(scale)
+    rng = random.Random(seed)
+    prices = [round(rng.uniform(1, 500), 2) for _ in range(scale.products)]
+    counts = dict.fromkeys(("products", "warehouses", "inventory", "orders", "order_items",
+                            "payments", "shipments"), 0)
+
+    def insert(table, sql, rows):
+        rows = list(rows)
+        conn.executemany(sql, rows)
+        counts[table] += len(rows)
+
+    with conn:
+        for start in range(0, scale.products, CHUNK):
+            insert("products", "INSERT INTO products (id, sku, name, price, description, created_at) "
+                               "VALUES (?, ?, ?, ?, ?, ?)", (
+                (p, sku(p), f"{rng.choice(BRANDS)} {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}",
+                 prices[p - 1], f"Synthetic product {p}", STAMP)
+                for p in range(start + 1, min(start + CHUNK, scale.products) + 1)
+            ))
+        insert("warehouses", "INSERT INTO warehouses (id, name, location, created_at) VALUES (?, ?, ?, ?)", (
+            (w, f"WH{w:03d}", CITIES[w % len(CITIES)], STAMP) for w in range(1, scale.warehouses + 1)
+        ))
+        # Row j stocks product j % products in warehouse (j // products + product) % warehouses,
+        # which never repeats a pair while j < products x warehouses.
+        for start in range(0, scale.inventory, CHUNK):
+            insert("inventory", "INSERT INTO inventory (product_id, warehouse_id, quantity, updated_at) "
+                                "VALUES (?, ?, ?, ?)", (
+                (j % scale.products + 1, (j // scale.products + j % scale.products) % scale.warehouses + 1,
+                 rng.randint(0, 500), STAMP)
+                for j in range(start, min(start + CHUNK, scale.inventory))
+            ))
+
+        first_day = END_DATE - datetime.timedelta(days=scale.days - 1)
+        for start in range(1, scale.orders + 1, CHUNK):
+            orders, items, payments, shipments = [], [], [], []
+            for o in range(start, min(start + CHUNK, scale.orders + 1)):
+                status = _weighted(rng, ORDER_STATUSES)
+                day = first_day + datetime.timedelta(days=(o - 1) * scale.days // scale.orders)
+                created = f"{day.isoformat()} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00"
+                orders.append((o, order_number(o), status, created))
+
+                total = 0.0
+                for product_id in rng.sample(range(1, scale.products + 1),
+                                             min(scale.products, rng.randint(1, 2 * scale.items_per_order - 1))):
+                    quantity = rng.randint(1, 5)
+                    items.append((o, product_id, quantity, prices[product_id - 1]))
+                    total += quantity * prices[product_id - 1]
+
+                if _spread(scale.payments, scale.orders, o):
+                    payment_status = "SUCCESS" if status in ("SHIPPED", "DELIVERED") else _weighted(rng, PAYMENT_STATUSES)
+                    payments.append((o, round(total, 2), rng.choice(PAYMENT_METHODS), payment_status))
+                if _spread(scale.shipments, scale.orders, o):
+                    shipments.append((o, tracking_number(o), SHIPMENT_STATUSES[status]))
+
+            insert("orders", "INSERT INTO orders (id, order_number, status, created_at) VALUES (?, ?, ?, ?)", orders)
+            insert("order_items", "INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (?, ?, ?, ?)",
+                   items)
+            insert("payments", "INSERT INTO payments (order_id, amount, method, status) VALUES (?, ?, ?, ?)", payments)
+            insert("shipments", "INSERT INTO shipments (order_id, tracking_number, status) VALUES (?, ?, ?)",
+                   shipments)
+    conn.execute("PRAGMA optimize")
+    return counts
+
+
+def scale_from_args(args) -> Scale:
+    """The --scale preset with any explicit per-table counts applied on top."""
+    overrides = {field: getattr(args, field) for field in Scale._fields if getattr(args, field) is not None}
+    return SCALES[args.scale]._replace(**overrides)
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser, default: str = "small"):
+    parser.add_argument("--scale", choices=SCALES, default=default, help="preset row counts")
+    for field in Scale._fields:
+        parser.add_argument(f"--{field.replace('_', '-')}", dest=field, type=int, help="override the preset")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("db_path", help="new database file to create")
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    if os.path.exists(args.db_path):
+        parser.error(f"{args.db_path} already exists")
+    scale = scale_from_args(args)
+    conn = init_db(args.db_path)
+    start = time.perf_counter()
+    counts = generate(conn, scale, args.seed)
+    seconds = time.perf_counter() - start
+    close_db(conn)
+    print(json.dumps({"scale": scale._asdict(), "seed": args.seed, "rows": counts, "seconds": round(seconds, 2)}))
+
+
+if __name__ == "__main__":
+    main()
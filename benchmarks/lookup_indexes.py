@@ -0,0 +1,82 @@
+"""
+Order-scoped lookup latency with and without the secondary indexes.
+
+    python -m benchmarks.lookup_indexes --sizes 10000 1000000 10000000
+
+`size` is the number of order_items rows; orders, shipments and payments
+each get size / 10 rows.
+"""
+import argparse
+import json
+import random
+
+from database.db import close_db, init_db
+from handler.schema import db_tools
+
+from .common import summarize, temp_db_path, time_calls
+
+INDEXES = ("idx_order_items_order_totals", "idx_shipments_order_id", "idx_payments_order_id")
+
+
+def populate(conn, size: int):
+    orders = max(1, size // 10)
+    conn.execute("PRAGMA foreign_keys = OFF")
+    with conn:
+        conn.executemany(
+            "INSERT INTO orders (id, order_number, status) VALUES (?, ?, 'CREATED')",
+            ((i, f"ORD{i}") for i in range(1, orders + 1)),
+        )
+        conn.executemany(
+            "INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (?, 1, 1, 10.0)",
+            ((i % orders + 1,) for i in range(size)),
+        )
+        conn.executemany(
+            "INSERT INTO shipments (order_id, tracking_number, status) VALUES (?, ?, 'SHIPPED')",
+            ((i, f"TRK{i}") for i in range(1, orders + 1)),
+        )
+        conn.executemany(
+            "INSERT INTO payments (order_id, amount, method, status) VALUES (?, 10.0, 'UPI', 'SUCCESS')",
+            ((i,) for i in range(1, orders + 1)),
+        )
+    conn.execute("PRAGMA foreign_keys = ON")
+    return orders
+
+
+def measure(tools, orders: int, lookups: int):
+    rng = random.Random(42)
+    args = [(rng.randint(1, orders),) for _ in range(lookups)]
+    return {
+        name: summarize(time_calls(getattr(tools, name), args))
+        for name in ("get_order_items", "get_shipments_by_order", "get_payments_by_order")
+    }
+
+
+def run(size: int, lookups: int):
+    with temp_db_path() as path:
+        conn = init_db(path)
+        orders = populate(conn, size)
+        tools = db_tools(conn)
+
+        after = measure(tools, orders, lookups)
+
+        for name in INDEXES:
+            conn.execute(f"DROP INDEX {name}")
+        # Full scans get expensive quickly; keep the unindexed run short.
+        before = measure(tools, orders, max(3, lookups // max(1, size // 10000)))
+
+        close_db(conn)
+    return {"rows": size, "before": before, "after": after}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        print(json.dumps(run(size, args.lookups)))
+
+
+if __name__ == "__main__":
+    main()
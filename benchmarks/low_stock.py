@@ -0,0 +1,86 @@
+"""
+Low-stock query latency over the stock_levels summary vs aggregating
+inventory on the fly.
+
+    python -m benchmarks.low_stock --inventory 1000000
+"""
+import argparse
+import json
+import random
+import time
+
+from database.db import close_db, init_db
+from handler.schema import db_tools
+
+from .common import summarize, temp_db_path, time_calls
+
+WAREHOUSES = 4
+
+NAIVE_SQL = """
+SELECT i.product_id, SUM(i.quantity) - SUM(i.reserved) AS available
+FROM inventory i JOIN stock_levels s ON s.product_id = i.product_id
+GROUP BY i.product_id
+HAVING available < MAX(s.reorder_level)
+LIMIT 100
+"""
+
+
+def seed(conn, inventory: int, low_ratio: float):
+    products = inventory // WAREHOUSES
+    rng = random.Random(3)
+    conn.execute("PRAGMA foreign_keys = OFF")
+    with conn:
+        conn.executemany(
+            "INSERT INTO products (id, sku, name, price, description) VALUES (?, ?, 'p', 1.0, 'd')",
+            ((i, f"SKU{i}") for i in range(1, products + 1)),
+        )
+        conn.executemany(
+            "INSERT INTO warehouses (id, name, location) VALUES (?, ?, 'x')",
+            ((w, f"WH{w}") for w in range(1, WAREHOUSES + 1)),
+        )
+        conn.executemany(
+            "INSERT INTO inventory (product_id, warehouse_id, quantity) VALUES (?, ?, ?)",
+            ((p, w, rng.randint(0, 100)) for p in range(1, products + 1) for w in range(1, WAREHOUSES + 1)),
+        )
+        # most products get a threshold they clear easily; low_ratio of them cannot
+        conn.execute(
+            "UPDATE stock_levels SET reorder_level = CASE WHEN abs(random()) % 10000 < ? THEN 1000 ELSE 1 END",
+            (int(low_ratio * 10000),),
+        )
+    conn.execute("PRAGMA foreign_keys = ON")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--inventory", type=int, default=1_000_000)
+    parser.add_argument("--low-ratio", type=float, default=0.01)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    with temp_db_path() as path:
+        conn = init_db(path)
+        start = time.perf_counter()
+        seed(conn, args.inventory, args.low_ratio)
+        seed_seconds = time.perf_counter() - start
+        tools = db_tools(conn)
+
+        summary = summarize(time_calls(tools.get_low_stock, [(100, 0)] * args.calls))
+        naive = summarize(time_calls(lambda: conn.execute(NAIVE_SQL).fetchall(), [()] * 5))
+        start = time.perf_counter()
+        drift = tools.check_stock_levels()["data"]["drifted"]
+        check_seconds = time.perf_counter() - start
+
+        close_db(conn)
+
+    print(json.dumps({
+        "inventory_rows": args.inventory,
+        "seed_seconds_with_triggers": round(seed_seconds, 2),
+        "get_low_stock": summary,
+        "aggregate_inventory": naive,
+        "consistency_check_seconds": round(check_seconds, 2),
+        "drifted": drift,
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Cost of the metrics layer per call.
+
+    python -m benchmarks.metrics_overhead --calls 200000
+
+Reports the raw cost of one METRICS.record_tool call and the end-to-end
+get_order latency with metrics enabled vs disabled.
+"""
+import argparse
+import json
+import time
+
+from database.db import close_db, init_db
+from handler.metrics import METRICS
+from handler.schema import db_tools
+
+from .common import temp_db_path
+
+
+def per_call_ns(fn, calls: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter_ns() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+
+    record_ns = per_call_ns(lambda: METRICS.record_tool("bench", 1e-5, 1, False), args.calls)
+
+    with temp_db_path() as path:
+        conn = init_db(path)
+        tools = db_tools(conn)
+        tools.add_order("ORD1", "CREATED")
+
+        METRICS.enabled = True
+        enabled_ns = per_call_ns(lambda: tools.get_order(1), args.calls)
+        METRICS.enabled = False
+        disabled_ns = per_call_ns(lambda: tools.get_order(1), args.calls)
+        METRICS.enabled = True
+        close_db(conn)
+
+    print(json.dumps({
+        "record_call_ns": round(record_ns),
+        "get_order_enabled_ns": round(enabled_ns),
+        "get_order_disabled_ns": round(disabled_ns),
+        # one tool record plus one statement record per get_order
+        "overhead_per_call_ns": round(enabled_ns - disabled_ns),
+    }))
+
+
+if __name__ == "__main__":
+    main()
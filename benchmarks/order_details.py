@@ -0,0 +1,89 @@
+"""
+get_order_details / get_orders_details vs the per-call path an agent used
+before (get_order, get_order_items, get_shipments_by_order,
+get_payments_by_order, then get_product per line).
+
+    python -m benchmarks.order_details --orders 50000 --batch 1 1000
+"""
+import argparse
+import json
+import random
+import time
+
+from database.db import close_db, init_db
+from handler.schema import db_tools
+
+from .common import temp_db_path
+
+
+def seed(conn, orders: int, products: int):
+    rng = random.Random(7)
+    with conn:
+        conn.executemany(
+            "INSERT INTO products (sku, name, price, description) VALUES (?, ?, 10.0, 'd')",
+            ((f"SKU{i}", f"Product {i}") for i in range(products)),
+        )
+        conn.executemany(
+            "INSERT INTO orders (order_number, status) VALUES (?, 'PAID')",
+            ((f"ORD{i}",) for i in range(orders)),
+        )
+        conn.executemany(
+            "INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (?, ?, 1, 10.0)",
+            ((o, rng.randint(1, products)) for o in range(1, orders + 1) for _ in range(3)),
+        )
+        conn.executemany(
+            "INSERT INTO payments (order_id, amount, method, status) VALUES (?, 30.0, 'UPI', 'SUCCESS')",
+            ((o,) for o in range(1, orders + 1)),
+        )
+        conn.executemany(
+            "INSERT INTO shipments (order_id, tracking_number, status) VALUES (?, ?, 'SHIPPED')",
+            ((o, f"TRK{o}") for o in range(1, orders + 1)),
+        )
+
+
+def per_call(tools, order_ids):
+    for order_id in order_ids:
+        tools.get_order(order_id)
+        items = tools.get_order_items(order_id)["data"]
+        tools.get_shipments_by_order(order_id)
+        tools.get_payments_by_order(order_id)
+        for item in items:
+            tools.get_product(item["product_id"], use_cache=False)
+
+
+def aggregate(tools, order_ids):
+    if len(order_ids) == 1:
+        tools.get_order_details(order_ids[0])
+    else:
+        tools.get_orders_details(order_ids=order_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=50_000)
+    parser.add_argument("--products", type=int, default=5_000)
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with temp_db_path() as path:
+        conn = init_db(path)
+        seed(conn, args.orders, args.products)
+        tools = db_tools(conn)
+        rng = random.Random(1)
+
+        for size in args.batch:
+            samples = [rng.sample(range(1, args.orders + 1), size) for _ in range(args.repeat)]
+            result = {"orders": size}
+            for mode, fn in (("per_call", per_call), ("aggregate", aggregate)):
+                start = time.perf_counter()
+                for ids in samples:
+                    fn(tools, ids)
+                result[f"{mode}_ms"] = round((time.perf_counter() - start) / args.repeat * 1000, 3)
+            print(json.dumps(result))
+
+        close_db(conn)
+
+
+if __name__ == "__main__":
+    main()
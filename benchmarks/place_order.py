@@ -0,0 +1,87 @@
+"""
+place_order throughput (orders/second) under contention on hot SKUs.
+
+    python -m benchmarks.place_order --threads 1 8 32 --hot-skus 1 10 1000
+
+Every order buys 1-3 lines drawn from `hot_skus` products stocked in four
+warehouses. Runs against a ConnectionPool with and without group commit.
+"""
+import argparse
+import itertools
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from database.db import ConnectionPool
+from handler.schema import db_tools
+
+from .common import temp_db_path
+
+WAREHOUSES = 4
+
+
+def seed(tools, hot_skus: int):
+    tools.add_warehouses_bulk([{"name": f"WH{w}", "location": f"City{w}"} for w in range(WAREHOUSES)])
+    tools.add_products_bulk(
+        [{"sku": f"SKU{i}", "name": f"Product {i}", "price": 10.0, "description": "bench"} for i in range(hot_skus)]
+    )
+    tools.add_inventory_bulk(
+        [
+            {"product_id": p, "warehouse_id": w, "quantity": 10_000_000}
+            for p in range(1, hot_skus + 1)
+            for w in range(1, WAREHOUSES + 1)
+        ]
+    )
+
+
+def run(threads: int, hot_skus: int, orders: int, group_commit: bool):
+    with temp_db_path() as path:
+        pool = ConnectionPool(path, group_commit=group_commit)
+        tools = db_tools(pool)
+        seed(tools, hot_skus)
+
+        counter = itertools.count()
+
+        def place(_):
+            i = next(counter)
+            rng = random.Random(i)
+            items = [
+                {"product_id": rng.randint(1, hot_skus), "quantity": rng.randint(1, 3), "price": 10.0}
+                for _ in range(rng.randint(1, 3))
+            ]
+            return tools.place_order(f"ORD{i}", "CREATED", items)["status"]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as ex:
+            statuses = list(ex.map(place, range(orders)))
+        elapsed = time.perf_counter() - start
+
+        stats = pool.stats()
+        pool.close()
+
+    return {
+        "threads": threads,
+        "hot_skus": hot_skus,
+        "group_commit": group_commit,
+        "orders_per_sec": round(orders / elapsed),
+        "errors": sum(1 for s in statuses if s != "success"),
+        "avg_batch_size": stats["avg_batch_size"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--hot-skus", type=int, nargs="+", default=[1, 10, 1000])
+    parser.add_argument("--orders", type=int, default=5000)
+    args = parser.parse_args()
+
+    for threads in args.threads:
+        for hot_skus in args.hot_skus:
+            for group_commit in (False, True):
+                print(json.dumps(run(threads, hot_skus, args.orders, group_commit)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Report latency over a year of orders, for the full year, 90 days and one
+month. Sales reports read the daily rollups; live_revenue_by_day is the
+same per-day report aggregated from order_items for comparison. Also times
+the seed (triggers maintain the rollups while it inserts) and a full
+rollup rebuild.
+
+    python -m benchmarks.reports --items 10000000
+"""
+import argparse
+import json
+import random
+import time
+
+from database.db import close_db, init_db
+from handler.schema import db_tools
+
+from .common import temp_db_path
+
+ITEMS_PER_ORDER = 3
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+LIVE_REVENUE_BY_DAY = (
+    "SELECT o.order_date AS day, COUNT(DISTINCT o.id) AS orders, SUM(oi.quantity) AS units, "
+    "ROUND(SUM(oi.quantity * oi.price), 2) AS revenue "
+    "FROM orders o JOIN order_items oi ON oi.order_id = o.id "
+    "WHERE o.order_date BETWEEN ? AND ? GROUP BY o.order_date ORDER BY o.order_date"
+)
+
+
+def seed(conn, items: int, products: int, warehouses: int):
+    orders = max(1, items // ITEMS_PER_ORDER)
+    rng = random.Random(5)
+    conn.execute("PRAGMA foreign_keys = OFF")
+    with conn:
+        conn.executemany(
+            "INSERT INTO products (id, sku, name, price, description) VALUES (?, ?, ?, 10.0, 'd')",
+            ((i, f"SKU{i}", f"Product {i}") for i in range(1, products + 1)),
+        )
+        conn.executemany(
+            "INSERT INTO warehouses (id, name, location) VALUES (?, ?, ?)",
+            ((w, f"WH{w}", f"City{w}") for w in range(1, warehouses + 1)),
+        )
+        conn.executemany(
+            "INSERT INTO orders (id, order_number, status, created_at) "
+            "VALUES (?, ?, 'PAID', datetime('2025-01-01', '+' || ? || ' seconds'))",
+            ((o, f"ORD{o}", o * SECONDS_PER_YEAR // orders) for o in range(1, orders + 1)),
+        )
+        lines = [(o, rng.randint(1, products), rng.randint(1, 3)) for o in range(1, orders + 1)
+                 for _ in range(ITEMS_PER_ORDER)]
+        conn.executemany(
+            "INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (?, ?, ?, 10.0)",
+            lines,
+        )
+        conn.executemany(
+            "INSERT INTO allocations (order_id, product_id, warehouse_id, quantity) VALUES (?, ?, ?, ?)",
+            ((o, p, rng.randint(1, warehouses), q) for o, p, q in lines),
+        )
+        conn.executemany(
+            "INSERT INTO payments (order_id, amount, method, status) VALUES (?, 20.0, ?, 'SUCCESS')",
+            ((o, rng.choice(("UPI", "CARD", "COD"))) for o in range(1, orders + 1)),
+        )
+    conn.execute("PRAGMA foreign_keys = ON")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--products", type=int, default=5_000)
+    parser.add_argument("--warehouses", type=int, default=8)
+    args = parser.parse_args()
+
+    with temp_db_path() as path:
+        conn = init_db(path)
+        t = time.perf_counter()
+        seed(conn, args.items, args.products, args.warehouses)
+        seed_s = time.perf_counter() - t
+        tools = db_tools(conn, cache_size=0)
+        t = time.perf_counter()
+        tools.rebuild_rollups()
+        print(json.dumps({"order_items": args.items, "seed_s": round(seed_s, 2),
+                          "rebuild_rollups_s": round(time.perf_counter() - t, 2)}))
+
+        reports = {
+            "revenue_by_day": lambda s, e: tools.get_revenue_by_day(s, e),
+            "revenue_by_week": lambda s, e: tools.get_revenue_by_day(s, e, "week"),
+            "revenue_by_product": tools.get_revenue_by_product,
+            "revenue_by_warehouse": tools.get_revenue_by_warehouse,
+            "top_skus": lambda s, e: tools.get_top_skus(s, e, 10),
+            "order_value": tools.get_order_value_stats,
+            "payment_mix": tools.get_payment_mix,
+        }
+
+        def live(start, end):
+            conn.execute(LIVE_REVENUE_BY_DAY, (start or "0000-01-01", end or "9999-12-31")).fetchall()
+            return {"status": "success"}
+
+        reports["live_revenue_by_day"] = live
+        ranges = (("year", (None, None)), ("90_days", ("2025-04-01", "2025-06-29")),
+                  ("month", ("2025-06-01", "2025-06-30")))
+        for label, (start, end) in ranges:
+            result = {"order_items": args.items, "range": label}
+            for name, fn in reports.items():
+                t = time.perf_counter()
+                res = fn(start, end)
+                assert res["status"] == "success", res
+                result[f"{name}_s"] = round(time.perf_counter() - t, 3)
+            print(json.dumps(result))
+
+        close_db(conn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Memory and allocation cost of reading every order_items row as dicts,
+named-tuple records or columns.
+
+    python -m benchmarks.row_shapes --orders 333333
+
+Each shape is read twice through iter_order_items: once keeping every chunk
+(the whole result held, as a bulk export would) and once dropping each
+chunk after use (streaming). Reported per run:
+
+    seconds        wall time, measured without tracemalloc
+    peak_mb        tracemalloc peak while reading
+    held_mb        traced memory still held by the result afterwards
+    blocks         net allocated blocks (sys.getallocatedblocks) held afterwards
+    gc_collections garbage collector runs triggered while reading
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+from database.db import close_db, init_db
+from handler.rows import SHAPES
+from handler.schema import db_tools
+
+from . import datagen
+from .common import temp_db_path
+
+
+def read(tools, shape: str, chunk_size: int, keep: bool):
+    held, rows = [], 0
+    for chunk in tools.iter_order_items(chunk_size, shape):
+        rows += len(chunk["id"]) if shape == "columns" else len(chunk)
+        if keep:
+            held.append(chunk)
+    return held, rows
+
+
+def gc_runs() -> int:
+    return sum(s["collections"] for s in gc.get_stats())
+
+
+def measure(tools, shape: str, chunk_size: int, keep: bool) -> dict:
+    gc.collect()
+    start = time.perf_counter()
+    held, rows = read(tools, shape, chunk_size, keep)
+    seconds = time.perf_counter() - start
+    del held
+    gc.collect()
+
+    blocks, runs = sys.getallocatedblocks(), gc_runs()
+    tracemalloc.start()
+    held, _ = read(tools, shape, chunk_size, keep)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {
+        "shape": shape,
+        "mode": "hold" if keep else "stream",
+        "rows": rows,
+        "seconds": round(seconds, 2),
+        "peak_mb": round(peak / 2 ** 20, 1),
+        "held_mb": round(current / 2 ** 20, 1),
+        "blocks": sys.getallocatedblocks() - blocks,
+        "gc_collections": gc_runs() - runs,
+    }
+    del held
+    gc.collect()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    datagen.add_scale_arguments(parser, default="medium")
+    parser.set_defaults(orders=333_333)
+    args = parser.parse_args()
+
+    scale = datagen.scale_from_args(args)
+    with temp_db_path() as path:
+        conn = init_db(path)
+        counts = datagen.generate(conn, scale, args.seed)
+        tools = db_tools(conn, cache_size=0)
+        print(json.dumps({"order_items": counts["order_items"], "chunk_size": args.chunk_size}))
+        for keep in (True, False):
+            for shape in SHAPES:
+                print(json.dumps(measure(tools, shape, args.chunk_size, keep)))
+        close_db(conn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+search_products and get_products_by_sku_prefix latency on a large catalog,
+against the LIKE scan an agent would otherwise need.
+
+    python -m benchmarks.search --products 1000000
+"""
+import argparse
+import json
+import random
+import time
+
+from database.db import close_db, init_db
+from handler.schema import db_tools
+
+from .common import summarize, temp_db_path, time_calls
+
+BRANDS = [f"brand{i}" for i in range(200)]
+ADJECTIVES = ["wireless", "compact", "ergonomic", "premium", "portable", "smart", "classic", "heavy",
+              "slim", "waterproof", "foldable", "digital", "organic", "vintage", "rugged", "quiet"]
+NOUNS = ["mouse", "keyboard", "lamp", "chair", "desk", "speaker", "charger", "backpack", "bottle",
+         "headphones", "monitor", "kettle", "blender", "jacket", "tent", "camera", "router", "drill",
+         "notebook", "pen", "watch", "scale", "fan", "heater", "mat", "stand", "hub", "cable"]
+FILLER = ["durable", "lightweight", "steel", "cotton", "usb", "battery", "warranty", "gift", "home",
+          "office", "travel", "outdoor", "kitchen", "black", "white", "blue", "red", "green", "large", "small"]
+
+
+def seed(conn, products: int):
+    rng = random.Random(9)
+
+    def rows():
+        for i in range(products):
+            brand, adj, noun = rng.choice(BRANDS), rng.choice(ADJECTIVES), rng.choice(NOUNS)
+            yield (
+                f"{noun[:3].upper()}-{i:07d}",
+                f"{brand} {adj} {noun}",
+                rng.randint(100, 10000),
+                " ".join(rng.sample(FILLER, 6)),
+            )
+
+    with conn:
+        conn.executemany(
+            "INSERT INTO products (sku, name, price, description) VALUES (?, ?, ?, ?)", rows()
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    queries = {
+        # about products / (200 * 28) matches
+        "brand_and_noun": [(f"{rng.choice(BRANDS)} {rng.choice(NOUNS)}",) for _ in range(args.calls)],
+        "three_words": [(f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {rng.choice(FILLER)}",)
+                        for _ in range(args.calls)],
+        "typeahead_prefix": [(f"{rng.choice(BRANDS)} {rng.choice(NOUNS)[:3]}",) for _ in range(args.calls)],
+        # about products / 28 matches: ranking every match dominates
+        "single_common_word": [(rng.choice(NOUNS),) for _ in range(max(3, args.calls // 20))],
+    }
+
+    with temp_db_path() as path:
+        conn = init_db(path)
+        start = time.perf_counter()
+        seed(conn, args.products)
+        seed_seconds = time.perf_counter() - start
+        tools = db_tools(conn, cache_size=0)
+        print(json.dumps({"products": args.products, "seed_seconds_with_fts": round(seed_seconds, 1)}))
+
+        for name, calls in queries.items():
+            summary = summarize(time_calls(lambda q: tools.search_products(q, 20), calls))
+            print(json.dumps({"query": name, **summary}))
+
+        prefixes = [(f"{rng.choice(NOUNS)[:3].upper()}-{rng.randint(0, args.products // 1000):04d}",)
+                    for _ in range(args.calls)]
+        summary = summarize(time_calls(lambda p: tools.get_products_by_sku_prefix(p, 100), prefixes))
+        print(json.dumps({"query": "sku_prefix", **summary}))
+
+        like = [(f"%{rng.choice(BRANDS)} %{rng.choice(NOUNS)}%",) for _ in range(5)]
+        summary = summarize(time_calls(
+            lambda q: conn.execute("SELECT * FROM products WHERE name LIKE ? LIMIT 20", (q,)).fetchall(), like
+        ))
+        print(json.dumps({"query": "like_scan_baseline", **summary}))
+
+        close_db(conn)
+
+
+if __name__ == "__main__":
+    main()
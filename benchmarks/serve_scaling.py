@@ -0,0 +1,134 @@
+"""
+Read-heavy tool traffic served by 1..N worker processes sharing one WAL
+database, each laid out like a handler.server worker: its own
+ConnectionPool, db_tools and AsyncDbTools, with every result JSON-encoded
+as the transport would.
+
+    python -m benchmarks.serve_scaling --processes 1 2 4 8 --seconds 5
+
+Throughput can only scale up to the number of cores; cpu_count is part of
+the output.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import time
+
+from database.db import ConnectionPool, close_db, init_db
+from handler.async_schema import AsyncDbTools
+from handler.schema import db_tools
+
+from . import datagen
+from .common import summarize, temp_db_path
+
+# (method, weight); add_order is the write share of the mix.
+READS = (("get_order_details", 30), ("get_product", 25), ("get_order", 15),
+         ("get_product_by_sku", 15), ("search_products", 10))
+
+
+def call_args(rng, method: str, scale: datagen.Scale, serial: str):
+    if method == "add_order":
+        return (serial, "CREATED")
+    if method in ("get_order_details", "get_order"):
+        return (rng.randint(1, scale.orders),)
+    if method == "get_product":
+        return (rng.randint(1, scale.products),)
+    if method == "get_product_by_sku":
+        return (datagen.sku(rng.randint(1, scale.products)),)
+    return (f"{rng.choice(datagen.BRANDS)} {rng.choice(datagen.NOUNS)}",)
+
+
+async def clients(adb, scale, tag: str, concurrency: int, write_ratio: float, deadline: float):
+    methods = [m for m, _ in READS] + ["add_order"]
+    weights = [w * (1 - write_ratio) for _, w in READS] + [100 * write_ratio]
+    latencies, errors, serial = [], 0, 0
+
+    async def client(slot: int):
+        nonlocal errors, serial
+        rng = random.Random(f"{tag}-{slot}")
+        while time.perf_counter() < deadline:
+            method = rng.choices(methods, weights)[0]
+            serial += 1
+            args = call_args(rng, method, scale, f"SRV-{tag}-{serial}")
+            start = time.perf_counter()
+            result = await adb.run(method, *args)
+            json.dumps(result)
+            latencies.append(time.perf_counter() - start)
+            errors += result.get("status") == "error"
+
+    await asyncio.gather(*(client(slot) for slot in range(concurrency)))
+    return latencies, errors
+
+
+def worker(path: str, scale, tag: str, concurrency: int, threads: int, write_ratio: float,
+           seconds: float, ready, start, results):
+    pool = ConnectionPool(path)
+    adb = AsyncDbTools(db_tools(pool), max_workers=threads, max_concurrency=concurrency)
+    ready.release()
+    start.wait()
+    latencies, errors = asyncio.run(
+        clients(adb, scale, tag, concurrency, write_ratio, time.perf_counter() + seconds)
+    )
+    adb.close()
+    pool.close()
+    results.put((latencies, errors))
+
+
+def run(path: str, scale, processes: int, concurrency: int, threads: int, write_ratio: float, seconds: float):
+    ctx = multiprocessing.get_context("spawn")
+    ready, start, results = ctx.Semaphore(0), ctx.Event(), ctx.Queue()
+    procs = [
+        # Runs share the database, so order numbers are tagged with the run too.
+        ctx.Process(target=worker, args=(path, scale, f"{processes}.{i}", concurrency, threads, write_ratio, seconds,
+                                         ready, start, results))
+        for i in range(processes)
+    ]
+    for p in procs:
+        p.start()
+    for _ in procs:
+        ready.acquire()
+    start.set()
+    outcomes = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    latencies = [s for samples, _ in outcomes for s in samples]
+    return {
+        "processes": processes,
+        "ops_per_sec": round(len(latencies) / seconds),
+        **summarize(latencies),
+        "errors": sum(errors for _, errors in outcomes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=16, help="in-flight tool calls per process")
+    parser.add_argument("--threads", type=int, default=4, help="AsyncDbTools threads per process")
+    parser.add_argument("--write-ratio", type=float, default=0.05, help="share of calls that are add_order")
+    datagen.add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    scale = datagen.scale_from_args(args)
+    with temp_db_path() as path:
+        conn = init_db(path)
+        datagen.generate(conn, scale, args.seed)
+        close_db(conn)
+
+        print(json.dumps({"cpu_count": os.cpu_count(), "scale": args.scale, "write_ratio": args.write_ratio}))
+        baseline = None
+        for processes in args.processes:
+            result = run(path, scale, processes, args.concurrency, args.threads, args.write_ratio, args.seconds)
+            baseline = baseline or result["ops_per_sec"]
+            result["speedup"] = round(result["ops_per_sec"] / baseline, 2)
+            result["efficiency"] = round(result["speedup"] / (processes / args.processes[0]), 2)
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
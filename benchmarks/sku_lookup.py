@@ -0,0 +1,74 @@
+"""
+Resolving SKUs to product ids one query per SKU vs one batched query, as an
+import pipeline would, plus single SKU and tracking number lookups.
+
+    python -m benchmarks.sku_lookup --products 1000000 --batch 5000
+"""
+import argparse
+import json
+import random
+
+from database.db import close_db, init_db
+from handler.schema import db_tools
+
+from .common import summarize, temp_db_path, time_calls
+
+
+def seed(conn, products: int):
+    conn.execute("PRAGMA foreign_keys = OFF")
+    with conn:
+        conn.executemany(
+            "INSERT INTO products (id, sku, name, price, description) VALUES (?, ?, 'p', 1.0, 'd')",
+            ((i, f"SKU{i:08d}") for i in range(1, products + 1)),
+        )
+        conn.executemany(
+            "INSERT INTO orders (id, order_number, status) VALUES (?, ?, 'SHIPPED')",
+            ((i, f"ORD{i}") for i in range(1, products // 10 + 1)),
+        )
+        conn.executemany(
+            "INSERT INTO shipments (order_id, tracking_number, status) VALUES (?, ?, 'SHIPPED')",
+            ((i, f"TRK{i:010d}") for i in range(1, products // 10 + 1)),
+        )
+    conn.execute("PRAGMA foreign_keys = ON")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--calls", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    batches = [
+        ([f"SKU{rng.randint(1, args.products):08d}" for _ in range(args.batch)],)
+        for _ in range(args.calls)
+    ]
+    shipments = args.products // 10
+    with temp_db_path() as path:
+        conn = init_db(path)
+        seed(conn, args.products)
+        tools = db_tools(conn)
+
+        def one_by_one(skus):
+            return {sku: tools.get_product_by_sku(sku)["data"]["id"] for sku in skus}
+
+        results = {
+            "resolve_skus": summarize(time_calls(tools.resolve_skus, batches)),
+            "get_products_by_skus": summarize(time_calls(tools.get_products_by_skus, batches)),
+            "get_product_by_sku_loop": summarize(time_calls(one_by_one, batches[:3])),
+            "get_product_by_sku": summarize(time_calls(tools.get_product_by_sku, [(s,) for s in batches[0][0]])),
+            "get_shipment_by_tracking": summarize(time_calls(
+                tools.get_shipment_by_tracking,
+                [(f"TRK{rng.randint(1, shipments):010d}",) for _ in range(args.batch)],
+            )),
+        }
+        close_db(conn)
+
+    print(json.dumps({"products": args.products, "batch": args.batch}))
+    for name, summary in results.items():
+        print(json.dumps({"query": name, **summary}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Peak RSS while reading every product: get_all_products vs iter_products.
+
+    python -m benchmarks.streaming --products 5000000
+
+Each mode runs in a fresh interpreter so ru_maxrss reflects only that mode.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from database.db import close_db, init_db
+from handler.schema import db_tools
+
+from .common import temp_db_path
+
+
+def seed(path: str, products: int):
+    conn = init_db(path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO products (sku, name, price, description) VALUES (?, ?, 9.99, ?)",
+            ((f"SKU{i:09}", f"Product {i}", f"Description for product {i}") for i in range(products)),
+        )
+    close_db(conn)
+
+
+def worker(mode: str, path: str):
+    conn = init_db(path)
+    tools = db_tools(conn)
+    start = time.perf_counter()
+    rows = 0
+    if mode == "get_all_products":
+        rows = len(tools.get_all_products()["data"])
+    else:
+        for chunk in tools.iter_products(chunk_size=1000):
+            rows += len(chunk)
+    elapsed = time.perf_counter() - start
+    close_db(conn)
+    # ru_maxrss is KiB on Linux
+    peak_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"mode": mode, "rows": rows, "seconds": round(elapsed, 2), "peak_rss_mib": round(peak_mib, 1)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=5_000_000)
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "DB_PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(*args.worker)
+        return
+
+    with temp_db_path() as path:
+        seed(path, args.products)
+        for mode in ("iter_products", "get_all_products"):
+            subprocess.run([sys.executable, "-m", "benchmarks.streaming", "--worker", mode, path], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+"""
+Benchmark suite: every public db_tools method, the OMSAgent.handle path and
+the MCP tool path against a generated database in a temporary directory,
+reported as ops/sec and latency percentiles in one JSON document.
+
+    python -m benchmarks.suite --scale small --output results.json
+    python -m benchmarks.suite --scale small --compare results.json --threshold 1.25
+
+With --compare, cases whose p50 grew past threshold x the baseline p50 are
+listed under "regressions" and the exit status is 1. Reads run before
+writes, so every read sees the same generated data on every run.
+"""
+import argparse
+import asyncio
+import datetime
+import inspect
+import itertools
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+from typing import Callable, NamedTuple, Optional
+
+from agent import OMSAgent
+from database.db import ConnectionPool, close_db, init_db
+from handler.async_schema import AsyncDbTools
+from handler.schema import db_tools
+
+from . import datagen
+from .common import summarize, temp_db_path
+
+
+class Case(NamedTuple):
+    """One benchmark: make_args(ctx, n) builds n argument tuples (untimed) for target."""
+    name: str
+    target: str
+    make_args: Callable
+    calls: Optional[int] = None  # cap for expensive calls
+    consume: bool = False        # target returns an iterator to drain
+
+
+class Context:
+    """
+    Generated-data facts and setup helpers shared by the argument builders.
+    Setup rows go through conn, a connection of its own, never through tools.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, tools: db_tools, scale: datagen.Scale, seed: int, tmpdir: str):
+        self.conn = conn
+        self.tools = tools
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.tmpdir = tmpdir
+        self._serial = itertools.count(1)
+
+    def product(self) -> int:
+        return self.rng.randint(1, self.scale.products)
+
+    def warehouse(self) -> int:
+        return self.rng.randint(1, self.scale.warehouses)
+
+    def order(self) -> int:
+        return self.rng.randint(1, self.scale.orders)
+
+    def shipment(self) -> int:
+        return self.rng.randint(1, self.scale.shipments)
+
+    def payment(self) -> int:
+        return self.rng.randint(1, self.scale.payments)
+
+    def stocked(self):
+        """A (product_id, warehouse_id) pair that has an inventory row."""
+        j = self.rng.randrange(self.scale.inventory)
+        p = j % self.scale.products
+        return p + 1, (j // self.scale.products + p) % self.scale.warehouses + 1
+
+    def unique(self, prefix: str) -> str:
+        return f"{prefix}-B{next(self._serial):07d}"
+
+    def recent(self, days: int = 30):
+        """(start, end) covering the last `days` days of generated orders."""
+        end = datagen.END_DATE
+        return (end - datetime.timedelta(days=days - 1)).isoformat(), end.isoformat()
+
+    def insert(self, sql: str, rows) -> list:
+        """Insert rows outside the timed region and return their ids."""
+        with self.conn:
+            return [self.conn.execute(sql + " RETURNING id", row).fetchone()[0] for row in rows]
+
+    def new_warehouse(self, stock: int = 0, products: int = 0) -> int:
+        """A fresh warehouse, optionally stocking products 1..products with `stock` units each."""
+        warehouse_id = self.insert("INSERT INTO warehouses (name, location) VALUES (?, 'bench')",
+                                   [(self.unique("WH"),)])[0]
+        if products:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO inventory (product_id, warehouse_id, quantity) VALUES (?, ?, ?)",
+                    ((p, warehouse_id, stock) for p in range(1, products + 1)),
+                )
+        return warehouse_id
+
+    def free_slots(self, n: int):
+        """n (product_id, warehouse_id) pairs without inventory rows, in fresh warehouses."""
+        slots = []
+        while len(slots) < n:
+            warehouse_id = self.new_warehouse()
+            slots.extend((p, warehouse_id) for p in range(1, min(self.scale.products, n - len(slots)) + 1))
+        return slots
+
+    def new_orders(self, n: int, status: str = "CREATED"):
+        return self.insert("INSERT INTO orders (order_number, status) VALUES (?, ?)",
+                           [(self.unique("SETUP"), status) for _ in range(n)])
+
+
+def _skus(ctx, k):
+    return [datagen.sku(ctx.product()) for _ in range(k)]
+
+
+def _search_text(ctx):
+    return f"{ctx.rng.choice(datagen.BRANDS)} {ctx.rng.choice(datagen.NOUNS)}"
+
+
+def _tracking(ctx):
+    row = ctx.conn.execute("SELECT tracking_number FROM shipments WHERE id = ?", (ctx.shipment(),)).fetchone()
+    return row[0]
+
+
+def _bulk(n, k, row):
+    return [([row(i * k + j) for j in range(k)],) for i in range(n)]
+
+
+def _place_order_args(ctx, n):
+    products = min(ctx.scale.products, 1000)
+    ctx.new_warehouse(stock=10 ** 6, products=products)
+    return [
+        (ctx.unique("PLACE"), "CREATED",
+         [{"product_id": ctx.rng.randint(1, products), "quantity": 1, "price": 1.0}])
+        for _ in range(n)
+    ]
+
+
+def _transaction_args(ctx, n):
+    def work(number):
+        return lambda: ctx.tools.add_order(number, "CREATED")
+    return [(work(ctx.unique("TX")),) for _ in range(n)]
+
+
+def _shipment_status_args(ctx, n):
+    rows = [(ctx.order(), ctx.unique("TRK"), "PENDING") for _ in range(n)]
+    ids = ctx.insert("INSERT INTO shipments (order_id, tracking_number, status) VALUES (?, ?, ?)", rows)
+    return [(i, "SHIPPED") for i in ids]
+
+
+def _payment_status_args(ctx, n):
+    rows = [(ctx.order(), 1.0, "UPI", "PENDING") for _ in range(n)]
+    ids = ctx.insert("INSERT INTO payments (order_id, amount, method, status) VALUES (?, ?, ?, ?)", rows)
+    return [(i, "SUCCESS") for i in ids]
+
+
+def _release_args(ctx, n):
+    ids = ctx.new_orders(100, status="PAID")
+    ctx.tools.claim_next_orders("PAID", 100, worker="bench-release")
+    return [(ids, "bench-release")] * n
+
+
+READ_CASES = [
+    Case("get_product", "get_product", lambda ctx, n: [(ctx.product(),) for _ in range(n)]),
+    Case("get_product[uncached]", "get_product", lambda ctx, n: [(ctx.product(), False) for _ in range(n)]),
+    Case("get_product_by_sku", "get_product_by_sku", lambda ctx, n: [(datagen.sku(ctx.product()),) for _ in range(n)]),
+    Case("get_products_by_skus[100]", "get_products_by_skus", lambda ctx, n: [(_skus(ctx, 100),) for _ in range(n)]),
+    Case("resolve_skus[1000]", "resolve_skus", lambda ctx, n: [(_skus(ctx, 1000),) for _ in range(n)], calls=50),
+    Case("get_all_products", "get_all_products", lambda ctx, n: [()] * n, calls=3),
+    Case("get_products_page", "get_products_page",
+         lambda ctx, n: [(100, ctx.rng.randint(0, ctx.scale.products)) for _ in range(n)]),
+    Case("iter_products", "iter_products", lambda ctx, n: [(1000,)] * n, calls=3, consume=True),
+    Case("search_products", "search_products", lambda ctx, n: [(_search_text(ctx),) for _ in range(n)]),
+    Case("get_products_by_sku_prefix", "get_products_by_sku_prefix",
+         lambda ctx, n: [(datagen.sku(ctx.product())[:9],) for _ in range(n)]),
+    Case("get_warehouse", "get_warehouse", lambda ctx, n: [(ctx.warehouse(),) for _ in range(n)]),
+    Case("get_all_warehouses", "get_all_warehouses", lambda ctx, n: [()] * n),
+    Case("get_warehouses_page", "get_warehouses_page", lambda ctx, n: [(100, 0)] * n),
+    Case("iter_warehouses", "iter_warehouses", lambda ctx, n: [(1000,)] * n, consume=True),
+    Case("get_inventory", "get_inventory", lambda ctx, n: [ctx.stocked() for _ in range(n)]),
+    Case("get_inventory_by_product", "get_inventory_by_product", lambda ctx, n: [(ctx.product(),) for _ in range(n)]),
+    Case("get_stock_level", "get_stock_level", lambda ctx, n: [(ctx.product(),) for _ in range(n)]),
+    Case("get_low_stock", "get_low_stock", lambda ctx, n: [(100, 0)] * n),
+    Case("check_stock_levels", "check_stock_levels", lambda ctx, n: [()] * n, calls=3),
+    Case("get_order", "get_order", lambda ctx, n: [(ctx.order(),) for _ in range(n)]),
+    Case("get_order_by_number", "get_order_by_number",
+         lambda ctx, n: [(datagen.order_number(ctx.order()),) for _ in range(n)]),
+    Case("get_order_details", "get_order_details", lambda ctx, n: [(ctx.order(),) for _ in range(n)]),
+    Case("get_orders_details[100]", "get_orders_details",
+         lambda ctx, n: [([ctx.order() for _ in range(100)],) for _ in range(n)], calls=50),
+    Case("get_order_items", "get_order_items", lambda ctx, n: [(ctx.order(),) for _ in range(n)]),
+    Case("get_order_items_page", "get_order_items_page", lambda ctx, n: [(1000, 0)] * n),
+    Case("get_order_items_page[record]", "get_order_items_page", lambda ctx, n: [(1000, 0, "record")] * n),
+    Case("get_order_items_page[columns]", "get_order_items_page", lambda ctx, n: [(1000, 0, "columns")] * n),
+    Case("iter_order_items", "iter_order_items", lambda ctx, n: [(1000,)] * n, calls=3, consume=True),
+    Case("iter_order_items[record]", "iter_order_items", lambda ctx, n: [(1000, "record")] * n, calls=3, consume=True),
+    Case("iter_order_items[columns]", "iter_order_items", lambda ctx, n: [(1000, "columns")] * n, calls=3,
+         consume=True),
+    Case("get_allocations", "get_allocations", lambda ctx, n: [(ctx.order(),) for _ in range(n)]),
+    Case("allocate_orders[dry-run]", "allocate_orders", lambda ctx, n: [(None, "CREATED", 100)] * n, calls=10),
+    Case("get_shipment", "get_shipment", lambda ctx, n: [(ctx.shipment(),) for _ in range(n)]),
+    Case("get_shipment_by_tracking", "get_shipment_by_tracking", lambda ctx, n: [(_tracking(ctx),) for _ in range(n)]),
+    Case("get_shipments_by_order", "get_shipments_by_order", lambda ctx, n: [(ctx.order(),) for _ in range(n)]),
+    Case("get_payment", "get_payment", lambda ctx, n: [(ctx.payment(),) for _ in range(n)]),
+    Case("get_payments_by_order", "get_payments_by_order", lambda ctx, n: [(ctx.order(),) for _ in range(n)]),
+    Case("get_status_transitions", "get_status_transitions", lambda ctx, n: [("order",)] * n),
+    Case("get_revenue_by_day[week]", "get_revenue_by_day", lambda ctx, n: [(None, None, "week")] * n, calls=50),
+    Case("get_revenue_by_product[30d]", "get_revenue_by_product", lambda ctx, n: [ctx.recent()] * n, calls=20),
+    Case("get_revenue_by_warehouse[30d]", "get_revenue_by_warehouse", lambda ctx, n: [ctx.recent()] * n, calls=20),
+    Case("get_top_skus[30d]", "get_top_skus", lambda ctx, n: [ctx.recent()] * n, calls=20),
+    Case("get_order_value_stats", "get_order_value_stats", lambda ctx, n: [()] * n),
+    Case("get_payment_mix", "get_payment_mix", lambda ctx, n: [()] * n),
+    Case("iter_report[revenue_by_product]", "iter_report",
+         lambda ctx, n: [("revenue_by_product",)] * n, calls=3, consume=True),
+    Case("check_rollups", "check_rollups", lambda ctx, n: [()] * n, calls=3),
+    Case("verify_query_plans", "verify_query_plans", lambda ctx, n: [()] * n, calls=20),
+    Case("get_cache_stats", "get_cache_stats", lambda ctx, n: [()] * n),
+    Case("get_metrics", "get_metrics", lambda ctx, n: [()] * n),
+    Case("get_write_stats", "get_write_stats", lambda ctx, n: [()] * n),
+    Case("dump_metrics", "dump_metrics", lambda ctx, n: [(os.path.join(ctx.tmpdir, "metrics.prom"),)] * n, calls=20),
+]
+
+WRITE_CASES = [
+    Case("add_product", "add_product",
+         lambda ctx, n: [(ctx.unique("SKU"), "bench product", 10.0, "d") for _ in range(n)]),
+    Case("add_products_bulk[100]", "add_products_bulk", lambda ctx, n: _bulk(n, 100, lambda i: {
+        "sku": ctx.unique("BULK"), "name": "bench", "price": 1.0, "description": "d"}), calls=20),
+    Case("add_warehouse", "add_warehouse", lambda ctx, n: [(ctx.unique("WH"), "bench") for _ in range(n)]),
+    Case("add_warehouses_bulk[100]", "add_warehouses_bulk", lambda ctx, n: _bulk(n, 100, lambda i: {
+        "name": ctx.unique("WHB"), "location": "bench"}), calls=20),
+    Case("add_inventory", "add_inventory", lambda ctx, n: [(p, w, 10) for p, w in ctx.free_slots(n)]),
+    Case("add_inventory_bulk[100]", "add_inventory_bulk", lambda ctx, n: (lambda slots: _bulk(n, 100, lambda i: {
+        "product_id": slots[i][0], "warehouse_id": slots[i][1], "quantity": 10}))(ctx.free_slots(n * 100)), calls=20),
+    Case("update_inventory", "update_inventory",
+         lambda ctx, n: [(*ctx.stocked(), ctx.rng.randint(0, 500)) for _ in range(n)]),
+    Case("set_reorder_level", "set_reorder_level", lambda ctx, n: [(ctx.product(), 10) for _ in range(n)]),
+    Case("add_order", "add_order", lambda ctx, n: [(ctx.unique("ORD"), "CREATED") for _ in range(n)]),
+    Case("add_orders_bulk[100]", "add_orders_bulk", lambda ctx, n: _bulk(n, 100, lambda i: {
+        "order_number": ctx.unique("ORDB"), "status": "CREATED"}), calls=20),
+    Case("add_order_item", "add_order_item",
+         lambda ctx, n: [(ctx.order(), ctx.product(), 1, 10.0) for _ in range(n)]),
+    Case("add_order_items_bulk[100]", "add_order_items_bulk", lambda ctx, n: _bulk(n, 100, lambda i: {
+        "order_id": ctx.order(), "product_id": ctx.product(), "quantity": 1, "price": 10.0}), calls=20),
+    Case("add_shipment", "add_shipment",
+         lambda ctx, n: [(ctx.order(), ctx.unique("TRK"), "PENDING") for _ in range(n)]),
+    Case("add_shipments_bulk[100]", "add_shipments_bulk", lambda ctx, n: _bulk(n, 100, lambda i: {
+        "order_id": ctx.order(), "tracking_number": ctx.unique("TRKB"), "status": "PENDING"}), calls=20),
+    Case("add_payment", "add_payment", lambda ctx, n: [(ctx.order(), 10.0, "UPI", "PENDING") for _ in range(n)]),
+    Case("add_payments_bulk[100]", "add_payments_bulk", lambda ctx, n: _bulk(n, 100, lambda i: {
+        "order_id": ctx.order(), "amount": 10.0, "method": "UPI", "status": "PENDING"}), calls=20),
+    Case("place_order", "place_order", _place_order_args),
+    Case("transaction", "transaction", _transaction_args),
+    Case("update_order_status", "update_order_status",
+         lambda ctx, n: [(order_id, "PAID") for order_id in ctx.new_orders(n)]),
+    Case("update_shipment_status", "update_shipment_status", _shipment_status_args),
+    Case("update_payment_status", "update_payment_status", _payment_status_args),
+    Case("claim_next_orders", "claim_next_orders",
+         lambda ctx, n: [("CREATED", 10, f"bench-{i}") for i in range(n)], calls=50),
+    Case("release_orders", "release_orders", _release_args, calls=50),
+    Case("allocate_orders[commit]", "allocate_orders",
+         lambda ctx, n: [(None, "CREATED", 100, None, True)] * n, calls=5),
+    Case("rebuild_rollups", "rebuild_rollups", lambda ctx, n: [()] * n, calls=1),
+]
+
+AGENT_CASES = [
+    Case("agent:get product", "handle", lambda ctx, n: [(f"get product id={ctx.product()}",) for _ in range(n)]),
+    Case("agent:find product", "handle",
+         lambda ctx, n: [(f"find product sku={datagen.sku(ctx.product())}",) for _ in range(n)]),
+    Case("agent:track shipment", "handle", lambda ctx, n: [(f"track shipment tracking={_tracking(ctx)}",) for _ in range(n)]),
+    Case("agent:create order", "handle",
+         lambda ctx, n: [(f"create order number={ctx.unique('AGT')} status=CREATED",) for _ in range(n)]),
+]
+
+# Run through the MCP tool coroutines (or AsyncDbTools when fastmcp is not
+# installed), with the JSON encoding the transport would do.
+TOOL_CASES = [
+    Case("tool:get_product", "get_product", lambda ctx, n: [(ctx.product(),) for _ in range(n)]),
+    Case("tool:get_order_details", "get_order_details", lambda ctx, n: [(ctx.order(),) for _ in range(n)]),
+    Case("tool:search_products", "search_products", lambda ctx, n: [(_search_text(ctx),) for _ in range(n)]),
+    Case("tool:get_revenue_by_day", "get_revenue_by_day", lambda ctx, n: [(None, None, "week")] * n, calls=50),
+    Case("tool:add_order", "add_order", lambda ctx, n: [(ctx.unique("MCP"), "CREATED") for _ in range(n)]),
+]
+
+
+def public_methods():
+    return sorted(
+        name for name, _ in inspect.getmembers(db_tools, inspect.isfunction) if not name.startswith("_")
+    )
+
+
+def _is_error(result) -> bool:
+    return isinstance(result, dict) and result.get("status") == "error"
+
+
+def measure(fn, args_list, consume: bool = False) -> dict:
+    samples, errors = [], 0
+    for args in args_list:
+        start = time.perf_counter()
+        result = fn(*args)
+        if consume:
+            result = list(result)
+        samples.append(time.perf_counter() - start)
+        errors += _is_error(result)
+    return {**summarize(samples), "ops_per_sec": round(len(samples) / sum(samples), 1), "errors": errors}
+
+
+async def measure_async(fn, args_list) -> dict:
+    samples, errors = [], 0
+    for args in args_list:
+        start = time.perf_counter()
+        result = await fn(*args)
+        json.dumps(result)
+        samples.append(time.perf_counter() - start)
+        errors += _is_error(result)
+    return {**summarize(samples), "ops_per_sec": round(len(samples) / sum(samples), 1), "errors": errors}
+
+
+def tool_caller(pool: ConnectionPool):
+    """Return (path, resolve(name) -> coroutine function, close) for the tool benchmarks."""
+    try:
+        from handler.tools import MCPTools
+    except ImportError:
+        adb = AsyncDbTools(db_tools(pool))
+        return "async", lambda name: getattr(adb, name), adb.close
+
+    tools = MCPTools(pool)
+    return "mcp", lambda name: getattr(tools, name), tools.adb.close
+
+
+def run_cases(path: str, scale: datagen.Scale, seed: int, calls: int, pattern: str = None) -> dict:
+    conn = init_db(path)
+    pool = ConnectionPool(path)
+    try:
+        tools = db_tools(pool)
+        ctx = Context(conn, tools, scale, seed, os.path.dirname(path))
+        agent = OMSAgent(tools)
+        results = {}
+
+        def selected(case):
+            return pattern is None or pattern in case.name
+
+        for path_name, target, cases in (("db_tools", tools, READ_CASES + WRITE_CASES), ("agent", agent, AGENT_CASES)):
+            for case in filter(selected, cases):
+                n = min(calls, case.calls or calls)
+                args_list = case.make_args(ctx, n)
+                results[case.name] = {
+                    "path": path_name,
+                    "target": case.target,
+                    **measure(getattr(target, case.target), args_list, case.consume),
+                }
+
+        tool_path, resolve, close = tool_caller(pool)
+        try:
+            for case in filter(selected, TOOL_CASES):
+                n = min(calls, case.calls or calls)
+                args_list = case.make_args(ctx, n)
+                results[case.name] = {
+                    "path": tool_path,
+                    "target": case.target,
+                    **asyncio.run(measure_async(resolve(case.target), args_list)),
+                }
+        finally:
+            close()
+        return results
+    finally:
+        pool.close()
+        close_db(conn)
+
+
+def compare(baseline: dict, results: dict, threshold: float, min_delta_us: float = 5.0):
+    """Cases whose p50 exceeds threshold x the baseline p50 (and by at least min_delta_us)."""
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get("results", {}).get(name)
+        if before is None or not before["p50_us"]:
+            continue
+        ratio = current["p50_us"] / before["p50_us"]
+        if ratio > threshold and current["p50_us"] - before["p50_us"] >= min_delta_us:
+            regressions.append({
+                "case": name,
+                "baseline_p50_us": before["p50_us"],
+                "p50_us": current["p50_us"],
+                "ratio": round(ratio, 2),
+            })
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scale: datagen.Scale, seed: int = 0, calls: int = 200, pattern: str = None) -> dict:
+    """Generate a database in a temporary directory, run the suite on it and return the report."""
+    with temp_db_path() as path:
+        conn = init_db(path)
+        start = time.perf_counter()
+        rows = datagen.generate(conn, scale, seed)
+        generate_seconds = time.perf_counter() - start
+        close_db(conn)
+        results = run_cases(path, scale, seed, calls, pattern)
+
+    covered = {case.target for case in READ_CASES + WRITE_CASES}
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "seed": seed,
+            "calls": calls,
+        },
+        "scale": scale._asdict(),
+        "rows": rows,
+        "generate_seconds": round(generate_seconds, 2),
+        "uncovered": [name for name in public_methods() if name not in covered],
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    datagen.add_scale_arguments(parser)
+    parser.add_argument("--calls", type=int, default=200, help="calls per case (some cases are capped lower)")
+    parser.add_argument("--filter", dest="pattern", help="only run cases whose name contains this")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="report from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="p50 ratio counted as a regression")
+    args = parser.parse_args()
+
+    report = run(datagen.scale_from_args(args), args.seed, args.calls, args.pattern)
+    if args.compare:
+        with open(args.compare) as f:
+            report["regressions"] = compare(json.load(f), report["results"], args.threshold)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for name, result in report["results"].items():
+        print(f"{name:40} {result['ops_per_sec']:>12} ops/s  p50 {result['p50_us']:>10} us  "
+              f"p99 {result['p99_us']:>10} us  errors {result['errors']}", file=sys.stderr)
+    if report.get("regressions"):
+        print(json.dumps({"regressions": report["regressions"]}), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
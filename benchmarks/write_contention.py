@@ -0,0 +1,88 @@
+"""
+add_order latency while another process keeps grabbing the write lock, under
+the write policy's bounded retries vs the old behaviour of blocking on a 10s
+busy timeout.
+
+    python -m benchmarks.write_contention --threads 16 --seconds 5 --hold-ms 300
+
+A second process repeatedly holds BEGIN IMMEDIATE for --hold-ms and then
+idles for --idle-ms, standing in for a long import or a stuck worker.
+"""
+import argparse
+import json
+import multiprocessing
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from database.db import ConnectionPool, WritePolicy, init_db, close_db
+
+from .common import summarize, temp_db_path
+
+POLICIES = {
+    "policy": WritePolicy(),
+    # One 10s wait, no retries, no admission limit: what init_db alone gives.
+    "blocking": WritePolicy(busy_timeout=10.0, retries=0, max_in_flight=None),
+}
+
+
+def hog(path: str, hold: float, idle: float, stop):
+    conn = sqlite3.connect(path)
+    while not stop.is_set():
+        conn.execute("BEGIN IMMEDIATE")
+        time.sleep(hold)
+        conn.rollback()
+        time.sleep(idle)
+    conn.close()
+
+
+def run(path: str, name: str, threads: int, seconds: float, hold: float, idle: float):
+    from handler.schema import db_tools
+
+    pool = ConnectionPool(path, policy=POLICIES[name])
+    tools = db_tools(pool)
+    ctx = multiprocessing.get_context("spawn")
+    stop = ctx.Event()
+    proc = ctx.Process(target=hog, args=(path, hold, idle, stop))
+    proc.start()
+    time.sleep(0.5)
+
+    deadline = time.perf_counter() + seconds
+    latencies, codes = [], {}
+
+    def client(slot: int):
+        serial = 0
+        while time.perf_counter() < deadline:
+            serial += 1
+            start = time.perf_counter()
+            res = tools.add_order(f"WC-{name}-{slot}-{serial}", "CREATED")
+            latencies.append(time.perf_counter() - start)
+            code = res.get("code", "ok")
+            codes[code] = codes.get(code, 0) + 1
+
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        list(ex.map(client, range(threads)))
+    stop.set()
+    proc.join()
+    stats = pool.policy.stats()
+    pool.close()
+    return {"policy": name, **summarize(latencies), "max_ms": round(max(latencies) * 1e3, 1),
+            "results": codes, "busy_retries": stats["busy_retries"], "rejected": stats["rejected"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--hold-ms", type=float, default=300.0)
+    parser.add_argument("--idle-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    for name in POLICIES:
+        with temp_db_path() as path:
+            close_db(init_db(path))
+            print(json.dumps(run(path, name, args.threads, args.seconds, args.hold_ms / 1000, args.idle_ms / 1000)))
+
+
+if __name__ == "__main__":
+    main()
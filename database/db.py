@@ -1,8 +1,16 @@
 # db.py
 import logging
+import queue
+import random
 import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
 from typing import Optional
 
+from .migrations import migrate
+
 
 def init_db(DB_PATH: str) -> Optional[sqlite3.Connection]:
     try:
@@ -14,77 +22,11 @@ def init_db(DB_PATH: str) -> Optional[sqlite3.Connection]:
         conn.row_factory = sqlite3.Row
 
         conn.execute("PRAGMA foreign_keys = ON;")
-        conn.execute("PRAGMA journal_mode = WAL;")
+        enable_wal(conn)
         conn.execute("PRAGMA synchronous = NORMAL;")
 
-        conn.executescript("""
-        BEGIN;
-
-        CREATE TABLE IF NOT EXISTS products (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            sku TEXT UNIQUE NOT NULL,
-            name TEXT NOT NULL,
-            price REAL NOT NULL,
-            description TEXT NOT NULL,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS warehouses (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            location TEXT,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS inventory (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            product_id INTEGER NOT NULL,
-            warehouse_id INTEGER NOT NULL,
-            quantity INTEGER NOT NULL DEFAULT 0,
-            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(product_id, warehouse_id),
-            FOREIGN KEY(product_id) REFERENCES products(id),
-            FOREIGN KEY(warehouse_id) REFERENCES warehouses(id)
-        );
-
-        CREATE TABLE IF NOT EXISTS orders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            order_number TEXT UNIQUE NOT NULL,
-            status TEXT NOT NULL,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS order_items (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            order_id INTEGER NOT NULL,
-            product_id INTEGER NOT NULL,
-            quantity INTEGER NOT NULL,
-            price REAL NOT NULL,
-            FOREIGN KEY(order_id) REFERENCES orders(id),
-            FOREIGN KEY(product_id) REFERENCES products(id)
-        );
-
-        CREATE TABLE IF NOT EXISTS shipments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            order_id INTEGER NOT NULL,
-            tracking_number TEXT,
-            status TEXT,
-            shipped_at TEXT,
-            FOREIGN KEY(order_id) REFERENCES orders(id)
-        );
-
-        CREATE TABLE IF NOT EXISTS payments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            order_id INTEGER NOT NULL,
-            amount REAL NOT NULL,
-            method TEXT,
-            status TEXT,
-            paid_at TEXT,
-            FOREIGN KEY(order_id) REFERENCES orders(id)
-        );
-
-        COMMIT;
-        """)
+        # Skips all DDL when PRAGMA user_version is already current.
+        migrate(conn)
 
         return conn
 
@@ -93,6 +35,294 @@ def init_db(DB_PATH: str) -> Optional[sqlite3.Connection]:
         return None
 
 
+def enable_wal(conn: sqlite3.Connection, attempts: int = 20):
+    """
+    Switch to WAL. On a fresh file the switch fails at once with SQLITE_BUSY,
+    without waiting on the busy timeout, while another process is doing the
+    same, so retry with a short jittered backoff.
+    """
+    for attempt in range(attempts):
+        try:
+            conn.execute("PRAGMA journal_mode = WAL;")
+            return
+        except sqlite3.OperationalError as e:
+            if not is_busy(e) or attempt == attempts - 1:
+                raise
+            time.sleep(random.uniform(0, min(0.2, 0.005 * 2 ** attempt)))
+
+
+def open_reader(DB_PATH: str) -> sqlite3.Connection:
+    """Open a read-only connection; in WAL mode each query reads a consistent snapshot."""
+    conn = sqlite3.connect(DB_PATH, timeout=10, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only = ON;")
+    return conn
+
+
+def is_busy(e: sqlite3.Error) -> bool:
+    """True for SQLITE_BUSY / SQLITE_LOCKED ("database is locked")."""
+    code = getattr(e, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return "locked" in str(e) or "busy" in str(e)
+
+
+class WriteRejected(RuntimeError):
+    """A write was refused by admission control without touching the database."""
+
+
+class WritePolicy:
+    """
+    How writes behave under contention, with counters of what happened.
+
+    busy_timeout: seconds SQLite waits for the write lock on each attempt.
+    retries, backoff, backoff_max: further BEGIN IMMEDIATE attempts once
+        busy_timeout has passed, sleeping a random time up to
+        backoff * 2**attempt (at most backoff_max) before each, so competing
+        writers (other processes) spread out instead of retrying in lockstep.
+    max_in_flight: writes allowed queued or running at once; beyond that a
+        write fails at once with WriteRejected instead of waiting behind the
+        others. None means no limit.
+
+    With the defaults a write gives up on a held lock after about 1.5s,
+    where the connection's own timeout used to wait 10s.
+    """
+
+    def __init__(self, busy_timeout: float = 0.2, retries: int = 5, backoff: float = 0.01,
+                 backoff_max: float = 0.5, max_in_flight: Optional[int] = 1024):
+        self.busy_timeout = busy_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.max_in_flight = max_in_flight
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counters = {"admitted": 0, "rejected": 0, "busy_retries": 0, "busy_failures": 0, "peak_in_flight": 0}
+
+    def configure(self, conn: sqlite3.Connection) -> None:
+        """Apply busy_timeout to a connection that will take the write lock."""
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    @contextmanager
+    def admit(self):
+        """Hold one in-flight slot for the duration of a write, or raise WriteRejected."""
+        with self._lock:
+            if self.max_in_flight is not None and self._in_flight >= self.max_in_flight:
+                self._counters["rejected"] += 1
+                raise WriteRejected(f"Too many writes in flight ({self._in_flight}); retry later")
+            self._in_flight += 1
+            self._counters["admitted"] += 1
+            self._counters["peak_in_flight"] = max(self._counters["peak_in_flight"], self._in_flight)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def begin(self, conn: sqlite3.Connection) -> None:
+        """BEGIN IMMEDIATE, retrying with backoff while the database is busy."""
+        for attempt in range(self.retries + 1):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as e:
+                if not is_busy(e):
+                    raise
+                if attempt == self.retries:
+                    self._count("busy_failures")
+                    raise
+                self._count("busy_retries")
+                time.sleep(random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counters, "in_flight": self._in_flight, "max_in_flight": self.max_in_flight}
+
+
+# Used by run_write callers that bring no policy of their own.
+DEFAULT_WRITE_POLICY = WritePolicy()
+
+
+def run_write(conn: sqlite3.Connection, work, policy: WritePolicy = None):
+    """
+    Run work(conn) in one BEGIN IMMEDIATE transaction and commit it, or run it
+    inside a savepoint when a transaction is already open on conn.
+    """
+    if conn.in_transaction:
+        conn.execute("SAVEPOINT nested_write")
+        try:
+            result = work(conn)
+        except Exception:
+            conn.execute("ROLLBACK TO nested_write")
+            conn.execute("RELEASE nested_write")
+            raise
+        conn.execute("RELEASE nested_write")
+        return result
+
+    (policy or DEFAULT_WRITE_POLICY).begin(conn)
+    try:
+        result = work(conn)
+        conn.commit()
+        return result
+    except Exception:
+        conn.rollback()
+        raise
+
+
+class ConnectionPool:
+    """
+    Per-thread read-only connections plus a single writer connection.
+
+    Writes are submitted as callables taking the writer connection and are
+    executed one at a time by a dedicated writer thread, so transactions from
+    concurrent callers never interleave.
+
+    With group_commit=True the writer thread takes every write already queued
+    plus any arriving within flush_interval_ms (up to max_batch_size writes)
+    and commits them together in one transaction. Each write runs in its own savepoint, so
+    a failing write (e.g. a UNIQUE violation) only rolls back itself, and every
+    caller receives its own result once the shared transaction has committed.
+    """
+
+    def __init__(self, DB_PATH: str, group_commit: bool = False,
+                 flush_interval_ms: float = 0.0, max_batch_size: int = 256, policy: WritePolicy = None):
+        self.db_path = DB_PATH
+        self.group_commit = group_commit
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch_size = max_batch_size if group_commit else 1
+        self.policy = policy or WritePolicy()
+        self._stats = {"writes": 0, "commits": 0, "last_batch_size": 0, "max_batch_size": 0}
+        self.writer = init_db(DB_PATH)
+        if self.writer is None:
+            raise RuntimeError(f"Could not open database {DB_PATH}")
+        self.policy.configure(self.writer)
+
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+
+        self._queue = queue.Queue()
+        self._writer_thread = threading.Thread(target=self._write_loop, name="oms-db-writer", daemon=True)
+        self._writer_thread.start()
+
+    def reader(self) -> sqlite3.Connection:
+        """Return the calling thread's read connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = open_reader(self.db_path)
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    def in_writer_thread(self) -> bool:
+        return threading.current_thread() is self._writer_thread
+
+    def submit(self, work) -> Future:
+        """Queue work(writer_conn) and return a Future for its result."""
+        future = Future()
+        self._queue.put((work, future))
+        return future
+
+    def write(self, work):
+        """
+        Run work(writer_conn) in a write transaction and wait for the result.
+        Raises WriteRejected when the policy's in-flight limit is reached.
+        """
+        if self.in_writer_thread():
+            # Nested call from a job already running on the writer.
+            return run_write(self.writer, work, self.policy)
+        with self.policy.admit():
+            return self.submit(work).result()
+
+    def _write_loop(self):
+        stopping = False
+        while not stopping:
+            job = self._queue.get()
+            if job is None:
+                break
+            batch = [job]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch_size:
+                # Writes queued while the previous batch was committing are
+                # always picked up; beyond that wait out the flush interval.
+                timeout = deadline - time.monotonic()
+                try:
+                    job = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                batch.append(job)
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        batch = [(work, future) for work, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        if len(batch) == 1:
+            work, future = batch[0]
+            try:
+                future.set_result(run_write(self.writer, work, self.policy))
+            except Exception as e:
+                future.set_exception(e)
+            self._record_commit(1)
+            return
+
+        outcomes = []
+        try:
+            self.policy.begin(self.writer)
+            for work, _ in batch:
+                try:
+                    outcomes.append((True, run_write(self.writer, work, self.policy)))
+                except Exception as e:
+                    outcomes.append((False, e))
+            self.writer.commit()
+        except Exception as e:
+            if self.writer.in_transaction:
+                self.writer.rollback()
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self._record_commit(len(batch))
+        for (ok, value), (_, future) in zip(outcomes, batch):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def _record_commit(self, size: int):
+        stats = self._stats
+        stats["writes"] += size
+        stats["commits"] += 1
+        stats["last_batch_size"] = size
+        stats["max_batch_size"] = max(stats["max_batch_size"], size)
+
+    def stats(self) -> dict:
+        """Write queue and policy counters, including the achieved commit batch size."""
+        stats = {**self._stats, **self.policy.stats()}
+        stats["avg_batch_size"] = round(stats["writes"] / stats["commits"], 2) if stats["commits"] else 0.0
+        stats["queued"] = self._queue.qsize()
+        stats["group_commit"] = self.group_commit
+        return stats
+
+    def close(self) -> bool:
+        self._queue.put(None)
+        self._writer_thread.join()
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            close_db(conn)
+        return close_db(self.writer)
+
+
 def close_db(conn: sqlite3.Connection) -> bool:
     try:
         conn.close()
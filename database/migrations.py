@@ -0,0 +1,769 @@
+# migrations.py
+"""
+Numbered schema migrations tracked through PRAGMA user_version.
+
+Every migration is a list of statements. Everything except index builds
+runs first in a single transaction; each index build then runs in its own
+transaction so the write lock is released between them, and in WAL mode
+readers keep working while an index is being built. The user_version bump
+commits with the last step, so a migration that mixes index builds with
+other statements must keep those statements idempotent (IF NOT EXISTS) or
+be split in two.
+
+    python -m database.migrations database/oms.db --dry-run
+"""
+import argparse
+import logging
+import math
+import re
+import sqlite3
+import time
+from typing import List, NamedTuple
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    statements: List[str]
+
+
+MIGRATIONS = [
+    Migration(1, "base schema", [
+        """
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sku TEXT UNIQUE NOT NULL,
+            name TEXT NOT NULL,
+            price REAL NOT NULL,
+            description TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS warehouses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            location TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS inventory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER NOT NULL,
+            warehouse_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(product_id, warehouse_id),
+            FOREIGN KEY(product_id) REFERENCES products(id),
+            FOREIGN KEY(warehouse_id) REFERENCES warehouses(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_number TEXT UNIQUE NOT NULL,
+            status TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS order_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            price REAL NOT NULL,
+            FOREIGN KEY(order_id) REFERENCES orders(id),
+            FOREIGN KEY(product_id) REFERENCES products(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS shipments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL,
+            tracking_number TEXT,
+            status TEXT,
+            shipped_at TEXT,
+            FOREIGN KEY(order_id) REFERENCES orders(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS payments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            method TEXT,
+            status TEXT,
+            paid_at TEXT,
+            FOREIGN KEY(order_id) REFERENCES orders(id)
+        )
+        """,
+    ]),
+    Migration(2, "order-scoped lookup indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items(order_id)",
+        "CREATE INDEX IF NOT EXISTS idx_shipments_order_id ON shipments(order_id)",
+        "CREATE INDEX IF NOT EXISTS idx_payments_order_id ON payments(order_id)",
+        "CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status)",
+        "CREATE INDEX IF NOT EXISTS idx_inventory_warehouse_id ON inventory(warehouse_id)",
+    ]),
+    Migration(3, "catalog change counter for cache invalidation", [
+        """
+        CREATE TABLE IF NOT EXISTS catalog_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+        """,
+        "INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 0)",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_products_insert_catalog_version AFTER INSERT ON products
+        BEGIN
+            UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_products_update_catalog_version AFTER UPDATE ON products
+        BEGIN
+            UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_products_delete_catalog_version AFTER DELETE ON products
+        BEGIN
+            UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_warehouses_insert_catalog_version AFTER INSERT ON warehouses
+        BEGIN
+            UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_warehouses_update_catalog_version AFTER UPDATE ON warehouses
+        BEGIN
+            UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_warehouses_delete_catalog_version AFTER DELETE ON warehouses
+        BEGIN
+            UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+        END
+        """,
+    ]),
+    Migration(4, "per-product stock summary maintained by triggers", [
+        "ALTER TABLE inventory ADD COLUMN reserved INTEGER NOT NULL DEFAULT 0",
+        """
+        CREATE TABLE IF NOT EXISTS stock_levels (
+            product_id INTEGER PRIMARY KEY,
+            on_hand INTEGER NOT NULL DEFAULT 0,
+            reserved INTEGER NOT NULL DEFAULT 0,
+            reorder_level INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            low_stock INTEGER GENERATED ALWAYS AS (on_hand - reserved < reorder_level) VIRTUAL,
+            FOREIGN KEY(product_id) REFERENCES products(id)
+        )
+        """,
+        """
+        INSERT INTO stock_levels (product_id, on_hand, reserved)
+        SELECT product_id, SUM(quantity), SUM(reserved) FROM inventory GROUP BY product_id
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_inventory_insert_stock_levels AFTER INSERT ON inventory
+        BEGIN
+            INSERT INTO stock_levels (product_id, on_hand, reserved)
+            VALUES (new.product_id, new.quantity, new.reserved)
+            ON CONFLICT(product_id) DO UPDATE SET
+                on_hand = on_hand + excluded.on_hand,
+                reserved = reserved + excluded.reserved,
+                updated_at = CURRENT_TIMESTAMP;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_inventory_update_stock_levels
+        AFTER UPDATE OF product_id, quantity, reserved ON inventory
+        BEGIN
+            UPDATE stock_levels SET
+                on_hand = on_hand - old.quantity,
+                reserved = reserved - old.reserved,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE product_id = old.product_id;
+            INSERT INTO stock_levels (product_id, on_hand, reserved)
+            VALUES (new.product_id, new.quantity, new.reserved)
+            ON CONFLICT(product_id) DO UPDATE SET
+                on_hand = on_hand + excluded.on_hand,
+                reserved = reserved + excluded.reserved,
+                updated_at = CURRENT_TIMESTAMP;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_inventory_delete_stock_levels AFTER DELETE ON inventory
+        BEGIN
+            UPDATE stock_levels SET
+                on_hand = on_hand - old.quantity,
+                reserved = reserved - old.reserved,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE product_id = old.product_id;
+        END
+        """,
+    ]),
+    Migration(5, "low-stock index on stock_levels(low_stock, product_id)", [
+        "CREATE INDEX IF NOT EXISTS idx_stock_levels_low ON stock_levels(low_stock, product_id)",
+    ]),
+    Migration(6, "warehouse allocations per order", [
+        """
+        CREATE TABLE IF NOT EXISTS allocations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            warehouse_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(order_id) REFERENCES orders(id),
+            FOREIGN KEY(product_id) REFERENCES products(id),
+            FOREIGN KEY(warehouse_id) REFERENCES warehouses(id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_allocations_order_id ON allocations(order_id)",
+    ]),
+    Migration(7, "order date column for reports", [
+        "ALTER TABLE orders ADD COLUMN order_date TEXT GENERATED ALWAYS AS (date(created_at)) VIRTUAL",
+    ]),
+    Migration(8, "reporting indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_orders_order_date ON orders(order_date)",
+        "CREATE INDEX IF NOT EXISTS idx_order_items_order_totals ON order_items(order_id, product_id, quantity, price)",
+    ]),
+    Migration(9, "drop order_items index superseded by idx_order_items_order_totals", [
+        "DROP INDEX IF EXISTS idx_order_items_order_id",
+    ]),
+    Migration(10, "daily sales and payment rollups maintained by triggers", [
+        """
+        CREATE TABLE IF NOT EXISTS sales_daily (
+            day TEXT PRIMARY KEY,
+            orders INTEGER NOT NULL DEFAULT 0,
+            units INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS sales_daily_products (
+            day TEXT NOT NULL,
+            product_id INTEGER NOT NULL,
+            orders INTEGER NOT NULL DEFAULT 0,
+            units INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, product_id)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS payments_daily (
+            day TEXT NOT NULL,
+            method TEXT NOT NULL,
+            status TEXT NOT NULL,
+            payments INTEGER NOT NULL DEFAULT 0,
+            amount REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, method, status)
+        ) WITHOUT ROWID
+        """,
+        """
+        INSERT INTO sales_daily (day, orders, units, revenue)
+        SELECT o.order_date, COUNT(DISTINCT o.id), SUM(oi.quantity), SUM(oi.quantity * oi.price)
+        FROM order_items oi JOIN orders o ON o.id = oi.order_id
+        WHERE o.order_date IS NOT NULL GROUP BY o.order_date
+        """,
+        """
+        INSERT INTO sales_daily_products (day, product_id, orders, units, revenue)
+        SELECT o.order_date, oi.product_id, COUNT(DISTINCT o.id), SUM(oi.quantity), SUM(oi.quantity * oi.price)
+        FROM order_items oi JOIN orders o ON o.id = oi.order_id
+        WHERE o.order_date IS NOT NULL GROUP BY o.order_date, oi.product_id
+        """,
+        """
+        INSERT INTO payments_daily (day, method, status, payments, amount)
+        SELECT o.order_date, COALESCE(p.method, 'UNKNOWN'), COALESCE(upper(p.status), ''), COUNT(*), SUM(p.amount)
+        FROM payments p JOIN orders o ON o.id = p.order_id
+        WHERE o.order_date IS NOT NULL GROUP BY 1, 2, 3
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_order_items_insert_sales AFTER INSERT ON order_items
+        BEGIN
+            INSERT INTO sales_daily (day, orders, units, revenue)
+            SELECT o.order_date,
+                   NOT EXISTS (SELECT 1 FROM order_items WHERE order_id = new.order_id AND id != new.id),
+                   new.quantity, new.quantity * new.price
+            FROM orders o WHERE o.id = new.order_id AND o.order_date IS NOT NULL
+            ON CONFLICT(day) DO UPDATE SET
+                orders = orders + excluded.orders,
+                units = units + excluded.units,
+                revenue = revenue + excluded.revenue;
+            INSERT INTO sales_daily_products (day, product_id, orders, units, revenue)
+            SELECT o.order_date, new.product_id,
+                   NOT EXISTS (SELECT 1 FROM order_items WHERE order_id = new.order_id
+                               AND product_id = new.product_id AND id != new.id),
+                   new.quantity, new.quantity * new.price
+            FROM orders o WHERE o.id = new.order_id AND o.order_date IS NOT NULL
+            ON CONFLICT(day, product_id) DO UPDATE SET
+                orders = orders + excluded.orders,
+                units = units + excluded.units,
+                revenue = revenue + excluded.revenue;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_order_items_update_sales
+        AFTER UPDATE OF order_id, product_id, quantity, price ON order_items
+        BEGIN
+            UPDATE sales_daily SET
+                orders = orders - NOT EXISTS (SELECT 1 FROM order_items WHERE order_id = old.order_id AND id != old.id),
+                units = units - old.quantity,
+                revenue = revenue - old.quantity * old.price
+            WHERE day = (SELECT order_date FROM orders WHERE id = old.order_id);
+            UPDATE sales_daily_products SET
+                orders = orders - NOT EXISTS (SELECT 1 FROM order_items WHERE order_id = old.order_id
+                                              AND product_id = old.product_id AND id != old.id),
+                units = units - old.quantity,
+                revenue = revenue - old.quantity * old.price
+            WHERE day = (SELECT order_date FROM orders WHERE id = old.order_id) AND product_id = old.product_id;
+            INSERT INTO sales_daily (day, orders, units, revenue)
+            SELECT o.order_date,
+                   NOT EXISTS (SELECT 1 FROM order_items WHERE order_id = new.order_id AND id != new.id),
+                   new.quantity, new.quantity * new.price
+            FROM orders o WHERE o.id = new.order_id AND o.order_date IS NOT NULL
+            ON CONFLICT(day) DO UPDATE SET
+                orders = orders + excluded.orders,
+                units = units + excluded.units,
+                revenue = revenue + excluded.revenue;
+            INSERT INTO sales_daily_products (day, product_id, orders, units, revenue)
+            SELECT o.order_date, new.product_id,
+                   NOT EXISTS (SELECT 1 FROM order_items WHERE order_id = new.order_id
+                               AND product_id = new.product_id AND id != new.id),
+                   new.quantity, new.quantity * new.price
+            FROM orders o WHERE o.id = new.order_id AND o.order_date IS NOT NULL
+            ON CONFLICT(day, product_id) DO UPDATE SET
+                orders = orders + excluded.orders,
+                units = units + excluded.units,
+                revenue = revenue + excluded.revenue;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_order_items_delete_sales AFTER DELETE ON order_items
+        BEGIN
+            UPDATE sales_daily SET
+                orders = orders - NOT EXISTS (SELECT 1 FROM order_items WHERE order_id = old.order_id AND id != old.id),
+                units = units - old.quantity,
+                revenue = revenue - old.quantity * old.price
+            WHERE day = (SELECT order_date FROM orders WHERE id = old.order_id);
+            UPDATE sales_daily_products SET
+                orders = orders - NOT EXISTS (SELECT 1 FROM order_items WHERE order_id = old.order_id
+                                              AND product_id = old.product_id AND id != old.id),
+                units = units - old.quantity,
+                revenue = revenue - old.quantity * old.price
+            WHERE day = (SELECT order_date FROM orders WHERE id = old.order_id) AND product_id = old.product_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_payments_insert_rollup AFTER INSERT ON payments
+        BEGIN
+            INSERT INTO payments_daily (day, method, status, payments, amount)
+            SELECT o.order_date, COALESCE(new.method, 'UNKNOWN'), COALESCE(upper(new.status), ''), 1, new.amount
+            FROM orders o WHERE o.id = new.order_id AND o.order_date IS NOT NULL
+            ON CONFLICT(day, method, status) DO UPDATE SET
+                payments = payments + 1,
+                amount = amount + excluded.amount;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_payments_update_rollup
+        AFTER UPDATE OF order_id, method, status, amount ON payments
+        BEGIN
+            UPDATE payments_daily SET
+                payments = payments - 1,
+                amount = amount - old.amount
+            WHERE day = (SELECT order_date FROM orders WHERE id = old.order_id)
+              AND method = COALESCE(old.method, 'UNKNOWN') AND status = COALESCE(upper(old.status), '');
+            INSERT INTO payments_daily (day, method, status, payments, amount)
+            SELECT o.order_date, COALESCE(new.method, 'UNKNOWN'), COALESCE(upper(new.status), ''), 1, new.amount
+            FROM orders o WHERE o.id = new.order_id AND o.order_date IS NOT NULL
+            ON CONFLICT(day, method, status) DO UPDATE SET
+                payments = payments + 1,
+                amount = amount + excluded.amount;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_payments_delete_rollup AFTER DELETE ON payments
+        BEGIN
+            UPDATE payments_daily SET
+                payments = payments - 1,
+                amount = amount - old.amount
+            WHERE day = (SELECT order_date FROM orders WHERE id = old.order_id)
+              AND method = COALESCE(old.method, 'UNKNOWN') AND status = COALESCE(upper(old.status), '');
+        END
+        """,
+        # An order whose date changes takes its item and payment totals to the new day.
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_orders_date_rollups AFTER UPDATE OF created_at ON orders
+        WHEN old.order_date IS NOT new.order_date
+        BEGIN
+            UPDATE sales_daily SET
+                orders = sales_daily.orders - 1,
+                units = sales_daily.units - t.units,
+                revenue = sales_daily.revenue - t.revenue
+            FROM (SELECT SUM(quantity) AS units, SUM(quantity * price) AS revenue
+                  FROM order_items WHERE order_id = old.id HAVING COUNT(*) > 0) t
+            WHERE day = old.order_date;
+            INSERT INTO sales_daily (day, orders, units, revenue)
+            SELECT new.order_date, 1, SUM(quantity), SUM(quantity * price)
+            FROM order_items WHERE order_id = new.id AND new.order_date IS NOT NULL HAVING COUNT(*) > 0
+            ON CONFLICT(day) DO UPDATE SET
+                orders = orders + excluded.orders,
+                units = units + excluded.units,
+                revenue = revenue + excluded.revenue;
+
+            UPDATE sales_daily_products SET
+                orders = sales_daily_products.orders - 1,
+                units = sales_daily_products.units - t.units,
+                revenue = sales_daily_products.revenue - t.revenue
+            FROM (SELECT product_id, SUM(quantity) AS units, SUM(quantity * price) AS revenue
+                  FROM order_items WHERE order_id = old.id GROUP BY product_id) t
+            WHERE day = old.order_date AND sales_daily_products.product_id = t.product_id;
+            INSERT INTO sales_daily_products (day, product_id, orders, units, revenue)
+            SELECT new.order_date, product_id, 1, SUM(quantity), SUM(quantity * price)
+            FROM order_items WHERE order_id = new.id AND new.order_date IS NOT NULL GROUP BY product_id
+            ON CONFLICT(day, product_id) DO UPDATE SET
+                orders = orders + excluded.orders,
+                units = units + excluded.units,
+                revenue = revenue + excluded.revenue;
+
+            UPDATE payments_daily SET
+                payments = payments_daily.payments - t.payments,
+                amount = payments_daily.amount - t.amount
+            FROM (SELECT COALESCE(method, 'UNKNOWN') AS method, COALESCE(upper(status), '') AS status,
+                         COUNT(*) AS payments, SUM(amount) AS amount
+                  FROM payments WHERE order_id = old.id GROUP BY 1, 2) t
+            WHERE day = old.order_date AND payments_daily.method = t.method AND payments_daily.status = t.status;
+            INSERT INTO payments_daily (day, method, status, payments, amount)
+            SELECT new.order_date, COALESCE(method, 'UNKNOWN'), COALESCE(upper(status), ''), COUNT(*), SUM(amount)
+            FROM payments WHERE order_id = new.id AND new.order_date IS NOT NULL GROUP BY 2, 3
+            ON CONFLICT(day, method, status) DO UPDATE SET
+                payments = payments + excluded.payments,
+                amount = amount + excluded.amount;
+        END
+        """,
+    ]),
+    Migration(11, "status transitions, integer order status and order leases", [
+        """
+        CREATE TABLE IF NOT EXISTS status_transitions (
+            entity TEXT NOT NULL,
+            from_status TEXT NOT NULL,
+            to_status TEXT NOT NULL,
+            PRIMARY KEY (entity, from_status, to_status)
+        ) WITHOUT ROWID
+        """,
+        """
+        INSERT OR IGNORE INTO status_transitions (entity, from_status, to_status) VALUES
+            ('order', 'CREATED', 'PAID'),
+            ('order', 'CREATED', 'CANCELLED'),
+            ('order', 'PAID', 'SHIPPED'),
+            ('order', 'PAID', 'CANCELLED'),
+            ('order', 'SHIPPED', 'DELIVERED'),
+            ('shipment', 'PENDING', 'SHIPPED'),
+            ('shipment', 'PENDING', 'CANCELLED'),
+            ('shipment', 'SHIPPED', 'IN_TRANSIT'),
+            ('shipment', 'SHIPPED', 'DELIVERED'),
+            ('shipment', 'IN_TRANSIT', 'DELIVERED'),
+            ('shipment', 'SHIPPED', 'RETURNED'),
+            ('shipment', 'IN_TRANSIT', 'RETURNED'),
+            ('shipment', 'DELIVERED', 'RETURNED'),
+            ('payment', 'PENDING', 'SUCCESS'),
+            ('payment', 'PENDING', 'FAILED'),
+            ('payment', 'FAILED', 'PENDING'),
+            ('payment', 'SUCCESS', 'REFUNDED')
+        """,
+        """
+        ALTER TABLE orders ADD COLUMN status_code INTEGER GENERATED ALWAYS AS (
+            CASE upper(status)
+                WHEN 'CREATED' THEN 1
+                WHEN 'PAID' THEN 2
+                WHEN 'SHIPPED' THEN 3
+                WHEN 'DELIVERED' THEN 4
+                WHEN 'CANCELLED' THEN 5
+            END
+        ) VIRTUAL
+        """,
+        "ALTER TABLE orders ADD COLUMN lease_owner TEXT",
+        "ALTER TABLE orders ADD COLUMN lease_expires_at REAL",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_orders_status_insert BEFORE INSERT ON orders
+        WHEN upper(new.status) NOT IN ('CREATED', 'PAID', 'SHIPPED', 'DELIVERED', 'CANCELLED')
+        BEGIN
+            SELECT RAISE(ABORT, 'Unknown order status');
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_orders_status_transition BEFORE UPDATE OF status ON orders
+        WHEN old.status IS NOT NULL AND upper(old.status) IS NOT upper(new.status) AND NOT EXISTS (
+            SELECT 1 FROM status_transitions
+            WHERE entity = 'order' AND from_status = upper(old.status) AND to_status = upper(new.status)
+        )
+        BEGIN
+            SELECT RAISE(ABORT, 'Invalid order status transition');
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_shipments_status_transition BEFORE UPDATE OF status ON shipments
+        WHEN old.status IS NOT NULL AND upper(old.status) IS NOT upper(new.status) AND NOT EXISTS (
+            SELECT 1 FROM status_transitions
+            WHERE entity = 'shipment' AND from_status = upper(old.status) AND to_status = upper(new.status)
+        )
+        BEGIN
+            SELECT RAISE(ABORT, 'Invalid shipment status transition');
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_payments_status_transition BEFORE UPDATE OF status ON payments
+        WHEN old.status IS NOT NULL AND upper(old.status) IS NOT upper(new.status) AND NOT EXISTS (
+            SELECT 1 FROM status_transitions
+            WHERE entity = 'payment' AND from_status = upper(old.status) AND to_status = upper(new.status)
+        )
+        BEGIN
+            SELECT RAISE(ABORT, 'Invalid payment status transition');
+        END
+        """,
+    ]),
+    Migration(12, "order status queue index", [
+        "CREATE INDEX IF NOT EXISTS idx_orders_status_queue ON orders(status_code, id)",
+    ]),
+    Migration(13, "drop text status index superseded by idx_orders_status_queue", [
+        "DROP INDEX IF EXISTS idx_orders_status",
+    ]),
+    Migration(14, "full-text product search", [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+            name, sku, description,
+            content = 'products', content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        )
+        """,
+        """
+        INSERT INTO products_fts (rowid, name, sku, description)
+        SELECT id, name, sku, description FROM products
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_products_insert_fts AFTER INSERT ON products
+        BEGIN
+            INSERT INTO products_fts (rowid, name, sku, description)
+            VALUES (new.id, new.name, new.sku, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_products_update_fts AFTER UPDATE OF name, sku, description ON products
+        BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name, sku, description)
+            VALUES ('delete', old.id, old.name, old.sku, old.description);
+            INSERT INTO products_fts (rowid, name, sku, description)
+            VALUES (new.id, new.name, new.sku, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_products_delete_fts AFTER DELETE ON products
+        BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name, sku, description)
+            VALUES ('delete', old.id, old.name, old.sku, old.description);
+        END
+        """,
+    ]),
+    Migration(15, "shipment tracking number index", [
+        "CREATE INDEX IF NOT EXISTS idx_shipments_tracking_number ON shipments(tracking_number)",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+INDEX_RE = re.compile(
+    r"^\s*CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s+ON\s+(\w+)\s*\((.*)\)",
+    re.I | re.S,
+)
+BACKFILL_RE = re.compile(r"^\s*(?:INSERT|UPDATE)\b.*?\bFROM\s+(\w+)", re.I | re.S)
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pending_migrations(conn: sqlite3.Connection) -> List[Migration]:
+    current = get_version(conn)
+    return [m for m in MIGRATIONS if m.version > current]
+
+
+def migrate(conn: sqlite3.Connection, dry_run: bool = False):
+    """
+    Bring the database up to LATEST_VERSION.
+
+    Returns the list of applied versions, or with dry_run=True a report of
+    what would run and the estimated rebuild time per table, without
+    changing anything.
+    """
+    if not dry_run and get_version(conn) >= LATEST_VERSION:
+        return []
+
+    pending = pending_migrations(conn)
+    if dry_run:
+        return plan(conn, pending)
+
+    applied = []
+    for migration in pending:
+        start = time.perf_counter()
+        if not apply_migration(conn, migration):
+            continue  # another connection applied it first
+        applied.append(migration.version)
+        logging.info(
+            f"Applied migration {migration.version} ({migration.description}) "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+    return applied
+
+
+def apply_migration(conn: sqlite3.Connection, migration: Migration) -> bool:
+    """
+    Apply one migration; False if another connection (or process) already
+    had. Migrations with index builds are split over several transactions
+    and only the last one bumps user_version, so every statement in them
+    must be idempotent (IF NOT EXISTS): a racing process may repeat the
+    earlier steps.
+    """
+    index_builds = [s for s in migration.statements if INDEX_RE.match(s)]
+    others = [s for s in migration.statements if not INDEX_RE.match(s)]
+    bump = f"PRAGMA user_version = {migration.version}"
+
+    if not index_builds:
+        return run_in_transaction(conn, others + [bump], migration.version)
+
+    if others and not run_in_transaction(conn, others, migration.version):
+        return False
+    # One short write transaction per index keeps the lock hold time bounded
+    # by the largest single index rather than the whole migration.
+    for sql in index_builds[:-1]:
+        if not run_in_transaction(conn, [sql], migration.version):
+            return False
+    return run_in_transaction(conn, [index_builds[-1], bump], migration.version)
+
+
+def run_in_transaction(conn: sqlite3.Connection, statements: List[str], version: int) -> bool:
+    """
+    Run statements in one write transaction unless the database is already
+    at `version`. The version is read again under the write lock, since
+    pending_migrations() ran before it was taken.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if get_version(conn) >= version:
+            conn.execute("ROLLBACK")
+            return False
+        for sql in statements:
+            conn.execute(sql)
+        conn.execute("COMMIT")
+        return True
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+# ---------------- DRY RUN ----------------
+
+def object_exists(conn: sqlite3.Connection, kind: str, name: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = ? AND name = ?", (kind, name)
+    ).fetchone()
+    return row is not None
+
+
+def table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    return object_exists(conn, "table", table)
+
+
+def estimate_rows(conn: sqlite3.Connection, table: str) -> int:
+    # max(rowid) is a single b-tree descent, unlike COUNT(*).
+    if not table_exists(conn, table):
+        return 0
+    return conn.execute(f"SELECT max(rowid) FROM {table}").fetchone()[0] or 0
+
+
+def estimate_seconds(conn: sqlite3.Connection, table: str, columns: str, rows: int,
+                     sample: int = 20000) -> float:
+    """
+    Time sorting a sample of the table and extrapolate with n*log(n),
+    which is how an index build scales.
+    """
+    if rows == 0:
+        return 0.0
+    n = min(rows, sample)
+    start = time.perf_counter()
+    conn.execute(
+        f"SELECT {columns} FROM (SELECT {columns} FROM {table} LIMIT ?) ORDER BY {columns}",
+        (n,)
+    ).fetchall()
+    elapsed = time.perf_counter() - start
+    if n < 2:
+        return elapsed * rows
+    return elapsed * (rows / n) * (math.log(rows) / math.log(n))
+
+
+def plan(conn: sqlite3.Connection, pending: List[Migration]):
+    tables = {}
+    steps = []
+    for migration in pending:
+        for sql in migration.statements:
+            index = INDEX_RE.match(sql)
+            backfill = BACKFILL_RE.match(sql)
+            if index:
+                if object_exists(conn, "index", index.group(1)):
+                    continue
+                table, columns, kind = index.group(2), index.group(3), "index"
+            elif backfill:
+                table, columns, kind = backfill.group(1), "rowid", "backfill"
+            else:
+                continue
+            rows = estimate_rows(conn, table)
+            try:
+                seconds = estimate_seconds(conn, table, columns, rows) if table_exists(conn, table) else 0.0
+            except sqlite3.OperationalError:
+                # The column is added by an earlier pending migration.
+                seconds = estimate_seconds(conn, table, "rowid", rows)
+            steps.append({
+                "version": migration.version,
+                "kind": kind,
+                "table": table,
+                "rows": rows,
+                "estimated_seconds": round(seconds, 3),
+            })
+            summary = tables.setdefault(table, {"rows": rows, "estimated_seconds": 0.0})
+            summary["estimated_seconds"] = round(summary["estimated_seconds"] + seconds, 3)
+
+    return {
+        "current_version": get_version(conn),
+        "target_version": LATEST_VERSION,
+        "pending": [{"version": m.version, "description": m.description} for m in pending],
+        "steps": steps,
+        "tables": tables,
+    }
+
+
+def main():
+    import json
+
+    parser = argparse.ArgumentParser(description="Apply or preview OMS schema migrations.")
+    parser.add_argument("db_path")
+    parser.add_argument("--dry-run", action="store_true", help="report pending work without applying it")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db_path, timeout=10)
+    if not args.dry_run:
+        conn.execute("PRAGMA journal_mode = WAL;")
+    try:
+        result = migrate(conn, dry_run=args.dry_run)
+        print(json.dumps(result if args.dry_run else {"applied": result}, indent=2))
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# allocation.py
+from collections import defaultdict
+
+
+class AllocationError(ValueError):
+    """An order cannot be covered by the stock left in the snapshot."""
+
+    def __init__(self, shortfall):
+        self.shortfall = shortfall
+        super().__init__("Insufficient stock: " + ", ".join(
+            f"product {product_id} short by {short}" for product_id, short in shortfall.items()
+        ))
+
+
+class InventorySnapshot:
+    """
+    Available stock (quantity - reserved) held in memory, indexed by product:
+    stock[product_id][warehouse_id] -> units.
+
+    plan() works out which warehouses fulfil one order and takes the stock
+    out of the snapshot, so every later order in the same pass only sees what
+    is left. Nothing here touches the database.
+    """
+
+    def __init__(self, rows, costs=None):
+        """
+        rows: iterable of (product_id, warehouse_id, available).
+        costs: optional {warehouse_id: cost} added to each shipment from that
+        warehouse; missing warehouses cost 0.
+        """
+        self.stock = defaultdict(dict)
+        for product_id, warehouse_id, available in rows:
+            if available > 0:
+                self.stock[product_id][warehouse_id] = available
+        self.costs = costs or {}
+
+    def available(self, product_id: int, warehouse_id: int) -> int:
+        return self.stock.get(product_id, {}).get(warehouse_id, 0)
+
+    def plan(self, items):
+        """
+        Split one order across warehouses and return
+        {warehouse_id: {product_id: quantity}}.
+
+        items: iterable of (product_id, quantity). A warehouse that can ship
+        the whole order on its own is always preferred (cheapest first).
+        Otherwise warehouses are picked greedily by units covered per
+        shipment cost (1 + warehouse cost) until the order is covered, which
+        keeps the work per order bounded by items x candidate warehouses x
+        shipments. Raises AllocationError, leaving the snapshot untouched, if
+        the order cannot be covered.
+        """
+        need = defaultdict(int)
+        for product_id, quantity in items:
+            if quantity <= 0:
+                raise ValueError(f"Invalid quantity {quantity} for product {product_id}")
+            need[product_id] += quantity
+
+        candidates = set()
+        for product_id in need:
+            candidates.update(self.stock.get(product_id, ()))
+
+        single = [
+            w for w in candidates
+            if all(self.available(p, w) >= q for p, q in need.items())
+        ]
+        if single:
+            warehouse_id = min(single, key=lambda w: (self.costs.get(w, 0), w))
+            split = {warehouse_id: dict(need)}
+        else:
+            split = self._greedy(need, candidates)
+
+        for warehouse_id, taken in split.items():
+            for product_id, quantity in taken.items():
+                left = self.stock[product_id][warehouse_id] - quantity
+                if left:
+                    self.stock[product_id][warehouse_id] = left
+                else:
+                    del self.stock[product_id][warehouse_id]
+        return split
+
+    def _greedy(self, need, candidates):
+        remaining = dict(need)
+        split = {}
+        while remaining:
+            best, best_score = None, 0.0
+            for w in candidates:
+                units = sum(min(q, self.available(p, w)) for p, q in remaining.items())
+                score = units / (1.0 + self.costs.get(w, 0))
+                if score > best_score or (score == best_score and best is not None and w < best):
+                    best, best_score = w, score
+            if best is None:
+                raise AllocationError(remaining)
+
+            candidates.discard(best)
+            taken = {}
+            for product_id, quantity in list(remaining.items()):
+                take = min(quantity, self.available(product_id, best))
+                if take:
+                    taken[product_id] = take
+                    if take == quantity:
+                        del remaining[product_id]
+                    else:
+                        remaining[product_id] = quantity - take
+            split[best] = taken
+        return split
+
+
+def allocate(snapshot: InventorySnapshot, orders):
+    """
+    Plan a batch of orders in one pass, in the order given.
+
+    orders: iterable of (order_id, items) with items as (product_id, quantity)
+    pairs. Returns (allocated, unallocated): allocated maps order_id to its
+    warehouse split, unallocated maps order_id to its shortfall. An order
+    that cannot be covered takes no stock, so smaller orders behind it can
+    still be served.
+    """
+    allocated, unallocated = {}, {}
+    for order_id, items in orders:
+        try:
+            allocated[order_id] = snapshot.plan(items)
+        except AllocationError as e:
+            unallocated[order_id] = e.shortfall
+    return allocated, unallocated
@@ -0,0 +1,43 @@
+# async_schema.py
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from .schema import db_tools
+
+
+class AsyncDbTools:
+    """
+    Asyncio front end for db_tools.
+
+    Every db_tools method is available as a coroutine that runs the blocking
+    sqlite3 call on a dedicated thread pool, so a slow query never stalls the
+    event loop. Pair it with a ConnectionPool so each executor thread reads
+    through its own connection. At most max_concurrency calls are in flight;
+    further callers wait on a semaphore instead of piling onto the executor.
+    """
+
+    def __init__(self, tools: db_tools, max_workers: int = 8, max_concurrency: int = 64):
+        self.tools = tools
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="oms-db")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(self, method: str, *args, **kwargs):
+        call = functools.partial(getattr(self.tools, method), *args, **kwargs)
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    def __getattr__(self, name: str):
+        # Generators (iter_*) would be consumed on the wrong thread; use the
+        # paginated variants from async code instead.
+        if name.startswith("_") or name.startswith("iter_") or not callable(getattr(self.tools, name, None)):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            return await self.run(name, *args, **kwargs)
+
+        call.__name__ = name
+        return call
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
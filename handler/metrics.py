@@ -0,0 +1,175 @@
+# metrics.py
+"""
+In-process call metrics for db_tools methods and the SQL statements they run.
+
+Latencies go into fixed log-spaced buckets, so recording a call is a bisect
+plus a few integer increments under a lock, and percentiles are read off the
+bucket counts. Set OMS_METRICS=0 (or METRICS.enabled = False) to turn
+recording off; instrumented code then skips the clock calls entirely.
+"""
+import functools
+import os
+import threading
+import time
+import types
+from bisect import bisect_left
+
+# 1us .. ~100s, four buckets per doubling (~19% relative error at most)
+BUCKET_BOUNDS = [1e-6 * 2 ** (i / 4) for i in range(108)]
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Stat:
+    __slots__ = ("calls", "errors", "rows", "total", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def quantile(self, q: float) -> float:
+        if not self.calls:
+            return 0.0
+        target = q * self.calls
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return BUCKET_BOUNDS[min(i, len(BUCKET_BOUNDS) - 1)]
+        return BUCKET_BOUNDS[-1]
+
+    def summary(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "rows": self.rows,
+            "mean_ms": round(self.total / self.calls * 1000, 4) if self.calls else 0.0,
+            "p50_ms": round(self.quantile(0.5) * 1000, 4),
+            "p95_ms": round(self.quantile(0.95) * 1000, 4),
+            "p99_ms": round(self.quantile(0.99) * 1000, 4),
+        }
+
+
+class Metrics:
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.tools = {}
+        self.statements = {}
+
+    def _record(self, table: dict, key: str, seconds: float, rows: int, error: bool) -> None:
+        bucket = bisect_left(BUCKET_BOUNDS, seconds)
+        with self._lock:
+            stat = table.get(key)
+            if stat is None:
+                stat = table[key] = Stat()
+            stat.calls += 1
+            stat.rows += rows
+            stat.total += seconds
+            if error:
+                stat.errors += 1
+            stat.buckets[bucket] += 1
+
+    def record_tool(self, name: str, seconds: float, rows: int = 0, error: bool = False) -> None:
+        self._record(self.tools, name, seconds, rows, error)
+
+    def record_statement(self, sql: str, seconds: float, rows: int = 0, error: bool = False) -> None:
+        # keyed by the raw SQL string; whitespace is normalized on export
+        self._record(self.statements, sql, seconds, rows, error)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.tools = {}
+            self.statements = {}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "tools": {name: stat.summary() for name, stat in self.tools.items()},
+                "statements": {normalize_sql(sql): stat.summary() for sql, stat in self.statements.items()},
+            }
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for prefix, label, table in (("oms_tool", "tool", self.tools), ("oms_sql", "statement", self.statements)):
+                lines.append(f"# TYPE {prefix}_latency_seconds summary")
+                for key, stat in table.items():
+                    tag = f'{label}="{escape_label(normalize_sql(key))}"'
+                    for q in QUANTILES:
+                        lines.append(f'{prefix}_latency_seconds{{{tag},quantile="{q}"}} {stat.quantile(q):.9f}')
+                    lines.append(f"{prefix}_latency_seconds_sum{{{tag}}} {stat.total:.9f}")
+                    lines.append(f"{prefix}_latency_seconds_count{{{tag}}} {stat.calls}")
+                for metric, attr in (("calls", "calls"), ("errors", "errors"), ("rows", "rows")):
+                    lines.append(f"# TYPE {prefix}_{metric}_total counter")
+                    for key, stat in table.items():
+                        lines.append(
+                            f'{prefix}_{metric}_total{{{label}="{escape_label(normalize_sql(key))}"}} {getattr(stat, attr)}'
+                        )
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Write the text exposition atomically, for node_exporter's textfile collector."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+
+def normalize_sql(sql: str) -> str:
+    return " ".join(sql.split())
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def result_rows(result) -> int:
+    data = result.get("data") if isinstance(result, dict) else None
+    if isinstance(data, list):
+        return len(data)
+    return 0 if data is None else 1
+
+
+# inspect.CO_GENERATOR; inspect itself is slow to import and only needed for this flag.
+CO_GENERATOR = 0x20
+
+
+def instrument(cls):
+    """
+    Class decorator recording every public method of a db_tools-style class
+    as a tool call. A result dict with status "error" counts as an error.
+    """
+    for name, fn in list(vars(cls).items()):
+        if (name.startswith("_") or not isinstance(fn, types.FunctionType)
+                or fn.__code__.co_flags & CO_GENERATOR):
+            continue
+        setattr(cls, name, timed(name, fn))
+    return cls
+
+
+def timed(name: str, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not METRICS.enabled:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            METRICS.record_tool(name, time.perf_counter() - start, 0, True)
+            raise
+        error = isinstance(result, dict) and result.get("status") == "error"
+        METRICS.record_tool(name, time.perf_counter() - start, result_rows(result), error)
+        return result
+    return wrapper
+
+
+METRICS = Metrics(enabled=os.environ.get("OMS_METRICS", "1") != "0")
+
+# Where the MCP dump_metrics tool writes; tool callers cannot choose the path.
+METRICS_PATH_ENV = "OMS_METRICS_PATH"
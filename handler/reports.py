@@ -0,0 +1,256 @@
+# reports.py
+"""
+Revenue, product, warehouse and payment reports over orders.
+
+Every report filters on the order date (the date part of created_at) with
+inclusive start/end dates. Sales and payment reports read daily rollup
+tables; the per-row ones can also be streamed as JSON lines:
+
+    python -m handler.reports database/oms.db revenue_by_product --start 2025-01-01 --end 2025-03-31
+"""
+import argparse
+import datetime
+import json
+import sys
+
+_numpy = None  # set by load_numpy(); False when numpy is not installed
+
+
+# Daily rollups kept current by triggers on order_items, payments and
+# orders (migration 10). Each entry is (key columns, value columns, the
+# query recomputing the table from the base tables); rebuild_rollups and
+# check_rollups use the latter.
+ROLLUPS = {
+    "sales_daily": (
+        ("day",),
+        ("orders", "units", "revenue"),
+        "SELECT o.order_date, COUNT(DISTINCT o.id), SUM(oi.quantity), SUM(oi.quantity * oi.price) "
+        "FROM order_items oi JOIN orders o ON o.id = oi.order_id "
+        "WHERE o.order_date IS NOT NULL GROUP BY o.order_date",
+    ),
+    "sales_daily_products": (
+        ("day", "product_id"),
+        ("orders", "units", "revenue"),
+        "SELECT o.order_date, oi.product_id, COUNT(DISTINCT o.id), SUM(oi.quantity), SUM(oi.quantity * oi.price) "
+        "FROM order_items oi JOIN orders o ON o.id = oi.order_id "
+        "WHERE o.order_date IS NOT NULL GROUP BY o.order_date, oi.product_id",
+    ),
+    "payments_daily": (
+        ("day", "method", "status"),
+        ("payments", "amount"),
+        "SELECT o.order_date, COALESCE(p.method, 'UNKNOWN'), COALESCE(upper(p.status), ''), COUNT(*), SUM(p.amount) "
+        "FROM payments p JOIN orders o ON o.id = p.order_id "
+        "WHERE o.order_date IS NOT NULL GROUP BY 1, 2, 3",
+    ),
+}
+
+# Everything except revenue_by_warehouse reads the rollups, so a date range
+# costs one row per day (per product, per payment method) in it.
+REPORT_QUERIES = {
+    "revenue_by_day": (
+        "SELECT day, orders, units, ROUND(revenue, 2) AS revenue FROM sales_daily "
+        "WHERE day BETWEEN ? AND ? AND orders > 0 ORDER BY day"
+    ),
+    "revenue_by_product": (
+        "SELECT t.product_id, p.sku, p.name, t.orders, t.units, t.revenue FROM ("
+        "SELECT product_id, SUM(orders) AS orders, SUM(units) AS units, ROUND(SUM(revenue), 2) AS revenue "
+        "FROM sales_daily_products WHERE day BETWEEN ? AND ? GROUP BY product_id HAVING SUM(orders) > 0"
+        ") t JOIN products p ON p.id = t.product_id ORDER BY t.product_id"
+    ),
+    "top_skus_by_revenue": (
+        "SELECT t.product_id, p.sku, p.name, t.units, t.revenue FROM ("
+        "SELECT product_id, SUM(units) AS units, ROUND(SUM(revenue), 2) AS revenue "
+        "FROM sales_daily_products WHERE day BETWEEN ? AND ? GROUP BY product_id HAVING SUM(orders) > 0 "
+        "ORDER BY revenue DESC, product_id LIMIT ?"
+        ") t JOIN products p ON p.id = t.product_id ORDER BY t.revenue DESC, t.product_id"
+    ),
+    "top_skus_by_units": (
+        "SELECT t.product_id, p.sku, p.name, t.units, t.revenue FROM ("
+        "SELECT product_id, SUM(units) AS units, ROUND(SUM(revenue), 2) AS revenue "
+        "FROM sales_daily_products WHERE day BETWEEN ? AND ? GROUP BY product_id HAVING SUM(orders) > 0 "
+        "ORDER BY units DESC, product_id LIMIT ?"
+        ") t JOIN products p ON p.id = t.product_id ORDER BY t.units DESC, t.product_id"
+    ),
+    # Allocations carry quantities only; each is valued at its order line's unit price.
+    "revenue_by_warehouse": (
+        "SELECT a.warehouse_id, w.name, w.location, COUNT(DISTINCT a.order_id) AS orders, "
+        "SUM(a.quantity) AS units, ROUND(SUM(a.quantity * ("
+        "SELECT SUM(oi.quantity * oi.price) / SUM(oi.quantity) FROM order_items oi "
+        "WHERE oi.order_id = a.order_id AND oi.product_id = a.product_id"
+        ")), 2) AS revenue "
+        "FROM orders o JOIN allocations a ON a.order_id = o.id JOIN warehouses w ON w.id = a.warehouse_id "
+        "WHERE o.order_date BETWEEN ? AND ? GROUP BY a.warehouse_id ORDER BY a.warehouse_id"
+    ),
+    "order_value": (
+        "SELECT COALESCE(SUM(orders), 0) AS orders, COALESCE(SUM(units), 0) AS units, "
+        "ROUND(TOTAL(revenue), 2) AS revenue "
+        "FROM sales_daily WHERE day BETWEEN ? AND ?"
+    ),
+    # The last parameter is a JSON array of the payment statuses that count as paid.
+    "payment_mix": (
+        "SELECT method, SUM(payments) AS payments, "
+        "SUM(CASE WHEN status IN (SELECT value FROM json_each(?3)) THEN payments ELSE 0 END) AS paid_payments, "
+        "ROUND(TOTAL(CASE WHEN status IN (SELECT value FROM json_each(?3)) THEN amount END), 2) AS paid_amount "
+        "FROM payments_daily WHERE day BETWEEN ?1 AND ?2 GROUP BY method HAVING SUM(payments) > 0 "
+        "ORDER BY paid_amount DESC, method"
+    ),
+}
+
+# Reports returning one row per day/product/warehouse/method, which
+# db_tools.iter_report can stream in chunks.
+STREAMABLE_REPORTS = ("revenue_by_day", "revenue_by_product", "revenue_by_warehouse", "payment_mix")
+
+PERIODS = ("day", "week", "month")
+
+MIN_DATE = "0000-01-01"
+MAX_DATE = "9999-12-31"
+
+
+def load_numpy():
+    """
+    numpy, or None when it is not installed. Imported on first use rather
+    than with this module, since importing numpy costs more than starting
+    the CLI.
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:  # numpy is optional; bucket_series falls back to plain Python
+            _numpy = False
+    return _numpy or None
+
+
+def date_range(start: str = None, end: str = None):
+    """Validate inclusive YYYY-MM-DD bounds; None leaves that side open."""
+    for value in (start, end):
+        if value is not None:
+            datetime.date.fromisoformat(value)
+    start, end = start or MIN_DATE, end or MAX_DATE
+    if start > end:
+        raise ValueError(f"start {start} is after end {end}")
+    return start, end
+
+
+def bucket_series(rows, period: str = "day", start: str = None, end: str = None):
+    """
+    Sum revenue_by_day rows into day, week (starting Monday) or month
+    buckets, with a zero row for every empty bucket between start and end
+    (or the first and last day with data). Uses numpy when it is installed.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of {', '.join(PERIODS)}")
+    rows = list(rows)
+    if not rows:
+        return []
+    first = start if start and start != MIN_DATE else rows[0]["day"]
+    last = end if end and end != MAX_DATE else rows[-1]["day"]
+    np = load_numpy()
+    if np is not None:
+        return _bucket_numpy(np, rows, period, first, last)
+    return _bucket_python(rows, period, first, last)
+
+
+def _bucket_numpy(np, rows, period, first, last):
+    days = np.array([r["day"] for r in rows], dtype="datetime64[D]")
+    if period == "month":
+        keys = days.astype("datetime64[M]")
+        lo = np.datetime64(first, "D").astype("datetime64[M]")
+        hi = np.datetime64(last, "D").astype("datetime64[M]")
+        buckets = np.arange(lo, hi + 1)
+    else:
+        step = 7 if period == "week" else 1
+        lo, hi = np.datetime64(first, "D"), np.datetime64(last, "D")
+        if period == "week":
+            # 1970-01-01 was a Thursday: shift so Monday is 0.
+            keys = days - (days.astype("int64") + 3) % 7
+            lo = lo - (lo.astype("int64") + 3) % 7
+        else:
+            keys = days
+        buckets = np.arange(lo, hi + 1, step)
+
+    inside = (keys >= buckets[0]) & (keys <= buckets[-1])
+    idx = np.searchsorted(buckets, keys[inside])
+    totals = {}
+    for field in ("orders", "units", "revenue"):
+        values = np.array([r[field] or 0 for r in rows], dtype="float64")[inside]
+        sums = np.zeros(len(buckets))
+        np.add.at(sums, idx, values)
+        totals[field] = sums
+
+    labels = buckets.astype("datetime64[D]").astype(str)
+    return [
+        {
+            "period_start": str(labels[i]),
+            "orders": int(totals["orders"][i]),
+            "units": int(totals["units"][i]),
+            "revenue": round(float(totals["revenue"][i]), 2),
+        }
+        for i in range(len(buckets))
+    ]
+
+
+def _bucket_python(rows, period, first, last):
+    def key(day: datetime.date) -> datetime.date:
+        if period == "month":
+            return day.replace(day=1)
+        if period == "week":
+            return day - datetime.timedelta(days=day.weekday())
+        return day
+
+    lo = key(datetime.date.fromisoformat(first))
+    hi = datetime.date.fromisoformat(last)
+    buckets = {}
+    current = lo
+    while current <= hi:
+        buckets[current] = {"period_start": current.isoformat(), "orders": 0, "units": 0, "revenue": 0.0}
+        if period == "month":
+            current = (current + datetime.timedelta(days=32)).replace(day=1)
+        else:
+            current += datetime.timedelta(days=7 if period == "week" else 1)
+
+    for row in rows:
+        bucket = buckets.get(key(datetime.date.fromisoformat(row["day"])))
+        if bucket is None:
+            continue
+        bucket["orders"] += row["orders"] or 0
+        bucket["units"] += row["units"] or 0
+        bucket["revenue"] += row["revenue"] or 0
+    for bucket in buckets.values():
+        bucket["revenue"] = round(bucket["revenue"], 2)
+    return list(buckets.values())
+
+
+def main():
+    from database.db import close_db, init_db
+    from .schema import db_tools
+
+    parser = argparse.ArgumentParser(description="Stream a report as JSON lines, or maintain the rollups.")
+    parser.add_argument("db_path")
+    parser.add_argument("report", nargs="?", choices=STREAMABLE_REPORTS)
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--rebuild-rollups", action="store_true", help="recompute the rollup tables")
+    parser.add_argument("--check-rollups", action="store_true", help="compare the rollups with a recompute")
+    args = parser.parse_args()
+    if not (args.report or args.rebuild_rollups or args.check_rollups):
+        parser.error("name a report, --rebuild-rollups or --check-rollups")
+
+    conn = init_db(args.db_path)
+    try:
+        tools = db_tools(conn, cache_size=0)
+        if args.rebuild_rollups:
+            print(json.dumps(tools.rebuild_rollups()), file=sys.stderr)
+        if args.check_rollups:
+            print(json.dumps(tools.check_rollups()), file=sys.stderr)
+        if args.report:
+            for chunk in tools.iter_report(args.report, args.start, args.end, args.chunk_size):
+                sys.stdout.writelines(json.dumps(row) + "\n" for row in chunk)
+    finally:
+        close_db(conn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# rows.py
+"""
+Result shapes for bulk reads.
+
+    dict     list of dicts, one per row (the default everywhere)
+    record   list of named tuples, one class per column list, built by the
+             cursor's row factory so no sqlite3.Row or dict is made per row
+    columns  dict of column name -> list of values
+
+Records are an in-process type: at the MCP boundary wire() turns a list of
+them into {"columns": [...], "rows": [[...], ...]}, which keeps the compact
+layout on the wire.
+"""
+import sqlite3
+from collections import namedtuple
+from functools import lru_cache
+
+SHAPES = ("dict", "record", "columns")
+
+# Rows converted per fetchmany() when building columns, bounding the
+# temporary tuples alive at once.
+COLUMN_CHUNK = 1024
+
+
+def check_shape(shape: str) -> str:
+    if shape not in SHAPES:
+        raise ValueError(f"shape must be one of {', '.join(SHAPES)}")
+    return shape
+
+
+@lru_cache(maxsize=256)
+def record_type(columns: tuple):
+    """Named tuple class for a column list, shared by every query returning it."""
+    return namedtuple("Record", columns, rename=True)
+
+
+def column_names(cursor: sqlite3.Cursor) -> tuple:
+    return tuple(d[0] for d in cursor.description or ())
+
+
+def fetch(cursor: sqlite3.Cursor, shape: str, size: int = None):
+    """
+    Fetch the remaining rows of an executed cursor, or at most size of
+    them, in the given shape. Overrides the cursor's row factory.
+    """
+    names = column_names(cursor)
+    if shape == "dict":
+        cursor.row_factory = sqlite3.Row
+        rows = cursor.fetchall() if size is None else cursor.fetchmany(size)
+        return [dict(r) for r in rows]
+    if shape == "record":
+        make = record_type(names)._make
+        cursor.row_factory = lambda _, row: make(row)
+        return cursor.fetchall() if size is None else cursor.fetchmany(size)
+
+    cursor.row_factory = None
+    columns = [[] for _ in names]
+    remaining = size
+    while remaining is None or remaining > 0:
+        chunk = cursor.fetchmany(COLUMN_CHUNK if remaining is None else min(COLUMN_CHUNK, remaining))
+        if not chunk:
+            break
+        for column, values in zip(columns, zip(*chunk)):
+            column.extend(values)
+        if remaining is not None:
+            remaining -= len(chunk)
+    return dict(zip(names, columns))
+
+
+def row_count(data) -> int:
+    if isinstance(data, dict):
+        return len(next(iter(data.values()), ()))
+    return len(data)
+
+
+def last_value(data, column: str):
+    """Value of `column` in the last row of shaped data."""
+    if isinstance(data, dict):
+        return data[column][-1]
+    row = data[-1]
+    return row[column] if isinstance(row, dict) else getattr(row, column)
+
+
+def wire(result: dict, shape: str) -> dict:
+    """
+    Make a db_tools result JSON-ready: a record list becomes columns + rows.
+    Named tuples already encode as JSON arrays, so rows are not copied.
+    """
+    data = result.get("data")
+    if shape != "record" or not isinstance(data, list):
+        return result
+    columns = list(data[0]._fields) if data else []
+    return {**result, "data": {"columns": columns, "rows": data}}
@@ -1,221 +1,1493 @@
 # schema.py
+import json
+import re
 import sqlite3
+import threading
+import os
+import time
+from itertools import islice
+
+from database.db import ConnectionPool, WritePolicy, WriteRejected, is_busy, open_reader, run_write
+from .allocation import InventorySnapshot, allocate
+from .cache import MISSING, LRUCache
+from .metrics import METRICS, instrument
+from .reports import REPORT_QUERIES, ROLLUPS, STREAMABLE_REPORTS, bucket_series, date_range
+from .rows import check_shape, fetch, last_value, row_count
+
+
+# Point lookups served by db_tools getters. Each must resolve through an index;
+# db_tools.verify_query_plans() enforces that at startup.
+LOOKUP_QUERIES = {
+    "get_product": "SELECT * FROM products WHERE id = ?",
+    "get_product_by_sku": "SELECT * FROM products WHERE sku = ?",
+    "get_warehouse": "SELECT * FROM warehouses WHERE id = ?",
+    "get_inventory": "SELECT * FROM inventory WHERE product_id = ? AND warehouse_id = ?",
+    "get_inventory_by_product": "SELECT * FROM inventory WHERE product_id = ?",
+    "get_order": "SELECT * FROM orders WHERE id = ?",
+    "get_order_by_number": "SELECT * FROM orders WHERE order_number = ?",
+    "get_order_items": "SELECT * FROM order_items WHERE order_id = ?",
+    "get_shipment": "SELECT * FROM shipments WHERE id = ?",
+    # Tracking numbers are not unique; the most recent shipment wins.
+    "get_shipment_by_tracking": "SELECT * FROM shipments WHERE tracking_number = ? ORDER BY id DESC LIMIT 1",
+    "get_shipments_by_order": "SELECT * FROM shipments WHERE order_id = ?",
+    "get_payment": "SELECT * FROM payments WHERE id = ?",
+    "get_payments_by_order": "SELECT * FROM payments WHERE order_id = ?",
+    "catalog_version": "SELECT version FROM catalog_version WHERE id = ?",
+    # Batched lookups bind the whole id list as one JSON array parameter.
+    "orders_by_ids": "SELECT * FROM orders WHERE id IN (SELECT value FROM json_each(?))",
+    "orders_by_numbers": "SELECT * FROM orders WHERE order_number IN (SELECT value FROM json_each(?))",
+    "products_by_skus": "SELECT * FROM products WHERE sku IN (SELECT value FROM json_each(?))",
+    # Answered from the sku index alone, without touching the table.
+    "product_ids_by_skus": "SELECT sku, id FROM products WHERE sku IN (SELECT value FROM json_each(?))",
+    "order_items_with_products": (
+        "SELECT oi.*, p.name AS product_name, p.sku AS product_sku "
+        "FROM order_items oi LEFT JOIN products p ON p.id = oi.product_id "
+        "WHERE oi.order_id IN (SELECT value FROM json_each(?)) ORDER BY oi.order_id, oi.id"
+    ),
+    "shipments_by_orders": (
+        "SELECT * FROM shipments WHERE order_id IN (SELECT value FROM json_each(?)) ORDER BY order_id, id"
+    ),
+    "payments_by_orders": (
+        "SELECT * FROM payments WHERE order_id IN (SELECT value FROM json_each(?)) ORDER BY order_id, id"
+    ),
+    "get_stock_level": (
+        "SELECT product_id, on_hand, reserved, on_hand - reserved AS available, reorder_level, updated_at "
+        "FROM stock_levels WHERE product_id = ?"
+    ),
+    "get_low_stock": (
+        "SELECT s.product_id, p.sku, p.name, s.on_hand, s.reserved, s.on_hand - s.reserved AS available, "
+        "s.reorder_level FROM stock_levels s JOIN products p ON p.id = s.product_id "
+        "WHERE s.low_stock = 1 AND s.product_id > ? ORDER BY s.product_id LIMIT ?"
+    ),
+    "unallocated_orders": (
+        "SELECT id, order_number FROM orders o WHERE status_code = ? "
+        "AND NOT EXISTS (SELECT 1 FROM allocations a WHERE a.order_id = o.id) ORDER BY id LIMIT ?"
+    ),
+    "unallocated_orders_by_ids": (
+        "SELECT id, order_number FROM orders o WHERE id IN (SELECT value FROM json_each(?)) "
+        "AND status_code IN (SELECT value FROM json_each(?)) AND NOT EXISTS (SELECT 1 FROM allocations a WHERE a.order_id = o.id) ORDER BY id"
+    ),
+    "order_item_quantities": (
+        "SELECT order_id, product_id, quantity FROM order_items "
+        "WHERE order_id IN (SELECT value FROM json_each(?)) ORDER BY order_id, id"
+    ),
+    "available_by_products": (
+        "SELECT product_id, warehouse_id, quantity - reserved FROM inventory "
+        "WHERE product_id IN (SELECT value FROM json_each(?))"
+    ),
+    "allocations_by_order": "SELECT * FROM allocations WHERE order_id = ? ORDER BY id",
+    "order_queue": (
+        "SELECT id FROM orders WHERE status_code = ? "
+        "AND (lease_expires_at IS NULL OR lease_expires_at < ?) ORDER BY id LIMIT ?"
+    ),
+    "status_transitions": "SELECT from_status, to_status FROM status_transitions WHERE entity = ? ORDER BY 1, 2",
+    # bm25 weights: name, sku, description. Ranking and paging happen in the
+    # subquery so only the rows of the page are joined to products.
+    "search_products": (
+        "SELECT p.*, f.score FROM ("
+        "SELECT rowid, bm25(products_fts, 10.0, 5.0, 1.0) AS score FROM products_fts "
+        "WHERE products_fts MATCH ? ORDER BY score LIMIT ? OFFSET ?"
+        ") f JOIN products p ON p.id = f.rowid ORDER BY f.score"
+    ),
+    "products_by_sku_prefix": (
+        "SELECT * FROM products WHERE sku >= ? AND sku < ? AND sku > ? ORDER BY sku LIMIT ?"
+    ),
+}
+
+# Payment statuses that count towards an order's paid amount.
+PAID_PAYMENT_STATUSES = {"SUCCESS"}
+
+# orders.status_code for each order status (a generated column, migration 11).
+# Allowed status changes live in the status_transitions table.
+ORDER_STATUS_CODES = {"CREATED": 1, "PAID": 2, "SHIPPED": 3, "DELIVERED": 4, "CANCELLED": 5}
+
+# Orders named explicitly to allocate_orders must still be open; shipped,
+# delivered and cancelled ones are skipped.
+ALLOCATABLE_STATUSES = ("CREATED", "PAID")
+
+MAX_CLAIM_BATCH = 1000
+
+SEARCH_TERM_RE = re.compile(r"\w+")
+
+
+MAX_PAGE_SIZE = 1000
+
+MAX_ALLOCATION_BATCH = 10000
+
+
+def error_code(e: Exception) -> str:
+    """
+    Stable machine-readable kind of a failure, so callers can tell what is
+    worth retrying (busy, overloaded) from what is not.
+    """
+    if isinstance(e, WriteRejected):
+        return "overloaded"
+    if isinstance(e, sqlite3.OperationalError) and is_busy(e):
+        return "busy"
+    if isinstance(e, sqlite3.IntegrityError):
+        return "constraint"
+    if isinstance(e, PermissionError):
+        return "forbidden"
+    if isinstance(e, LookupError) and not isinstance(e, KeyError):
+        return "not_found"
+    if isinstance(e, (ValueError, TypeError, KeyError)):
+        return "invalid"
+    return "internal"
+
+
+def error_result(e: Exception) -> dict:
+    return {"status": "error", "code": error_code(e), "message": str(e)}
 
 
 def row_to_dict(row):
     return dict(row) if row else None
 
 
+def chunked(rows, size: int):
+    """Yield lists of (index, row) pairs holding at most `size` rows each."""
+    it = enumerate(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def fts_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query matching every word, the last one as
+    a prefix so partial input still matches. Words are quoted, so FTS5
+    operators in the input are treated as plain text.
+    """
+    terms = SEARCH_TERM_RE.findall(text)
+    if not terms:
+        raise ValueError("Search query has no words")
+    return " ".join(f'"{t}"' for t in terms[:-1]) + f' "{terms[-1]}"*'
+
+
+def prefix_upper_bound(prefix: str) -> str:
+    """Smallest string greater than every string starting with prefix."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def order_status_code(status: str) -> int:
+    try:
+        return ORDER_STATUS_CODES[status.upper()]
+    except KeyError:
+        raise ValueError(f"Unknown order status {status!r}") from None
+
+
+def row_params(row, columns):
+    """Convert a dict (keyed by column name) or a positional sequence into insert params."""
+    if isinstance(row, dict):
+        return tuple(row[col] for col in columns)
+    params = tuple(row)
+    if len(params) != len(columns):
+        raise ValueError(f"Expected {len(columns)} values, got {len(params)}")
+    return params
+
+
+@instrument
 class db_tools:
 
-    def __init__(self, db_instance: sqlite3.Connection):
-        self.db = db_instance
+    def __init__(self, db_instance, verify_plans: bool = True,
+                 cache_size: int = 10000, cache_ttl: float = 300.0, write_policy: WritePolicy = None):
+        """
+        db_instance is either a single sqlite3.Connection shared by every
+        caller, or a ConnectionPool that gives each thread its own reader and
+        funnels writes through the pool's writer thread.
+
+        get_product and get_warehouse are served from LRU caches holding up to
+        cache_size entries each for cache_ttl seconds; cache_size=0 disables
+        caching.
+
+        write_policy sets busy timeout, retries and the in-flight write limit
+        for a single connection; a ConnectionPool brings its own.
+        """
+        if isinstance(db_instance, ConnectionPool):
+            self.pool = db_instance
+            self.db = db_instance.writer
+            self.write_policy = db_instance.policy
+        else:
+            self.pool = None
+            self.db = db_instance
+            self.write_policy = write_policy or WritePolicy()
+            self.write_policy.configure(self.db)
+        self._write_lock = threading.RLock()
+        self._writing = threading.local()
+
+        self.product_cache = LRUCache(cache_size, cache_ttl) if cache_size > 0 else None
+        self.warehouse_cache = LRUCache(cache_size, cache_ttl) if cache_size > 0 else None
+        self._watcher = None
+        self._watcher_lock = threading.Lock()
+        self._data_version = None
+        self._catalog_version = None
+        if self.product_cache:
+            db_path = self.pool.db_path if self.pool else self._db_file()
+            # A private connection: PRAGMA data_version only moves for commits
+            # made by *other* connections, including other processes.
+            if db_path:
+                self._watcher = open_reader(db_path)
+
+        if verify_plans:
+            self.verify_query_plans()
+
+    # ---------------- CONNECTIONS ----------------
+    def _reader(self) -> sqlite3.Connection:
+        return self.pool.reader() if self.pool else self.db
+
+    def _write_tx(self, work):
+        """Run work(conn) as one write transaction and return its result."""
+        if self.pool:
+            return self.pool.write(work)
+        if getattr(self._writing, "active", False):
+            # Nested write (e.g. inside transaction()); already admitted.
+            return run_write(self.db, work, self.write_policy)
+        with self.write_policy.admit(), self._write_lock:
+            self._writing.active = True
+            try:
+                return run_write(self.db, work, self.write_policy)
+            finally:
+                self._writing.active = False
+
+    def transaction(self, fn):
+        """
+        Call fn() with every db_tools write it makes joined into one
+        transaction. Each write still runs in its own savepoint, so a write
+        that fails (and returns an error dict) does not undo the others; an
+        exception escaping fn rolls everything back.
+        """
+        return self._write_tx(lambda conn: fn())
+
+    def _write(self, sql: str, params=()):
+        """Execute a single write statement and return the new row id."""
+        if not METRICS.enabled:
+            return self._write_tx(lambda conn: conn.execute(sql, params).lastrowid)
+        start = time.perf_counter()
+        try:
+            row_id = self._write_tx(lambda conn: conn.execute(sql, params).lastrowid)
+        except Exception:
+            METRICS.record_statement(sql, time.perf_counter() - start, 0, True)
+            raise
+        METRICS.record_statement(sql, time.perf_counter() - start, 1, False)
+        return row_id
+
+    def _fetch_all(self, sql: str, params=()):
+        if not METRICS.enabled:
+            return self._reader().execute(sql, params).fetchall()
+        start = time.perf_counter()
+        try:
+            rows = self._reader().execute(sql, params).fetchall()
+        except Exception:
+            METRICS.record_statement(sql, time.perf_counter() - start, 0, True)
+            raise
+        METRICS.record_statement(sql, time.perf_counter() - start, len(rows), False)
+        return rows
+
+    def _fetch_shaped(self, sql: str, params, shape: str):
+        """Like _fetch_all, but rows come back in a handler.rows shape."""
+        if not METRICS.enabled:
+            return fetch(self._reader().execute(sql, params), shape)
+        start = time.perf_counter()
+        try:
+            data = fetch(self._reader().execute(sql, params), shape)
+        except Exception:
+            METRICS.record_statement(sql, time.perf_counter() - start, 0, True)
+            raise
+        METRICS.record_statement(sql, time.perf_counter() - start, row_count(data), False)
+        return data
+
+    def _fetch_one(self, sql: str, params=()):
+        if not METRICS.enabled:
+            return self._reader().execute(sql, params).fetchone()
+        start = time.perf_counter()
+        try:
+            row = self._reader().execute(sql, params).fetchone()
+        except Exception:
+            METRICS.record_statement(sql, time.perf_counter() - start, 0, True)
+            raise
+        METRICS.record_statement(sql, time.perf_counter() - start, 0 if row is None else 1, False)
+        return row
+
+    def _db_file(self) -> str:
+        for row in self.db.execute("PRAGMA database_list"):
+            if row["name"] == "main":
+                return row["file"]
+        return ""
+
+    # ---------------- CACHE ----------------
+    def _sync_catalog(self):
+        """
+        Drop cached products and warehouses if another connection changed
+        them. data_version is checked first because it is nearly free; the
+        trigger-maintained catalog_version then tells catalog changes apart
+        from unrelated writes such as new orders.
+        """
+        if self._watcher is None:
+            return
+        with self._watcher_lock:
+            data_version = self._watcher.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return
+            self._data_version = data_version
+            version = self._watcher.execute(LOOKUP_QUERIES["catalog_version"], (1,)).fetchone()[0]
+            if version == self._catalog_version:
+                return
+            self._catalog_version = version
+        self.product_cache.clear()
+        self.warehouse_cache.clear()
+
+    def _cached_lookup(self, cache, query: str, key: int, use_cache: bool):
+        if cache is None or not use_cache:
+            return row_to_dict(self._fetch_one(LOOKUP_QUERIES[query], (key,)))
+
+        self._sync_catalog()
+        value = cache.get(key)
+        if value is not MISSING:
+            return dict(value)
+
+        generation = cache.generation
+        data = row_to_dict(self._fetch_one(LOOKUP_QUERIES[query], (key,)))
+        # Missing ids are not cached, so an insert can never be shadowed.
+        if data is not None:
+            cache.put(key, dict(data), generation)
+        return data
+
+    def get_cache_stats(self):
+        if self.product_cache is None:
+            return {"status": "success", "data": None}
+        return {
+            "status": "success",
+            "data": {"products": self.product_cache.stats(), "warehouses": self.warehouse_cache.stats()},
+        }
+
+    # ---------------- METRICS ----------------
+    def get_metrics(self):
+        """Per-method and per-statement counters and latency percentiles."""
+        data = METRICS.snapshot()
+        data["writes"] = self.pool.stats() if self.pool else None
+        data["cache"] = self.get_cache_stats()["data"]
+        return {"status": "success", "data": data}
+
+    def dump_metrics(self, path: str):
+        """Write the metrics in Prometheus text format to `path`."""
+        try:
+            METRICS.write_prometheus(path)
+            return {"status": "success", "message": f"Metrics written to {path}"}
+        except Exception as e:
+            return error_result(e)
+
+    def get_write_stats(self):
+        """
+        Write contention counters: writes admitted and rejected, busy retries
+        and failures, writes in flight; with a ConnectionPool also the queue
+        and commit batch size counters.
+        """
+        if not self.pool:
+            return {"status": "success", "data": self.write_policy.stats()}
+        return {"status": "success", "data": self.pool.stats()}
+
+    # ---------------- PAGINATION ----------------
+    def _page(self, table: str, limit: int, after_id: int, shape: str = "dict"):
+        """
+        Keyset page of `table` ordered by id. Pass the returned next_after_id
+        back as after_id to continue; it is None on the last page. shape is
+        one of handler.rows.SHAPES.
+        """
+        try:
+            if not 1 <= limit <= MAX_PAGE_SIZE:
+                raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+            data = self._fetch_shaped(
+                f"SELECT * FROM {table} WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit), check_shape(shape)
+            )
+            next_after_id = last_value(data, "id") if row_count(data) == limit else None
+            return {"status": "success", "data": data, "next_after_id": next_after_id}
+        except Exception as e:
+            return error_result(e)
+
+    def _iter_table(self, table: str, chunk_size: int, shape: str = "dict"):
+        """
+        Yield the rows of `table` in chunks of at most chunk_size rows, each
+        in the given shape. Each chunk is a separate keyset query, so neither
+        the full result set nor a long-lived read transaction is held while
+        the caller works.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be >= 1")
+        check_shape(shape)
+        sql = f"SELECT * FROM {table} WHERE id > ? ORDER BY id LIMIT ?"
+        after_id = 0
+        while True:
+            data = self._fetch_shaped(sql, (after_id, chunk_size), shape)
+            count = row_count(data)
+            if not count:
+                return
+            yield data
+            if count < chunk_size:
+                return
+            after_id = last_value(data, "id")
+
+    def verify_query_plans(self):
+        """
+        Run EXPLAIN QUERY PLAN for every lookup query and raise if any of
+        them would fall back to a full table SCAN.
+        """
+        # EXPLAIN statements are not re-prepared after DDL, so tag them with the
+        # schema cookie to keep the statement cache from serving a stale plan.
+        conn = self._reader()
+        schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        scans = []
+        for name, sql in LOOKUP_QUERIES.items():
+            params = (None,) * sql.count("?")
+            explain = f"EXPLAIN QUERY PLAN {sql} -- schema {schema_version}"
+            subqueries = set()
+            for row in conn.execute(explain, params):
+                detail = row[3]
+                if detail.startswith(("MATERIALIZE ", "CO-ROUTINE ")):
+                    subqueries.add(detail.split(" ", 1)[1])
+                # Scanning a json_each() parameter list or the (already
+                # limited) result of a subquery is expected.
+                if (detail.startswith("SCAN") and "VIRTUAL TABLE" not in detail
+                        and detail[5:] not in subqueries):
+                    scans.append(f"{name}: {detail}")
+        if scans:
+            raise RuntimeError("Lookup queries without index: " + "; ".join(scans))
 
     # ---------------- PRODUCTS ----------------
     def add_product(self, product_sku: str, prod_name: str, price: float, desc: str):
         try:
-            self.db.execute(
+            product_id = self._write(
                 "INSERT INTO products (sku, name, price, description) VALUES (?, ?, ?, ?)",
                 (product_sku, prod_name, price, desc)
             )
-            self.db.commit()
+            if self.product_cache:
+                self.product_cache.invalidate(product_id)
             return {"status": "success", "message": "Product added"}
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return error_result(e)
 
-    def get_product(self, product_id: int):
+    def get_product(self, product_id: int, use_cache: bool = True):
         try:
-            row = self.db.execute(
-                "SELECT * FROM products WHERE id = ?",
-                (product_id,)
-            ).fetchone()
+            data = self._cached_lookup(self.product_cache, "get_product", product_id, use_cache)
+            return {"status": "success", "data": data}
+        except Exception as e:
+            return error_result(e)
+
+    def get_product_by_sku(self, sku: str):
+        try:
+            row = self._fetch_one(
+                LOOKUP_QUERIES["get_product_by_sku"],
+                (sku,)
+            )
             return {"status": "success", "data": row_to_dict(row)}
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return error_result(e)
+
+    def get_products_by_skus(self, skus):
+        """
+        Batched get_product_by_sku in one query. Results follow the request
+        order; unknown SKUs are listed under "missing".
+        """
+        try:
+            skus = list(skus)
+            rows = self._fetch_all(LOOKUP_QUERIES["products_by_skus"], (json.dumps(skus),))
+            by_sku = {row["sku"]: dict(row) for row in rows}
+            return {
+                "status": "success",
+                "data": [by_sku[s] for s in skus if s in by_sku],
+                "missing": [s for s in skus if s not in by_sku],
+            }
+        except Exception as e:
+            return error_result(e)
+
+    def resolve_skus(self, skus):
+        """
+        Map SKUs to product ids in one query, for import pipelines that
+        reference products by SKU. Returns {sku: id} plus the unknown SKUs
+        under "missing".
+        """
+        try:
+            skus = list(skus)
+            rows = self._fetch_all(LOOKUP_QUERIES["product_ids_by_skus"], (json.dumps(skus),))
+            ids = {row["sku"]: row["id"] for row in rows}
+            return {
+                "status": "success",
+                "data": ids,
+                "missing": [s for s in dict.fromkeys(skus) if s not in ids],
+            }
+        except Exception as e:
+            return error_result(e)
 
     def get_all_products(self):
         try:
-            rows = self.db.execute("SELECT * FROM products").fetchall()
+            rows = self._fetch_all("SELECT * FROM products")
             return {"status": "success", "data": [dict(r) for r in rows]}
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return error_result(e)
+
+    def get_products_page(self, limit: int = 100, after_id: int = 0, shape: str = "dict"):
+        return self._page("products", limit, after_id, shape)
+
+    def iter_products(self, chunk_size: int = 1000, shape: str = "dict"):
+        return self._iter_table("products", chunk_size, shape)
+
+    def search_products(self, query: str, limit: int = 20, offset: int = 0):
+        """
+        Products whose name, SKU or description contain every word of query,
+        best match first (name counts most). Pass next_offset back as offset
+        for the next page; it is None on the last page.
+        """
+        try:
+            if not 1 <= limit <= MAX_PAGE_SIZE:
+                raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+            if offset < 0:
+                raise ValueError("offset must be >= 0")
+            rows = self._fetch_all(
+                LOOKUP_QUERIES["search_products"],
+                (fts_query(query), limit, offset)
+            )
+            data = [dict(r) for r in rows]
+            next_offset = offset + limit if len(data) == limit else None
+            return {"status": "success", "data": data, "next_offset": next_offset}
+        except Exception as e:
+            return error_result(e)
+
+    def get_products_by_sku_prefix(self, prefix: str, limit: int = 100, after_sku: str = ""):
+        """
+        Products whose SKU starts with prefix, in SKU order, as an index range
+        scan. Pass next_after_sku back as after_sku to continue.
+        """
+        try:
+            if not prefix:
+                raise ValueError("prefix must not be empty")
+            if not 1 <= limit <= MAX_PAGE_SIZE:
+                raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+            rows = self._fetch_all(
+                LOOKUP_QUERIES["products_by_sku_prefix"],
+                (prefix, prefix_upper_bound(prefix), after_sku or "", limit)
+            )
+            data = [dict(r) for r in rows]
+            next_after_sku = data[-1]["sku"] if len(data) == limit else None
+            return {"status": "success", "data": data, "next_after_sku": next_after_sku}
+        except Exception as e:
+            return error_result(e)
 
     # ---------------- WAREHOUSES ----------------
     def add_warehouse(self, name: str, location: str):
         try:
-            self.db.execute(
+            warehouse_id = self._write(
                 "INSERT INTO warehouses (name, location) VALUES (?, ?)",
                 (name, location)
             )
-            self.db.commit()
+            if self.warehouse_cache:
+                self.warehouse_cache.invalidate(warehouse_id)
             return {"status": "success", "message": "Warehouse added"}
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return error_result(e)
 
-    def get_warehouse(self, warehouse_id: int):
+    def get_warehouse(self, warehouse_id: int, use_cache: bool = True):
         try:
-            row = self.db.execute(
-                "SELECT * FROM warehouses WHERE id = ?",
-                (warehouse_id,)
-            ).fetchone()
-            return {"status": "success", "data": row_to_dict(row)}
+            data = self._cached_lookup(self.warehouse_cache, "get_warehouse", warehouse_id, use_cache)
+            return {"status": "success", "data": data}
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return error_result(e)
 
     def get_all_warehouses(self):
         try:
-            rows = self.db.execute("SELECT * FROM warehouses").fetchall()
+            rows = self._fetch_all("SELECT * FROM warehouses")
             return {"status": "success", "data": [dict(r) for r in rows]}
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return error_result(e)
+
+    def get_warehouses_page(self, limit: int = 100, after_id: int = 0, shape: str = "dict"):
+        return self._page("warehouses", limit, after_id, shape)
+
+    def iter_warehouses(self, chunk_size: int = 1000, shape: str = "dict"):
+        return self._iter_table("warehouses", chunk_size, shape)
 
     # ---------------- INVENTORY ----------------
     def add_inventory(self, product_id: int, warehouse_id: int, quantity: int):
         try:
-            self.db.execute(
+            self._write(
                 "INSERT INTO inventory (product_id, warehouse_id, quantity) VALUES (?, ?, ?)",
                 (product_id, warehouse_id, quantity)
             )
-            self.db.commit()
             return {"status": "success", "message": "Inventory added"}
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return error_result(e)
 
     def get_inventory(self, product_id: int, warehouse_id: int):
         try:
-            row = self.db.execute(
-                "SELECT * FROM inventory WHERE product_id = ? AND warehouse_id = ?",
+            row = self._fetch_one(
+                LOOKUP_QUERIES["get_inventory"],
                 (product_id, warehouse_id)
-            ).fetchone()
+            )
             return {"status": "success", "data": row_to_dict(row)}
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return error_result(e)
 
     def get_inventory_by_product(self, product_id: int):
         try:
-            rows = self.db.execute(
-                "SELECT * FROM inventory WHERE product_id = ?",
+            rows = self._fetch_all(
+                LOOKUP_QUERIES["get_inventory_by_product"],
                 (product_id,)
-            ).fetchall()
+            )
             return {"status": "success", "data": [dict(r) for r in rows]}
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return error_result(e)
+
+    def update_inventory(self, product_id: int, warehouse_id: int, quantity: int = None, reserved: int = None):
+        """
+        Set the on-hand and/or reserved quantity of an existing inventory row.
+        Neither may be negative and reserved may not exceed on-hand.
+        """
+        try:
+            if quantity is None and reserved is None:
+                raise ValueError("Nothing to update")
+            if (quantity is not None and quantity < 0) or (reserved is not None and reserved < 0):
+                raise ValueError("quantity and reserved must be >= 0")
+
+            def work(conn):
+                row = conn.execute(
+                    "SELECT id, quantity, reserved FROM inventory WHERE product_id = ? AND warehouse_id = ?",
+                    (product_id, warehouse_id)
+                ).fetchone()
+                if row is None:
+                    raise LookupError("Inventory not found")
+                new_quantity = row["quantity"] if quantity is None else quantity
+                new_reserved = row["reserved"] if reserved is None else reserved
+                if new_reserved > new_quantity:
+                    raise ValueError(f"reserved ({new_reserved}) cannot exceed quantity ({new_quantity})")
+                conn.execute(
+                    "UPDATE inventory SET quantity = ?, reserved = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                    (new_quantity, new_reserved, row["id"])
+                )
+
+            self._write_tx(work)
+            return {"status": "success", "message": "Inventory updated"}
+        except Exception as e:
+            return error_result(e)
+
+    # ---------------- STOCK LEVELS ----------------
+    # stock_levels holds one row per product, kept in step with inventory by
+    # triggers: on_hand = SUM(quantity), reserved = SUM(reserved).
+
+    def get_stock_level(self, product_id: int):
+        try:
+            row = self._fetch_one(
+                LOOKUP_QUERIES["get_stock_level"],
+                (product_id,)
+            )
+            return {"status": "success", "data": row_to_dict(row)}
+        except Exception as e:
+            return error_result(e)
+
+    def set_reorder_level(self, product_id: int, reorder_level: int):
+        try:
+            self._write(
+                "INSERT INTO stock_levels (product_id, reorder_level) VALUES (?, ?) "
+                "ON CONFLICT(product_id) DO UPDATE SET reorder_level = excluded.reorder_level",
+                (product_id, reorder_level)
+            )
+            return {"status": "success", "message": "Reorder level set"}
+        except Exception as e:
+            return error_result(e)
+
+    def get_low_stock(self, limit: int = 100, after_id: int = 0):
+        """Products whose available quantity is below their reorder level, paged by product id."""
+        try:
+            if not 1 <= limit <= MAX_PAGE_SIZE:
+                raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+            rows = self._fetch_all(
+                LOOKUP_QUERIES["get_low_stock"],
+                (after_id, limit)
+            )
+            data = [dict(r) for r in rows]
+            next_after_id = data[-1]["product_id"] if len(data) == limit else None
+            return {"status": "success", "data": data, "next_after_id": next_after_id}
+        except Exception as e:
+            return error_result(e)
+
+    def check_stock_levels(self, repair: bool = False):
+        """
+        Recompute per-product totals from inventory and report every product
+        whose stock_levels row has drifted. With repair=True the drifted rows
+        are rewritten in one transaction.
+        """
+        def compare(conn):
+            expected = {
+                row[0]: (row[1], row[2]) for row in conn.execute(
+                    "SELECT product_id, SUM(quantity), SUM(reserved) FROM inventory GROUP BY product_id"
+                )
+            }
+            drift = []
+            for product_id, on_hand, reserved in conn.execute(
+                "SELECT product_id, on_hand, reserved FROM stock_levels"
+            ):
+                want = expected.pop(product_id, (0, 0))
+                if (on_hand, reserved) != want:
+                    drift.append({"product_id": product_id, "on_hand": on_hand, "reserved": reserved,
+                                  "expected_on_hand": want[0], "expected_reserved": want[1]})
+            for product_id, want in expected.items():
+                drift.append({"product_id": product_id, "on_hand": None, "reserved": None,
+                              "expected_on_hand": want[0], "expected_reserved": want[1]})
+
+            if repair:
+                conn.executemany(
+                    "INSERT INTO stock_levels (product_id, on_hand, reserved) VALUES (?, ?, ?) "
+                    "ON CONFLICT(product_id) DO UPDATE SET on_hand = excluded.on_hand, "
+                    "reserved = excluded.reserved, updated_at = CURRENT_TIMESTAMP",
+                    [(d["product_id"], d["expected_on_hand"], d["expected_reserved"]) for d in drift]
+                )
+            return drift
+
+        try:
+            drift = self._write_tx(compare) if repair else compare(self._reader())
+            return {"status": "success", "data": {"drifted": len(drift), "repaired": repair, "rows": drift}}
+        except Exception as e:
+            return error_result(e)
 
     # ---------------- ORDERS ----------------
     def add_order(self, order_number: str, status: str):
         try:
-            self.db.execute(
+            self._write(
                 "INSERT INTO orders (order_number, status) VALUES (?, ?)",
                 (order_number, status)
             )
-            self.db.commit()
             return {"status": "success", "message": "Order added"}
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return error_result(e)
+
+    def place_order(self, order_number: str, status: str, items):
+        """
+        Create an order with all of its items and take the stock out of
+        inventory in one BEGIN IMMEDIATE transaction.
+
+        items: iterable of dicts with product_id, quantity, price. Stock is
+        drawn from the warehouses holding the most units first and recorded
+        in allocations. If any item cannot be covered nothing is written.
+        """
+        try:
+            items = [row_params(item, ("product_id", "quantity", "price")) for item in items]
+            if not items:
+                raise ValueError("Order has no items")
+            order_id, allocations = self._write_tx(
+                lambda conn: self._place_order(conn, order_number, status, items)
+            )
+            return {
+                "status": "success",
+                "message": "Order placed",
+                "data": {"order_id": order_id, "allocations": allocations},
+            }
+        except Exception as e:
+            return error_result(e)
+
+    @staticmethod
+    def _place_order(conn: sqlite3.Connection, order_number: str, status: str, items):
+        order_id = conn.execute(
+            "INSERT INTO orders (order_number, status) VALUES (?, ?)",
+            (order_number, status)
+        ).lastrowid
+
+        allocations = []
+        for product_id, quantity, price in items:
+            if quantity <= 0:
+                raise ValueError(f"Invalid quantity {quantity} for product {product_id}")
+            conn.execute(
+                "INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (?, ?, ?, ?)",
+                (order_id, product_id, quantity, price)
+            )
+
+            remaining = quantity
+            # Reserved units are spoken for; only quantity - reserved can be sold.
+            stock = conn.execute(
+                "SELECT id, warehouse_id, quantity - reserved AS available FROM inventory "
+                "WHERE product_id = ? AND quantity - reserved > 0 ORDER BY available DESC",
+                (product_id,)
+            ).fetchall()
+            for row in stock:
+                take = min(remaining, row["available"])
+                # The write lock is held, so the guard only trips on a logic error.
+                updated = conn.execute(
+                    "UPDATE inventory SET quantity = quantity - ?, updated_at = CURRENT_TIMESTAMP "
+                    "WHERE id = ? AND quantity - reserved >= ?",
+                    (take, row["id"], take)
+                ).rowcount
+                if updated != 1:
+                    raise RuntimeError(f"Inventory row {row['id']} changed during allocation")
+                conn.execute(
+                    "INSERT INTO allocations (order_id, product_id, warehouse_id, quantity) VALUES (?, ?, ?, ?)",
+                    (order_id, product_id, row["warehouse_id"], take)
+                )
+                allocations.append({"product_id": product_id, "warehouse_id": row["warehouse_id"], "quantity": take})
+                remaining -= take
+                if remaining == 0:
+                    break
+
+            if remaining:
+                raise ValueError(f"Insufficient stock for product {product_id}: short by {remaining}")
+
+        return order_id, allocations
 
     def get_order(self, order_id: int):
         try:
-            row = self.db.execute(
-                "SELECT * FROM orders WHERE id = ?",
+            row = self._fetch_one(
+                LOOKUP_QUERIES["get_order"],
                 (order_id,)
-            ).fetchone()
+            )
             return {"status": "success", "data": row_to_dict(row)}
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return error_result(e)
 
     def get_order_by_number(self, order_number: str):
         try:
-            row = self.db.execute(
-                "SELECT * FROM orders WHERE order_number = ?",
+            row = self._fetch_one(
+                LOOKUP_QUERIES["get_order_by_number"],
                 (order_number,)
-            ).fetchone()
+            )
             return {"status": "success", "data": row_to_dict(row)}
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return error_result(e)
+
+    def get_order_details(self, order_id: int = None, order_number: str = None):
+        """Order with items (incl. product name/SKU), shipments, payments and totals."""
+        res = self.get_orders_details(
+            order_ids=[order_id] if order_id is not None else None,
+            order_numbers=[order_number] if order_number is not None else None,
+        )
+        if res["status"] != "success":
+            return res
+        return {"status": "success", "data": res["data"][0] if res["data"] else None}
+
+    def get_orders_details(self, order_ids=None, order_numbers=None):
+        """
+        Batched get_order_details: four queries in total however many orders
+        are requested. Results follow the request order; unknown ids/numbers
+        are listed under "missing".
+        """
+        try:
+            if (order_ids is None) == (order_numbers is None):
+                raise ValueError("Pass exactly one of order_ids or order_numbers")
+
+            if order_ids is not None:
+                keys, key_field = list(order_ids), "id"
+                orders = self._fetch_all(LOOKUP_QUERIES["orders_by_ids"], (json.dumps(keys),))
+            else:
+                keys, key_field = list(order_numbers), "order_number"
+                orders = self._fetch_all(LOOKUP_QUERIES["orders_by_numbers"], (json.dumps(keys),))
+
+            details = {}
+            for row in orders:
+                order = dict(row)
+                order.update(items=[], shipments=[], payments=[])
+                details[order["id"]] = order
+
+            id_list = (json.dumps(list(details)),)
+            for key, query in (
+                ("items", "order_items_with_products"),
+                ("shipments", "shipments_by_orders"),
+                ("payments", "payments_by_orders"),
+            ):
+                for row in self._fetch_all(LOOKUP_QUERIES[query], id_list):
+                    details[row["order_id"]][key].append(dict(row))
+
+            for order in details.values():
+                items_total = sum(i["quantity"] * i["price"] for i in order["items"])
+                paid = sum(
+                    p["amount"] for p in order["payments"]
+                    if (p["status"] or "").upper() in PAID_PAYMENT_STATUSES
+                )
+                order["totals"] = {
+                    "item_count": len(order["items"]),
+                    "units": sum(i["quantity"] for i in order["items"]),
+                    "items_total": round(items_total, 2),
+                    "paid": round(paid, 2),
+                    "outstanding": round(items_total - paid, 2),
+                }
+
+            by_key = {order[key_field]: order for order in details.values()}
+            return {
+                "status": "success",
+                "data": [by_key[k] for k in keys if k in by_key],
+                "missing": [k for k in keys if k not in by_key],
+            }
+        except Exception as e:
+            return error_result(e)
+
+    # ---------------- ALLOCATION ----------------
+    def allocate_orders(self, order_ids=None, status: str = "CREATED", limit: int = 1000,
+                        location_costs=None, commit: bool = False):
+        """
+        Decide which warehouses fulfil orders that have no allocations yet,
+        using as few shipments per order as possible.
+
+        Orders are taken from order_ids (those not CREATED or PAID, or already
+        allocated, are reported as skipped), or else the oldest `limit`
+        orders in `status`, and planned in id order against one in-memory snapshot of
+        available stock (quantity - reserved). location_costs optionally maps
+        a warehouse location to an extra cost per shipment from it.
+
+        With commit=False the plan is only returned. With commit=True the
+        snapshot, the plan and the stock updates all happen in one write
+        transaction: inventory is decremented and the split is recorded in
+        allocations. Orders that cannot be covered are reported with their
+        shortfall and left untouched.
+        """
+        try:
+            if order_ids is not None:
+                order_ids = list(order_ids)
+            if order_ids is None and not 1 <= limit <= MAX_ALLOCATION_BATCH:
+                raise ValueError(f"limit must be between 1 and {MAX_ALLOCATION_BATCH}")
+            if order_ids is not None and len(order_ids) > MAX_ALLOCATION_BATCH:
+                raise ValueError(f"At most {MAX_ALLOCATION_BATCH} orders per call")
+
+            def work(conn):
+                return self._allocate_orders(conn, order_ids, status, limit, location_costs or {}, commit)
+
+            data = self._write_tx(work) if commit else work(self._reader())
+            return {"status": "success", "data": data}
+        except Exception as e:
+            return error_result(e)
+
+    @staticmethod
+    def _allocate_orders(conn: sqlite3.Connection, order_ids, status, limit, location_costs, commit):
+        if order_ids is not None:
+            orders = conn.execute(
+                LOOKUP_QUERIES["unallocated_orders_by_ids"],
+                (json.dumps(list(order_ids)), json.dumps([ORDER_STATUS_CODES[s] for s in ALLOCATABLE_STATUSES]))
+            ).fetchall()
+        else:
+            orders = conn.execute(LOOKUP_QUERIES["unallocated_orders"], (order_status_code(status), limit)).fetchall()
+        numbers = {row["id"]: row["order_number"] for row in orders}
+
+        items = {}
+        for order_id, product_id, quantity in conn.execute(
+            LOOKUP_QUERIES["order_item_quantities"], (json.dumps(list(numbers)),)
+        ):
+            items.setdefault(order_id, []).append((product_id, quantity))
+        product_ids = {product_id for rows in items.values() for product_id, _ in rows}
+
+        costs = {}
+        if location_costs:
+            for warehouse_id, location in conn.execute("SELECT id, location FROM warehouses"):
+                if location in location_costs:
+                    costs[warehouse_id] = float(location_costs[location])
+
+        snapshot = InventorySnapshot(
+            conn.execute(LOOKUP_QUERIES["available_by_products"], (json.dumps(list(product_ids)),)),
+            costs,
+        )
+        allocated, unallocated = allocate(snapshot, ((order_id, items[order_id]) for order_id in numbers
+                                                      if order_id in items))
+
+        if commit:
+            for order_id, split in allocated.items():
+                rows = [
+                    (quantity, product_id, warehouse_id, quantity)
+                    for warehouse_id, taken in split.items()
+                    for product_id, quantity in taken.items()
+                ]
+                # The snapshot was read under the write lock, so the guard only trips on a logic error.
+                updated = conn.executemany(
+                    "UPDATE inventory SET quantity = quantity - ?, updated_at = CURRENT_TIMESTAMP "
+                    "WHERE product_id = ? AND warehouse_id = ? AND quantity - reserved >= ?",
+                    rows
+                ).rowcount
+                if updated != len(rows):
+                    raise RuntimeError(f"Inventory changed while allocating order {order_id}")
+                conn.executemany(
+                    "INSERT INTO allocations (order_id, product_id, warehouse_id, quantity) VALUES (?, ?, ?, ?)",
+                    [(order_id, product_id, warehouse_id, quantity) for quantity, product_id, warehouse_id, _ in rows]
+                )
+
+        if order_ids is not None:
+            skipped = [order_id for order_id in order_ids if order_id not in numbers or order_id not in items]
+        else:
+            skipped = [order_id for order_id in numbers if order_id not in items]
+        return {
+            "committed": commit,
+            "orders": [
+                {
+                    "order_id": order_id,
+                    "order_number": numbers[order_id],
+                    "shipments": [
+                        {
+                            "warehouse_id": warehouse_id,
+                            "items": [{"product_id": p, "quantity": q} for p, q in taken.items()],
+                        }
+                        for warehouse_id, taken in split.items()
+                    ],
+                }
+                for order_id, split in allocated.items()
+            ],
+            "unallocated": [
+                {
+                    "order_id": order_id,
+                    "order_number": numbers[order_id],
+                    "shortfall": [{"product_id": p, "short": q} for p, q in shortfall.items()],
+                }
+                for order_id, shortfall in unallocated.items()
+            ],
+            "skipped": skipped,
+            "shipment_count": sum(len(split) for split in allocated.values()),
+        }
+
+    def get_allocations(self, order_id: int):
+        try:
+            rows = self._fetch_all(
+                LOOKUP_QUERIES["allocations_by_order"],
+                (order_id,)
+            )
+            return {"status": "success", "data": [dict(r) for r in rows]}
+        except Exception as e:
+            return error_result(e)
+
+    # ---------------- STATUS ----------------
+    # Status changes must follow the status_transitions table; triggers
+    # reject any other change, whoever makes it.
+
+    def get_status_transitions(self, entity: str = "order"):
+        """Allowed (from_status, to_status) pairs for order, shipment or payment."""
+        try:
+            rows = self._fetch_all(LOOKUP_QUERIES["status_transitions"], (entity,))
+            return {"status": "success", "data": [dict(r) for r in rows]}
+        except Exception as e:
+            return error_result(e)
+
+    def _set_status(self, entity: str, table: str, row_id: int, status: str, worker: str = None):
+        # An order leaves any work queue when its status changes, so its lease goes too.
+        lease_reset = ", lease_owner = NULL, lease_expires_at = NULL" if table == "orders" else ""
+
+        def work(conn):
+            row = conn.execute(f"SELECT * FROM {table} WHERE id = ?", (row_id,)).fetchone()
+            if row is None:
+                raise LookupError(f"{entity.capitalize()} {row_id} not found")
+            if worker is not None and (row["lease_owner"] != worker or row["lease_expires_at"] < time.time()):
+                raise PermissionError(f"{entity.capitalize()} {row_id} is not leased to {worker}")
+            try:
+                conn.execute(f"UPDATE {table} SET status = ?{lease_reset} WHERE id = ?", (new_status, row_id))
+            except sqlite3.IntegrityError:
+                raise ValueError(f"Cannot change {entity} {row_id} from {row['status']} to {new_status}") from None
+            return row["status"]
+
+        try:
+            if not isinstance(status, str):
+                raise TypeError(f"status must be a string, not {type(status).__name__}")
+            new_status = status.upper()
+            old_status = self._write_tx(work)
+            return {
+                "status": "success",
+                "message": f"{entity.capitalize()} status updated",
+                "data": {"id": row_id, "from": old_status, "to": new_status},
+            }
+        except Exception as e:
+            return error_result(e)
+
+    def update_order_status(self, order_id: int, status: str, worker: str = None):
+        """
+        Move an order to `status` if status_transitions allows it. A worker
+        finishing a claimed order passes its worker id; the update is then
+        refused unless that worker still holds an unexpired lease.
+        """
+        return self._set_status("order", "orders", order_id, status, worker)
+
+    def update_shipment_status(self, shipment_id: int, status: str):
+        return self._set_status("shipment", "shipments", shipment_id, status)
+
+    def update_payment_status(self, payment_id: int, status: str):
+        return self._set_status("payment", "payments", payment_id, status)
+
+    def claim_next_orders(self, status: str, n: int = 10, worker: str = None, lease_seconds: float = 60.0):
+        """
+        Lease up to n of the oldest orders in `status` to one worker.
+
+        Orders leased to another worker are skipped until their lease
+        expires, so any number of workers (threads or processes) can drain
+        the same queue: the claim is one UPDATE inside BEGIN IMMEDIATE, and
+        no order is handed to two workers at once. Finish an order with
+        update_order_status(..., worker=worker), or hand it back with
+        release_orders. A worker id is generated when none is given.
+        """
+        try:
+            code = order_status_code(status)
+            if not 1 <= n <= MAX_CLAIM_BATCH:
+                raise ValueError(f"n must be between 1 and {MAX_CLAIM_BATCH}")
+            worker = worker or os.urandom(16).hex()
+
+            def claim(conn):
+                now = time.time()
+                expires = now + lease_seconds
+                rows = conn.execute(
+                    f"UPDATE orders SET lease_owner = ?, lease_expires_at = ? "
+                    f"WHERE id IN ({LOOKUP_QUERIES['order_queue']}) RETURNING *",
+                    (worker, expires, code, now, n)
+                ).fetchall()
+                return expires, sorted((dict(r) for r in rows), key=lambda r: r["id"])
+
+            expires, orders = self._write_tx(claim)
+            return {
+                "status": "success",
+                "data": {"worker": worker, "lease_expires_at": expires, "orders": orders},
+            }
+        except Exception as e:
+            return error_result(e)
+
+    def release_orders(self, order_ids, worker: str):
+        """Drop worker's leases on order_ids so other workers can claim them."""
+        try:
+            released = self._write_tx(lambda conn: conn.execute(
+                "UPDATE orders SET lease_owner = NULL, lease_expires_at = NULL "
+                "WHERE id IN (SELECT value FROM json_each(?)) AND lease_owner = ?",
+                (json.dumps(list(order_ids)), worker)
+            ).rowcount)
+            return {"status": "success", "data": {"released": released}}
+        except Exception as e:
+            return error_result(e)
 
     # ---------------- ORDER ITEMS ----------------
     def add_order_item(self, order_id: int, product_id: int, quantity: int, price: float):
         try:
-            self.db.execute(
+            self._write(
                 "INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (?, ?, ?, ?)",
                 (order_id, product_id, quantity, price)
             )
-            self.db.commit()
             return {"status": "success", "message": "Order item added"}
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return error_result(e)
 
     def get_order_items(self, order_id: int):
         try:
-            rows = self.db.execute(
-                "SELECT * FROM order_items WHERE order_id = ?",
+            rows = self._fetch_all(
+                LOOKUP_QUERIES["get_order_items"],
                 (order_id,)
-            ).fetchall()
+            )
             return {"status": "success", "data": [dict(r) for r in rows]}
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return error_result(e)
+
+    def get_order_items_page(self, limit: int = 100, after_id: int = 0, shape: str = "dict"):
+        return self._page("order_items", limit, after_id, shape)
+
+    def iter_order_items(self, chunk_size: int = 1000, shape: str = "dict"):
+        return self._iter_table("order_items", chunk_size, shape)
 
     # ---------------- SHIPMENTS ----------------
     def add_shipment(self, order_id: int, tracking_number: str, status: str):
         try:
-            self.db.execute(
+            self._write(
                 "INSERT INTO shipments (order_id, tracking_number, status) VALUES (?, ?, ?)",
                 (order_id, tracking_number, status)
             )
-            self.db.commit()
             return {"status": "success", "message": "Shipment added"}
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return error_result(e)
 
     def get_shipment(self, shipment_id: int):
         try:
-            row = self.db.execute(
-                "SELECT * FROM shipments WHERE id = ?",
+            row = self._fetch_one(
+                LOOKUP_QUERIES["get_shipment"],
                 (shipment_id,)
-            ).fetchone()
+            )
+            return {"status": "success", "data": row_to_dict(row)}
+        except Exception as e:
+            return error_result(e)
+
+    def get_shipment_by_tracking(self, tracking_number: str):
+        try:
+            row = self._fetch_one(
+                LOOKUP_QUERIES["get_shipment_by_tracking"],
+                (tracking_number,)
+            )
             return {"status": "success", "data": row_to_dict(row)}
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return error_result(e)
 
     def get_shipments_by_order(self, order_id: int):
         try:
-            rows = self.db.execute(
-                "SELECT * FROM shipments WHERE order_id = ?",
+            rows = self._fetch_all(
+                LOOKUP_QUERIES["get_shipments_by_order"],
                 (order_id,)
-            ).fetchall()
+            )
             return {"status": "success", "data": [dict(r) for r in rows]}
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return error_result(e)
 
     # ---------------- PAYMENTS ----------------
     def add_payment(self, order_id: int, amount: float, method: str, status: str):
         try:
-            self.db.execute(
+            self._write(
                 "INSERT INTO payments (order_id, amount, method, status) VALUES (?, ?, ?, ?)",
                 (order_id, amount, method, status)
             )
-            self.db.commit()
             return {"status": "success", "message": "Payment added"}
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return error_result(e)
 
     def get_payment(self, payment_id: int):
         try:
-            row = self.db.execute(
-                "SELECT * FROM payments WHERE id = ?",
+            row = self._fetch_one(
+                LOOKUP_QUERIES["get_payment"],
                 (payment_id,)
-            ).fetchone()
+            )
             return {"status": "success", "data": row_to_dict(row)}
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return error_result(e)
 
     def get_payments_by_order(self, order_id: int):
         try:
-            rows = self.db.execute(
-                "SELECT * FROM payments WHERE order_id = ?",
+            rows = self._fetch_all(
+                LOOKUP_QUERIES["get_payments_by_order"],
                 (order_id,)
-            ).fetchall()
+            )
             return {"status": "success", "data": [dict(r) for r in rows]}
         except Exception as e:
-            return {"status": "error", "message": str(e)}
+            return error_result(e)
+
+    # ---------------- REPORTS ----------------
+    # Date filters are inclusive YYYY-MM-DD strings on the order date; either
+    # may be omitted.
+
+    def _report_params(self, name: str, start: str, end: str):
+        params = date_range(start, end)
+        if name == "payment_mix":
+            params += (json.dumps(sorted(PAID_PAYMENT_STATUSES)),)
+        return params
+
+    def get_revenue_by_day(self, start: str = None, end: str = None, period: str = "day"):
+        """Orders, units and revenue per day, week or month, zero-filled between start and end."""
+        try:
+            params = self._report_params("revenue_by_day", start, end)
+            rows = self._fetch_all(REPORT_QUERIES["revenue_by_day"], params)
+            return {"status": "success", "data": bucket_series([dict(r) for r in rows], period, *params)}
+        except Exception as e:
+            return error_result(e)
+
+    def get_revenue_by_product(self, start: str = None, end: str = None):
+        """Orders, units and revenue per product, ordered by product id."""
+        try:
+            rows = self._fetch_all(
+                REPORT_QUERIES["revenue_by_product"],
+                self._report_params("revenue_by_product", start, end)
+            )
+            return {"status": "success", "data": [dict(r) for r in rows]}
+        except Exception as e:
+            return error_result(e)
+
+    def get_revenue_by_warehouse(self, start: str = None, end: str = None):
+        """Revenue of allocated stock per fulfilling warehouse."""
+        try:
+            rows = self._fetch_all(
+                REPORT_QUERIES["revenue_by_warehouse"],
+                self._report_params("revenue_by_warehouse", start, end)
+            )
+            return {"status": "success", "data": [dict(r) for r in rows]}
+        except Exception as e:
+            return error_result(e)
+
+    def get_top_skus(self, start: str = None, end: str = None, limit: int = 10, by: str = "revenue"):
+        """The `limit` best-selling products by revenue or units."""
+        try:
+            if by not in ("revenue", "units"):
+                raise ValueError("by must be revenue or units")
+            if not 1 <= limit <= MAX_PAGE_SIZE:
+                raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+            rows = self._fetch_all(
+                REPORT_QUERIES[f"top_skus_by_{by}"],
+                self._report_params("top_skus", start, end) + (limit,)
+            )
+            return {"status": "success", "data": [dict(r) for r in rows]}
+        except Exception as e:
+            return error_result(e)
+
+    def get_order_value_stats(self, start: str = None, end: str = None):
+        """Order count, revenue, average order value and units per order."""
+        try:
+            row = self._fetch_one(REPORT_QUERIES["order_value"], self._report_params("order_value", start, end))
+            orders, units, revenue = row["orders"], row["units"] or 0, row["revenue"] or 0.0
+            return {
+                "status": "success",
+                "data": {
+                    "orders": orders,
+                    "units": units,
+                    "revenue": revenue,
+                    "average_order_value": round(revenue / orders, 2) if orders else 0.0,
+                    "average_units_per_order": round(units / orders, 2) if orders else 0.0,
+                },
+            }
+        except Exception as e:
+            return error_result(e)
+
+    def get_payment_mix(self, start: str = None, end: str = None):
+        """Payments per method, with the paid amount and its share of the total."""
+        try:
+            rows = [dict(r) for r in self._fetch_all(
+                REPORT_QUERIES["payment_mix"], self._report_params("payment_mix", start, end)
+            )]
+            total = sum(r["paid_amount"] for r in rows)
+            for r in rows:
+                r["share"] = round(r["paid_amount"] / total, 4) if total else 0.0
+            return {"status": "success", "data": rows}
+        except Exception as e:
+            return error_result(e)
+
+    def iter_report(self, name: str, start: str = None, end: str = None, chunk_size: int = 1000,
+                    shape: str = "dict"):
+        """
+        Yield the rows of a per-day/product/warehouse/method report as lists
+        of at most chunk_size rows in the given shape, without building the
+        whole result in memory. The read transaction stays open until the
+        generator is exhausted or closed.
+        """
+        if name not in STREAMABLE_REPORTS:
+            raise ValueError(f"Unknown report {name!r}; choose from {', '.join(STREAMABLE_REPORTS)}")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be >= 1")
+        check_shape(shape)
+        cursor = self._reader().execute(REPORT_QUERIES[name], self._report_params(name, start, end))
+        try:
+            while True:
+                data = fetch(cursor, shape, chunk_size)
+                if not row_count(data):
+                    return
+                yield data
+        finally:
+            cursor.close()
+
+    def rebuild_rollups(self):
+        """Recompute every rollup table from the base tables in one transaction."""
+        def rebuild(conn):
+            counts = {}
+            for table, (keys, values, query) in ROLLUPS.items():
+                conn.execute(f"DELETE FROM {table}")
+                columns = ", ".join(keys + values)
+                counts[table] = conn.execute(f"INSERT INTO {table} ({columns}) {query}").rowcount
+            return counts
+
+        try:
+            return {"status": "success", "data": self._write_tx(rebuild)}
+        except Exception as e:
+            return error_result(e)
+
+    def check_rollups(self):
+        """
+        Compare every rollup table with a recompute from the base tables and
+        report the rows that differ (amounts to the cent). Rows whose totals
+        have dropped to zero count as matching a missing row.
+        """
+        try:
+            conn = self._reader()
+            report = {}
+            for table, (keys, values, query) in ROLLUPS.items():
+                width = len(keys)
+
+                def normalize(row):
+                    return tuple(round(v or 0, 2) for v in row[width:])
+
+                expected = {tuple(row[:width]): normalize(row) for row in conn.execute(query)}
+                zero = (0,) * len(values)
+                drift = []
+                for row in conn.execute(f"SELECT {', '.join(keys + values)} FROM {table}"):
+                    key, got = tuple(row[:width]), normalize(row)
+                    want = expected.pop(key, zero)
+                    if got != want:
+                        drift.append({"key": list(key), "stored": list(got), "expected": list(want)})
+                for key, want in expected.items():
+                    drift.append({"key": list(key), "stored": None, "expected": list(want)})
+                report[table] = drift
+            return {
+                "status": "success",
+                "data": {"drifted": sum(len(d) for d in report.values()), "tables": report},
+            }
+        except Exception as e:
+            return error_result(e)
+
+    # ---------------- BULK ----------------
+    def _bulk_insert(self, table: str, columns: tuple, rows, chunk_size: int):
+        """
+        Insert many rows with one executemany and one commit per chunk.
+
+        If a chunk hits a constraint error the chunk is replayed row by row
+        inside the same transaction, so a single bad row only fails itself.
+        """
+        sql = (
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})"
+        )
+        results = []
+        try:
+            if chunk_size < 1:
+                raise ValueError("chunk_size must be >= 1")
+
+            for chunk in chunked(rows, chunk_size):
+                batch = []
+                for index, row in chunk:
+                    try:
+                        batch.append((index, row_params(row, columns)))
+                    except (KeyError, TypeError, ValueError) as e:
+                        results.append({"index": index, "status": "error", "code": "invalid",
+                                        "message": f"Invalid row: {e}"})
+
+                results.extend(self._write_tx(lambda conn: self._insert_chunk(conn, sql, batch)))
+
+            results.sort(key=lambda r: r["index"])
+            failed = sum(1 for r in results if r["status"] == "error")
+            return {
+                "status": "success",
+                "inserted": len(results) - failed,
+                "failed": failed,
+                "results": results,
+            }
+        except Exception as e:
+            return error_result(e)
+
+    @staticmethod
+    def _insert_chunk(conn: sqlite3.Connection, sql: str, batch):
+        conn.execute("SAVEPOINT bulk_insert")
+        try:
+            conn.executemany(sql, [params for _, params in batch])
+            results = [{"index": index, "status": "success"} for index, _ in batch]
+        except sqlite3.Error:
+            # A constraint violation or a value that cannot be bound (e.g. a
+            # nested list) fails only its own row.
+            conn.execute("ROLLBACK TO bulk_insert")
+            results = []
+            for index, params in batch:
+                try:
+                    conn.execute(sql, params)
+                    results.append({"index": index, "status": "success"})
+                except (sqlite3.InterfaceError, sqlite3.ProgrammingError) as e:
+                    results.append({"index": index, "status": "error", "code": "invalid",
+                                    "message": f"Invalid row: {e}"})
+                except sqlite3.Error as e:
+                    results.append({"index": index, **error_result(e)})
+        conn.execute("RELEASE bulk_insert")
+        return results
+
+    def add_products_bulk(self, products, chunk_size: int = 500):
+        """products: iterable of dicts with sku, name, price, description (or tuples in that order)."""
+        return self._bulk_insert("products", ("sku", "name", "price", "description"), products, chunk_size)
+
+    def add_warehouses_bulk(self, warehouses, chunk_size: int = 500):
+        """warehouses: iterable of dicts with name, location."""
+        return self._bulk_insert("warehouses", ("name", "location"), warehouses, chunk_size)
+
+    def add_inventory_bulk(self, inventory, chunk_size: int = 500):
+        """inventory: iterable of dicts with product_id, warehouse_id, quantity."""
+        return self._bulk_insert("inventory", ("product_id", "warehouse_id", "quantity"), inventory, chunk_size)
+
+    def add_orders_bulk(self, orders, chunk_size: int = 500):
+        """orders: iterable of dicts with order_number, status."""
+        return self._bulk_insert("orders", ("order_number", "status"), orders, chunk_size)
+
+    def add_order_items_bulk(self, items, chunk_size: int = 500):
+        """items: iterable of dicts with order_id, product_id, quantity, price."""
+        return self._bulk_insert("order_items", ("order_id", "product_id", "quantity", "price"), items, chunk_size)
+
+    def add_shipments_bulk(self, shipments, chunk_size: int = 500):
+        """shipments: iterable of dicts with order_id, tracking_number, status."""
+        return self._bulk_insert("shipments", ("order_id", "tracking_number", "status"), shipments, chunk_size)
 
+    def add_payments_bulk(self, payments, chunk_size: int = 500):
+        """payments: iterable of dicts with order_id, amount, method, status."""
+        return self._bulk_insert("payments", ("order_id", "amount", "method", "status"), payments, chunk_size)
@@ -0,0 +1,49 @@
+# server.py
+"""
+Multi-process MCP serving over HTTP.
+
+    python main.py --serve --port 8000 --processes 8
+
+uvicorn starts the worker processes and each one calls create_app(), which
+opens its own ConnectionPool on the shared WAL-mode database: per-thread
+read connections, so reads never wait on other processes, and one writer
+connection. Writes inside a process are funnelled through that writer;
+across processes SQLite's write lock serialises them, taken with
+BEGIN IMMEDIATE and retried with backoff while another process holds it
+(database.db.WritePolicy). Pending migrations run once in the parent
+before any worker starts.
+"""
+import atexit
+import logging
+import os
+
+# Worker processes are started by uvicorn with no arguments; the parent
+# passes the database path through the environment.
+DB_PATH_ENV = "OMS_DB_PATH"
+DEFAULT_DB_PATH = "database/oms.db"
+
+
+def create_app():
+    """uvicorn app factory: the MCP HTTP app for one worker process."""
+    from database.db import ConnectionPool
+    from .tools import MCPTools
+
+    pool = ConnectionPool(os.environ.get(DB_PATH_ENV, DEFAULT_DB_PATH))
+    atexit.register(pool.close)
+    tools = MCPTools(pool)
+    logging.info(f"Worker {os.getpid()} serving {pool.db_path}")
+    return tools.mcp.http_app()
+
+
+def serve(db_path: str = DEFAULT_DB_PATH, processes: int = 1, host: str = "127.0.0.1", port: int = 8000):
+    """Migrate the database, then serve MCP over HTTP from `processes` worker processes."""
+    import uvicorn
+    from database.db import close_db, init_db
+
+    conn = init_db(db_path)
+    if conn is None:
+        raise RuntimeError(f"Could not open database {db_path}")
+    close_db(conn)
+
+    os.environ[DB_PATH_ENV] = db_path
+    uvicorn.run("handler.server:create_app", factory=True, host=host, port=port, workers=processes)
@@ -1,9 +1,21 @@
+import os
 import sqlite3
 import logging
+from typing import Union
 from fastmcp import FastMCP
+from database.db import ConnectionPool
 from .schema import db_tools
+from .async_schema import AsyncDbTools
+from .metrics import METRICS_PATH_ENV
+from .rows import wire
 
-mcp = FastMCP("Order management system")
+SERVER_NAME = "Order management system"
+
+
+def tool(fn):
+    """Mark an MCPTools method as an MCP tool; each instance registers its bound methods."""
+    fn.is_mcp_tool = True
+    return fn
 
 
 class MCPTools:
@@ -14,29 +26,48 @@ class MCPTools:
     - Accepts primitive arguments only (int, str, float)
     - Returns JSON-serializable dicts
     - Is safe for agent consumption
+    - Is async: queries run on a bounded thread pool, so one slow query
+      does not block other tool calls
+    - Reports failures as {"status": "error", "code", "message"}, where code
+      is one of busy, overloaded, constraint, not_found, forbidden, invalid
+      or internal; busy and overloaded are worth retrying later
     """
 
-    def __init__(self, db_instance: sqlite3.Connection):
+    def __init__(self, db_instance: Union[sqlite3.Connection, ConnectionPool],
+                 max_workers: int = 8, max_concurrency: int = 64, metrics_path: str = None):
         """
         Initialize MCP tools with an active database connection.
 
         Args:
-            db_instance (sqlite3.Connection): Open SQLite connection
+            db_instance (sqlite3.Connection | ConnectionPool): Open SQLite
+                connection, or a pool giving each worker thread its own reader
+            max_workers (int): Threads running database calls
+            max_concurrency (int): Tool calls allowed in flight at once
+            metrics_path (str): File the dump_metrics tool writes; defaults
+                to $OMS_METRICS_PATH, and the tool is disabled without either
         """
         logging.info("Initializing database tools ...")
+        self.metrics_path = metrics_path or os.environ.get(METRICS_PATH_ENV)
         self.db = db_tools(db_instance=db_instance)
+        self.adb = AsyncDbTools(self.db, max_workers=max_workers, max_concurrency=max_concurrency)
+        # Tools are registered as bound methods on a server of this instance's
+        # own, so every call runs against this instance's connection or pool.
+        self.mcp = FastMCP(SERVER_NAME)
+        for name in dir(type(self)):
+            if getattr(getattr(type(self), name), "is_mcp_tool", False):
+                self.mcp.add_tool(getattr(self, name))
 
     def start_mcp(self):
         """
         Starts the MCP server and exposes all tools to agents.
         """
         logging.info("Starting mcp server...")
-        mcp.run()
+        self.mcp.run()
 
     # -------------------- ADD TOOLS --------------------
 
-    @mcp.tool()
-    def add_product(self, product_sku: str, product_name: str, price: float, desc: str):
+    @tool
+    async def add_product(self, product_sku: str, product_name: str, price: float, desc: str):
         """
         Add a new product to the system.
 
@@ -51,10 +82,10 @@ class MCPTools:
                 status (str): "success" or "error"
                 message (str): Result message
         """
-        return self.db.add_product(product_sku, product_name, price, desc)
+        return await self.adb.add_product(product_sku, product_name, price, desc)
 
-    @mcp.tool()
-    def add_warehouse(self, warehouse_name: str, warehouse_location: str):
+    @tool
+    async def add_warehouse(self, warehouse_name: str, warehouse_location: str):
         """
         Add a warehouse.
 
@@ -67,10 +98,10 @@ class MCPTools:
                 status (str)
                 message (str)
         """
-        return self.db.add_warehouse(warehouse_name, warehouse_location)
+        return await self.adb.add_warehouse(warehouse_name, warehouse_location)
 
-    @mcp.tool()
-    def add_inventory(self, product_id: int, warehouse_id: int, quantity: int):
+    @tool
+    async def add_inventory(self, product_id: int, warehouse_id: int, quantity: int):
         """
         Add inventory quantity for a product in a warehouse.
 
@@ -84,10 +115,44 @@ class MCPTools:
                 status (str)
                 message (str)
         """
-        return self.db.add_inventory(product_id, warehouse_id, quantity)
+        return await self.adb.add_inventory(product_id, warehouse_id, quantity)
+
+    @tool
+    async def update_inventory(self, product_id: int, warehouse_id: int, quantity: int = None, reserved: int = None):
+        """
+        Update on-hand and/or reserved quantity of an inventory row.
+
+        Args:
+            product_id (int): Product ID
+            warehouse_id (int): Warehouse ID
+            quantity (int): New on-hand quantity (omit to keep)
+            reserved (int): New reserved quantity (omit to keep)
+
+        Returns:
+            dict:
+                status (str)
+                message (str)
+        """
+        return await self.adb.update_inventory(product_id, warehouse_id, quantity, reserved)
 
-    @mcp.tool()
-    def add_order(self, order_number: str, status: str):
+    @tool
+    async def set_reorder_level(self, product_id: int, reorder_level: int):
+        """
+        Set the level below which a product counts as low on stock.
+
+        Args:
+            product_id (int): Product ID
+            reorder_level (int): Reorder threshold in units
+
+        Returns:
+            dict:
+                status (str)
+                message (str)
+        """
+        return await self.adb.set_reorder_level(product_id, reorder_level)
+
+    @tool
+    async def add_order(self, order_number: str, status: str):
         """
         Create a new order.
 
@@ -100,10 +165,10 @@ class MCPTools:
                 status (str)
                 message (str)
         """
-        return self.db.add_order(order_number, status)
+        return await self.adb.add_order(order_number, status)
 
-    @mcp.tool()
-    def add_order_item(self, order_id: int, product_id: int, quantity: int, price: float):
+    @tool
+    async def add_order_item(self, order_id: int, product_id: int, quantity: int, price: float):
         """
         Add an item to an order.
 
@@ -118,10 +183,10 @@ class MCPTools:
                 status (str)
                 message (str)
         """
-        return self.db.add_order_item(order_id, product_id, quantity, price)
+        return await self.adb.add_order_item(order_id, product_id, quantity, price)
 
-    @mcp.tool()
-    def add_shipment(self, order_id: int, tracking_number: str, status: str):
+    @tool
+    async def add_shipment(self, order_id: int, tracking_number: str, status: str):
         """
         Add shipment details for an order.
 
@@ -135,10 +200,10 @@ class MCPTools:
                 status (str)
                 message (str)
         """
-        return self.db.add_shipment(order_id, tracking_number, status)
+        return await self.adb.add_shipment(order_id, tracking_number, status)
 
-    @mcp.tool()
-    def add_payment(self, order_id: int, amount: float, method: str, status: str):
+    @tool
+    async def add_payment(self, order_id: int, amount: float, method: str, status: str):
         """
         Record a payment for an order.
 
@@ -153,27 +218,96 @@ class MCPTools:
                 status (str)
                 message (str)
         """
-        return self.db.add_payment(order_id, amount, method, status)
+        return await self.adb.add_payment(order_id, amount, method, status)
+
+    @tool
+    async def place_order(self, order_number: str, status: str, items: list[dict]):
+        """
+        Create an order with its items and reserve stock atomically.
+
+        Stock is taken from the warehouses holding the most units first. If
+        any item is short on stock the whole order is rejected.
+
+        Args:
+            order_number (str): Unique order identifier
+            status (str): Order status (e.g., CREATED, PAID)
+            items (list[dict]): Rows with product_id, quantity, price
+
+        Returns:
+            dict:
+                status (str)
+                message (str)
+                data (dict): order_id and per-warehouse allocations
+        """
+        return await self.adb.place_order(order_number, status, items)
 
     # -------------------- GET TOOLS --------------------
 
-    @mcp.tool()
-    def get_product(self, product_id: int):
+    @tool
+    async def get_product(self, product_id: int, use_cache: bool = True):
         """
         Fetch product details by product ID.
 
         Args:
             product_id (int): Product ID
+            use_cache (bool): Set to false to bypass the product cache
 
         Returns:
             dict:
                 status (str)
                 data (dict | null): Product details
         """
-        return self.db.get_product(product_id)
+        return await self.adb.get_product(product_id, use_cache)
+
+    @tool
+    async def get_product_by_sku(self, sku: str):
+        """
+        Fetch product details by SKU.
+
+        Args:
+            sku (str): Product SKU (case-sensitive)
+
+        Returns:
+            dict:
+                status (str)
+                data (dict | null): Product details
+        """
+        return await self.adb.get_product_by_sku(sku)
+
+    @tool
+    async def get_products_by_skus(self, skus: list[str]):
+        """
+        Fetch many products by SKU in one call.
+
+        Args:
+            skus (list[str]): Product SKUs
+
+        Returns:
+            dict:
+                status (str)
+                data (list[dict]): Products, in request order
+                missing (list[str]): Requested SKUs that do not exist
+        """
+        return await self.adb.get_products_by_skus(skus)
+
+    @tool
+    async def resolve_skus(self, skus: list[str]):
+        """
+        Map SKUs to product IDs in one call, e.g. before a bulk import.
+
+        Args:
+            skus (list[str]): Product SKUs
+
+        Returns:
+            dict:
+                status (str)
+                data (dict): SKU -> product ID
+                missing (list[str]): Requested SKUs that do not exist
+        """
+        return await self.adb.resolve_skus(skus)
 
-    @mcp.tool()
-    def get_all_products(self):
+    @tool
+    async def get_all_products(self):
         """
         Fetch all products.
 
@@ -182,25 +316,86 @@ class MCPTools:
                 status (str)
                 data (list[dict]): List of products
         """
-        return self.db.get_all_products()
+        return await self.adb.get_all_products()
 
-    @mcp.tool()
-    def get_warehouse(self, warehouse_id: int):
+    @tool
+    async def get_products_page(self, limit: int = 100, after_id: int = 0, shape: str = "dict"):
+        """
+        Fetch one page of products ordered by ID.
+
+        Args:
+            limit (int): Page size, at most 1000
+            after_id (int): Return products with ID greater than this;
+                pass the previous page's next_after_id to continue
+            shape (str): "dict" (default), "record" for
+                {"columns": [...], "rows": [[...], ...]}, or "columns" for
+                {column: [values, ...]}; the last two skip repeating keys
+
+        Returns:
+            dict:
+                status (str)
+                data (list[dict] | dict): Products on this page, in the requested shape
+                next_after_id (int | null): Cursor for the next page, null on the last page
+        """
+        return wire(await self.adb.get_products_page(limit, after_id, shape), shape)
+
+    @tool
+    async def search_products(self, query: str, limit: int = 20, offset: int = 0):
+        """
+        Search products by words in their name, SKU or description.
+
+        Every word must match; the last one may be partial. Results are
+        ranked with name matches first.
+
+        Args:
+            query (str): Free text, e.g. "wireless mouse"
+            limit (int): Page size, at most 1000
+            offset (int): Results to skip; pass the previous page's next_offset
+
+        Returns:
+            dict:
+                status (str)
+                data (list[dict]): Matching products with a score (lower is better)
+                next_offset (int | null): Offset of the next page, null on the last page
+        """
+        return await self.adb.search_products(query, limit, offset)
+
+    @tool
+    async def get_products_by_sku_prefix(self, prefix: str, limit: int = 100, after_sku: str = ""):
+        """
+        Fetch products whose SKU starts with a prefix, in SKU order.
+
+        Args:
+            prefix (str): SKU prefix (case-sensitive)
+            limit (int): Page size, at most 1000
+            after_sku (str): Pass the previous page's next_after_sku to continue
+
+        Returns:
+            dict:
+                status (str)
+                data (list[dict]): Matching products
+                next_after_sku (str | null): Cursor for the next page, null on the last page
+        """
+        return await self.adb.get_products_by_sku_prefix(prefix, limit, after_sku)
+
+    @tool
+    async def get_warehouse(self, warehouse_id: int, use_cache: bool = True):
         """
         Fetch warehouse details.
 
         Args:
             warehouse_id (int): Warehouse ID
+            use_cache (bool): Set to false to bypass the warehouse cache
 
         Returns:
             dict:
                 status (str)
                 data (dict | null)
         """
-        return self.db.get_warehouse(warehouse_id)
+        return await self.adb.get_warehouse(warehouse_id, use_cache)
 
-    @mcp.tool()
-    def get_all_warehouses(self):
+    @tool
+    async def get_all_warehouses(self):
         """
         Fetch all warehouses.
 
@@ -209,10 +404,30 @@ class MCPTools:
                 status (str)
                 data (list[dict])
         """
-        return self.db.get_all_warehouses()
+        return await self.adb.get_all_warehouses()
+
+    @tool
+    async def get_warehouses_page(self, limit: int = 100, after_id: int = 0, shape: str = "dict"):
+        """
+        Fetch one page of warehouses ordered by ID.
+
+        Args:
+            limit (int): Page size, at most 1000
+            after_id (int): Return warehouses with ID greater than this
+            shape (str): "dict" (default), "record" for
+                {"columns": [...], "rows": [[...], ...]}, or "columns" for
+                {column: [values, ...]}; the last two skip repeating keys
+
+        Returns:
+            dict:
+                status (str)
+                data (list[dict] | dict)
+                next_after_id (int | null)
+        """
+        return wire(await self.adb.get_warehouses_page(limit, after_id, shape), shape)
 
-    @mcp.tool()
-    def get_inventory(self, product_id: int, warehouse_id: int):
+    @tool
+    async def get_inventory(self, product_id: int, warehouse_id: int):
         """
         Fetch inventory for a product in a warehouse.
 
@@ -225,10 +440,10 @@ class MCPTools:
                 status (str)
                 data (dict | null)
         """
-        return self.db.get_inventory(product_id, warehouse_id)
+        return await self.adb.get_inventory(product_id, warehouse_id)
 
-    @mcp.tool()
-    def get_inventory_by_product(self, product_id: int):
+    @tool
+    async def get_inventory_by_product(self, product_id: int):
         """
         Fetch inventory across warehouses for a product.
 
@@ -240,10 +455,58 @@ class MCPTools:
                 status (str)
                 data (list[dict])
         """
-        return self.db.get_inventory_by_product(product_id)
+        return await self.adb.get_inventory_by_product(product_id)
 
-    @mcp.tool()
-    def get_order(self, order_id: int):
+    @tool
+    async def get_stock_level(self, product_id: int):
+        """
+        Fetch total stock for a product across all warehouses.
+
+        Args:
+            product_id (int)
+
+        Returns:
+            dict:
+                status (str)
+                data (dict | null): on_hand, reserved, available, reorder_level
+        """
+        return await self.adb.get_stock_level(product_id)
+
+    @tool
+    async def get_low_stock(self, limit: int = 100, after_id: int = 0):
+        """
+        Fetch products whose available stock is below their reorder level.
+
+        Args:
+            limit (int): Page size, at most 1000
+            after_id (int): Continue after this product ID
+
+        Returns:
+            dict:
+                status (str)
+                data (list[dict]): product_id, sku, name, on_hand, reserved,
+                    available, reorder_level
+                next_after_id (int | null)
+        """
+        return await self.adb.get_low_stock(limit, after_id)
+
+    @tool
+    async def check_stock_levels(self, repair: bool = False):
+        """
+        Compare the stock summary with inventory and report drift.
+
+        Args:
+            repair (bool): Rewrite drifted summary rows
+
+        Returns:
+            dict:
+                status (str)
+                data (dict): drifted (int), repaired (bool), rows (list[dict])
+        """
+        return await self.adb.check_stock_levels(repair)
+
+    @tool
+    async def get_order(self, order_id: int):
         """
         Fetch order by ID.
 
@@ -255,10 +518,10 @@ class MCPTools:
                 status (str)
                 data (dict | null)
         """
-        return self.db.get_order(order_id)
+        return await self.adb.get_order(order_id)
 
-    @mcp.tool()
-    def get_order_by_number(self, order_number: str):
+    @tool
+    async def get_order_by_number(self, order_number: str):
         """
         Fetch order using order number.
 
@@ -270,10 +533,45 @@ class MCPTools:
                 status (str)
                 data (dict | null)
         """
-        return self.db.get_order_by_number(order_number)
+        return await self.adb.get_order_by_number(order_number)
 
-    @mcp.tool()
-    def get_order_items(self, order_id: int):
+    @tool
+    async def get_order_details(self, order_id: int = None, order_number: str = None):
+        """
+        Fetch an order with everything needed to display it in one call.
+
+        Args:
+            order_id (int): Order ID (or pass order_number)
+            order_number (str): Order number
+
+        Returns:
+            dict:
+                status (str)
+                data (dict | null): Order fields plus items (with product_name
+                    and product_sku), shipments, payments and totals
+                    (item_count, units, items_total, paid, outstanding)
+        """
+        return await self.adb.get_order_details(order_id, order_number)
+
+    @tool
+    async def get_orders_details(self, order_ids: list[int] = None, order_numbers: list[str] = None):
+        """
+        Fetch details for many orders at once.
+
+        Args:
+            order_ids (list[int]): Order IDs (or pass order_numbers)
+            order_numbers (list[str]): Order numbers
+
+        Returns:
+            dict:
+                status (str)
+                data (list[dict]): Same shape as get_order_details, in request order
+                missing (list): Requested IDs/numbers that do not exist
+        """
+        return await self.adb.get_orders_details(order_ids, order_numbers)
+
+    @tool
+    async def get_order_items(self, order_id: int):
         """
         Fetch all items belonging to an order.
 
@@ -285,10 +583,31 @@ class MCPTools:
                 status (str)
                 data (list[dict])
         """
-        return self.db.get_order_items(order_id)
+        return await self.adb.get_order_items(order_id)
 
-    @mcp.tool()
-    def get_shipment(self, shipment_id: int):
+    @tool
+    async def get_order_items_page(self, limit: int = 100, after_id: int = 0, shape: str = "dict"):
+        """
+        Fetch one page of order items across all orders, ordered by ID.
+
+        Args:
+            limit (int): Page size, at most 1000
+            after_id (int): Return items with ID greater than this;
+                pass the previous page's next_after_id to continue
+            shape (str): "dict" (default), "record" for
+                {"columns": [...], "rows": [[...], ...]}, or "columns" for
+                {column: [values, ...]}; the last two skip repeating keys
+
+        Returns:
+            dict:
+                status (str)
+                data (list[dict] | dict): Order items in the requested shape
+                next_after_id (int | null): Cursor for the next page, null on the last page
+        """
+        return wire(await self.adb.get_order_items_page(limit, after_id, shape), shape)
+
+    @tool
+    async def get_shipment(self, shipment_id: int):
         """
         Fetch shipment details.
 
@@ -300,10 +619,26 @@ class MCPTools:
                 status (str)
                 data (dict | null)
         """
-        return self.db.get_shipment(shipment_id)
+        return await self.adb.get_shipment(shipment_id)
 
-    @mcp.tool()
-    def get_shipments_by_order(self, order_id: int):
+    @tool
+    async def get_shipment_by_tracking(self, tracking_number: str):
+        """
+        Fetch shipment details by courier tracking number.
+
+        Args:
+            tracking_number (str): Courier tracking number; if it was reused,
+                the most recent shipment is returned
+
+        Returns:
+            dict:
+                status (str)
+                data (dict | null)
+        """
+        return await self.adb.get_shipment_by_tracking(tracking_number)
+
+    @tool
+    async def get_shipments_by_order(self, order_id: int):
         """
         Fetch all shipments for an order.
 
@@ -315,10 +650,10 @@ class MCPTools:
                 status (str)
                 data (list[dict])
         """
-        return self.db.get_shipments_by_order(order_id)
+        return await self.adb.get_shipments_by_order(order_id)
 
-    @mcp.tool()
-    def get_payment(self, payment_id: int):
+    @tool
+    async def get_payment(self, payment_id: int):
         """
         Fetch payment details.
 
@@ -330,10 +665,10 @@ class MCPTools:
                 status (str)
                 data (dict | null)
         """
-        return self.db.get_payment(payment_id)
+        return await self.adb.get_payment(payment_id)
 
-    @mcp.tool()
-    def get_payments_by_order(self, order_id: int):
+    @tool
+    async def get_payments_by_order(self, order_id: int):
         """
         Fetch all payments for an order.
 
@@ -345,5 +680,469 @@ class MCPTools:
                 status (str)
                 data (list[dict])
         """
-        return self.db.get_payments_by_order(order_id)
+        return await self.adb.get_payments_by_order(order_id)
+
+    @tool
+    async def get_metrics(self):
+        """
+        Fetch call metrics for every tool and SQL statement.
+
+        Returns:
+            dict:
+                status (str)
+                data (dict):
+                    tools / statements: calls, errors, rows and
+                        mean/p50/p95/p99 latency in ms per name
+                    writes: write queue counters (null without a pool)
+                    cache: product and warehouse cache counters
+        """
+        return await self.adb.get_metrics()
+
+    @tool
+    async def dump_metrics(self):
+        """
+        Write the metrics in Prometheus text format to the server's metrics
+        file (e.g. for node_exporter's textfile collector). The file is set
+        by the server operator, not by the caller.
+
+        Returns:
+            dict:
+                status (str)
+                message (str)
+        """
+        if not self.metrics_path:
+            return {"status": "error", "code": "forbidden",
+                    "message": f"Metrics file not configured; set {METRICS_PATH_ENV}"}
+        return await self.adb.dump_metrics(self.metrics_path)
+
+    @tool
+    async def get_write_stats(self):
+        """
+        Fetch write contention and queue counters.
+
+        Returns:
+            dict:
+                status (str)
+                data (dict): writes admitted and rejected, busy retries and
+                    failures, writes in flight and the limit; with a pool
+                    also writes, commits, avg/last/max commit batch size,
+                    queued writes and whether group commit is enabled
+        """
+        return await self.adb.get_write_stats()
+
+    @tool
+    async def get_cache_stats(self):
+        """
+        Fetch product and warehouse cache counters.
 
+        Returns:
+            dict:
+                status (str)
+                data (dict | null): size, hits, misses, evictions,
+                    expirations and invalidations per cache
+        """
+        return await self.adb.get_cache_stats()
+
+    # -------------------- BULK TOOLS --------------------
+
+    @tool
+    async def add_products_bulk(self, products: list[dict], chunk_size: int = 500):
+        """
+        Add many products in one call.
+
+        Args:
+            products (list[dict]): Rows with sku, name, price, description
+            chunk_size (int): Rows written per transaction
+
+        Returns:
+            dict:
+                status (str)
+                inserted (int): Rows written
+                failed (int): Rows rejected
+                results (list[dict]): Per-row index, status and error message
+        """
+        return await self.adb.add_products_bulk(products, chunk_size)
+
+    @tool
+    async def add_warehouses_bulk(self, warehouses: list[dict], chunk_size: int = 500):
+        """
+        Add many warehouses in one call.
+
+        Args:
+            warehouses (list[dict]): Rows with name, location
+            chunk_size (int): Rows written per transaction
+
+        Returns:
+            dict:
+                status (str)
+                inserted (int)
+                failed (int)
+                results (list[dict])
+        """
+        return await self.adb.add_warehouses_bulk(warehouses, chunk_size)
+
+    @tool
+    async def add_inventory_bulk(self, inventory: list[dict], chunk_size: int = 500):
+        """
+        Add many inventory rows in one call.
+
+        Args:
+            inventory (list[dict]): Rows with product_id, warehouse_id, quantity
+            chunk_size (int): Rows written per transaction
+
+        Returns:
+            dict:
+                status (str)
+                inserted (int)
+                failed (int)
+                results (list[dict])
+        """
+        return await self.adb.add_inventory_bulk(inventory, chunk_size)
+
+    @tool
+    async def add_orders_bulk(self, orders: list[dict], chunk_size: int = 500):
+        """
+        Create many orders in one call.
+
+        Args:
+            orders (list[dict]): Rows with order_number, status
+            chunk_size (int): Rows written per transaction
+
+        Returns:
+            dict:
+                status (str)
+                inserted (int)
+                failed (int)
+                results (list[dict])
+        """
+        return await self.adb.add_orders_bulk(orders, chunk_size)
+
+    @tool
+    async def add_order_items_bulk(self, items: list[dict], chunk_size: int = 500):
+        """
+        Add many order items in one call.
+
+        Args:
+            items (list[dict]): Rows with order_id, product_id, quantity, price
+            chunk_size (int): Rows written per transaction
+
+        Returns:
+            dict:
+                status (str)
+                inserted (int)
+                failed (int)
+                results (list[dict])
+        """
+        return await self.adb.add_order_items_bulk(items, chunk_size)
+
+    @tool
+    async def add_shipments_bulk(self, shipments: list[dict], chunk_size: int = 500):
+        """
+        Add many shipments in one call.
+
+        Args:
+            shipments (list[dict]): Rows with order_id, tracking_number, status
+            chunk_size (int): Rows written per transaction
+
+        Returns:
+            dict:
+                status (str)
+                inserted (int)
+                failed (int)
+                results (list[dict])
+        """
+        return await self.adb.add_shipments_bulk(shipments, chunk_size)
+
+    @tool
+    async def add_payments_bulk(self, payments: list[dict], chunk_size: int = 500):
+        """
+        Record many payments in one call.
+
+        Args:
+            payments (list[dict]): Rows with order_id, amount, method, status
+            chunk_size (int): Rows written per transaction
+
+        Returns:
+            dict:
+                status (str)
+                inserted (int)
+                failed (int)
+                results (list[dict])
+        """
+        return await self.adb.add_payments_bulk(payments, chunk_size)
+
+    # -------------------- ALLOCATION TOOLS --------------------
+
+    @tool
+    async def allocate_orders(self, order_ids: list[int] = None, status: str = "CREATED", limit: int = 1000,
+                              location_costs: dict[str, float] = None):
+        """
+        Plan which warehouses fulfil unallocated orders, without writing anything.
+
+        Each order is split across as few warehouses as possible; orders are
+        planned oldest first against the stock left by the ones before them.
+
+        Args:
+            order_ids (list[int]): Orders to plan (default: oldest orders in
+                status); ones not CREATED or PAID are skipped
+            status (str): Status of the orders to pick up when order_ids is omitted
+            limit (int): Maximum number of orders to pick up
+            location_costs (dict[str, float]): Extra cost per shipment by warehouse location
+
+        Returns:
+            dict:
+                status (str)
+                data (dict): orders with their per-warehouse shipments,
+                    unallocated orders with their shortfall, skipped order IDs
+                    and the total shipment count
+        """
+        return await self.adb.allocate_orders(order_ids, status, limit, location_costs, False)
+
+    @tool
+    async def commit_allocations(self, order_ids: list[int] = None, status: str = "CREATED", limit: int = 1000,
+                                 location_costs: dict[str, float] = None):
+        """
+        Allocate unallocated orders to warehouses and take the stock out of inventory.
+
+        Same arguments and result as allocate_orders, but the plan is computed
+        and applied in one transaction.
+
+        Args:
+            order_ids (list[int]): Orders to allocate (default: oldest orders in
+                status); ones not CREATED or PAID are skipped
+            status (str): Status of the orders to pick up when order_ids is omitted
+            limit (int): Maximum number of orders to pick up
+            location_costs (dict[str, float]): Extra cost per shipment by warehouse location
+
+        Returns:
+            dict:
+                status (str)
+                data (dict): Same as allocate_orders
+        """
+        return await self.adb.allocate_orders(order_ids, status, limit, location_costs, True)
+
+    @tool
+    async def get_allocations(self, order_id: int):
+        """
+        Fetch the warehouse allocations recorded for an order.
+
+        Args:
+            order_id (int)
+
+        Returns:
+            dict:
+                status (str)
+                data (list[dict]): product_id, warehouse_id, quantity per row
+        """
+        return await self.adb.get_allocations(order_id)
+
+    # -------------------- REPORT TOOLS --------------------
+
+    @tool
+    async def get_revenue_by_day(self, start: str = None, end: str = None, period: str = "day"):
+        """
+        Revenue time series, one row per day, week (from Monday) or month.
+
+        Args:
+            start (str): First order date included, YYYY-MM-DD (default: no limit)
+            end (str): Last order date included, YYYY-MM-DD (default: no limit)
+            period (str): day, week or month
+
+        Returns:
+            dict:
+                status (str)
+                data (list[dict]): period_start, orders, units, revenue;
+                    periods without orders are included with zeros
+        """
+        return await self.adb.get_revenue_by_day(start, end, period)
+
+    @tool
+    async def get_revenue_by_product(self, start: str = None, end: str = None):
+        """
+        Orders, units and revenue per product.
+
+        Args:
+            start (str): First order date included, YYYY-MM-DD
+            end (str): Last order date included, YYYY-MM-DD
+
+        Returns:
+            dict:
+                status (str)
+                data (list[dict]): product_id, sku, name, orders, units, revenue
+        """
+        return await self.adb.get_revenue_by_product(start, end)
+
+    @tool
+    async def get_revenue_by_warehouse(self, start: str = None, end: str = None):
+        """
+        Revenue of allocated stock per fulfilling warehouse.
+
+        Args:
+            start (str): First order date included, YYYY-MM-DD
+            end (str): Last order date included, YYYY-MM-DD
+
+        Returns:
+            dict:
+                status (str)
+                data (list[dict]): warehouse_id, name, location, orders, units, revenue
+        """
+        return await self.adb.get_revenue_by_warehouse(start, end)
+
+    @tool
+    async def get_top_skus(self, start: str = None, end: str = None, limit: int = 10, by: str = "revenue"):
+        """
+        Best-selling products.
+
+        Args:
+            start (str): First order date included, YYYY-MM-DD
+            end (str): Last order date included, YYYY-MM-DD
+            limit (int): Number of products (max 1000)
+            by (str): Rank by revenue or units
+
+        Returns:
+            dict:
+                status (str)
+                data (list[dict]): product_id, sku, name, units, revenue
+        """
+        return await self.adb.get_top_skus(start, end, limit, by)
+
+    @tool
+    async def get_order_value_stats(self, start: str = None, end: str = None):
+        """
+        Order count, revenue and average order value.
+
+        Args:
+            start (str): First order date included, YYYY-MM-DD
+            end (str): Last order date included, YYYY-MM-DD
+
+        Returns:
+            dict:
+                status (str)
+                data (dict): orders, units, revenue, average_order_value,
+                    average_units_per_order
+        """
+        return await self.adb.get_order_value_stats(start, end)
+
+    @tool
+    async def get_payment_mix(self, start: str = None, end: str = None):
+        """
+        Payments per method.
+
+        Args:
+            start (str): First order date included, YYYY-MM-DD
+            end (str): Last order date included, YYYY-MM-DD
+
+        Returns:
+            dict:
+                status (str)
+                data (list[dict]): method, payments, paid_payments,
+                    paid_amount and share of the total paid amount
+        """
+        return await self.adb.get_payment_mix(start, end)
+
+    # -------------------- STATUS TOOLS --------------------
+
+    @tool
+    async def get_status_transitions(self, entity: str = "order"):
+        """
+        List the allowed status changes.
+
+        Args:
+            entity (str): order, shipment or payment
+
+        Returns:
+            dict:
+                status (str)
+                data (list[dict]): from_status, to_status pairs
+        """
+        return await self.adb.get_status_transitions(entity)
+
+    @tool
+    async def update_order_status(self, order_id: int, status: str, worker: str = None):
+        """
+        Change an order's status, following the allowed transitions.
+
+        Args:
+            order_id (int): Order ID
+            status (str): New status (CREATED, PAID, SHIPPED, DELIVERED, CANCELLED)
+            worker (str): Worker ID from claim_next_orders; when given, the
+                worker must still hold the order's lease
+
+        Returns:
+            dict:
+                status (str)
+                message (str)
+                data (dict): id, from and to status
+        """
+        return await self.adb.update_order_status(order_id, status, worker)
+
+    @tool
+    async def update_shipment_status(self, shipment_id: int, status: str):
+        """
+        Change a shipment's status, following the allowed transitions.
+
+        Args:
+            shipment_id (int): Shipment ID
+            status (str): New status (PENDING, SHIPPED, IN_TRANSIT, DELIVERED, RETURNED, CANCELLED)
+
+        Returns:
+            dict:
+                status (str)
+                message (str)
+                data (dict): id, from and to status
+        """
+        return await self.adb.update_shipment_status(shipment_id, status)
+
+    @tool
+    async def update_payment_status(self, payment_id: int, status: str):
+        """
+        Change a payment's status, following the allowed transitions.
+
+        Args:
+            payment_id (int): Payment ID
+            status (str): New status (PENDING, SUCCESS, FAILED, REFUNDED)
+
+        Returns:
+            dict:
+                status (str)
+                message (str)
+                data (dict): id, from and to status
+        """
+        return await self.adb.update_payment_status(payment_id, status)
+
+    @tool
+    async def claim_next_orders(self, status: str, n: int = 10, worker: str = None, lease_seconds: float = 60.0):
+        """
+        Lease the oldest orders in a status to one worker.
+
+        Orders leased to someone else are skipped until the lease expires,
+        so several workers can drain the same queue without overlap.
+
+        Args:
+            status (str): Queue to take from (e.g., PAID)
+            n (int): Maximum number of orders (max 1000)
+            worker (str): Worker ID (generated when omitted)
+            lease_seconds (float): How long the orders stay leased
+
+        Returns:
+            dict:
+                status (str)
+                data (dict): worker, lease_expires_at (unix time) and the claimed orders
+        """
+        return await self.adb.claim_next_orders(status, n, worker, lease_seconds)
+
+    @tool
+    async def release_orders(self, order_ids: list[int], worker: str):
+        """
+        Give leased orders back to the queue.
+
+        Args:
+            order_ids (list[int]): Orders to release
+            worker (str): Worker ID holding the leases
+
+        Returns:
+            dict:
+                status (str)
+                data (dict): released (int)
+        """
+        return await self.adb.release_orders(order_ids, worker)
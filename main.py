@@ -1,14 +1,71 @@
-from database.db import init_db, close_db
-from handler.tools import MCPTools
+import argparse
+import json
+import sys
+
+from database.db import init_db, close_db, ConnectionPool
+from handler.schema import db_tools
 from agent import OMSAgent
+from batch import run_batch
 
 DB_PATH = "database/oms.db"
 
 
+def batch(path: str, workers: int, group_size: int):
+    pool = ConnectionPool(DB_PATH)
+    tools = db_tools(pool)
+    agent = OMSAgent(tools)
+
+    source = sys.stdin if path == "-" else open(path)
+    try:
+        summary = run_batch(agent, tools, source, sys.stdout, workers, group_size)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        pool.close()
+
+    print(json.dumps({"summary": summary}), file=sys.stderr)
+
+
+def serve(port: int, processes: int, host: str):
+    # fastmcp and the tool registrations are only needed when serving, so
+    # the CLI paths never import them.
+    if port is not None:
+        from handler.server import serve as serve_http
+        serve_http(DB_PATH, processes, host, port)
+        return
+
+    from handler.tools import MCPTools
+
+    pool = ConnectionPool(DB_PATH)
+    try:
+        MCPTools(pool).start_mcp()
+    finally:
+        pool.close()
+
+
 def main():
+    parser = argparse.ArgumentParser(description="OMS agent CLI")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run commands from FILE ('-' for stdin), plain text or JSONL, and print JSONL results")
+    parser.add_argument("--workers", type=int, default=4, help="threads for consecutive read commands in batch mode")
+    parser.add_argument("--group-size", type=int, default=500, help="max consecutive writes per transaction in batch mode")
+    parser.add_argument("--serve", action="store_true", help="run the MCP server instead of the interactive agent")
+    parser.add_argument("--port", type=int, help="with --serve, serve MCP over HTTP on this port instead of stdio")
+    parser.add_argument("--host", default="127.0.0.1", help="with --serve --port, address to bind")
+    parser.add_argument("--processes", type=int, default=1, help="with --serve --port, worker processes")
+    args = parser.parse_args()
+
+    if args.processes < 1 or (args.processes > 1 and args.port is None):
+        parser.error("--processes needs --port; stdio serving is a single process")
+    if args.serve:
+        serve(args.port, args.processes, args.host)
+        return
+    if args.batch:
+        batch(args.batch, args.workers, args.group_size)
+        return
+
     conn = init_db(DB_PATH)
-    tools = MCPTools(conn)
-    agent = OMSAgent(tools.db)
+    agent = OMSAgent(db_tools(conn))
 
     print("OMS Agent started. Type commands:\n")
 
@@ -28,4 +85,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
@@ -1,25 +1,17 @@
-import os
 import pytest
 from database.db import init_db, close_db
 from handler.schema import db_tools
 
-TEST_DB = "database/oms.db"
-
 
 @pytest.fixture(scope="function")
-def db():
-    # fresh DB for every test
-    if os.path.exists(TEST_DB):
-        os.remove(TEST_DB)
-
-    conn = init_db(TEST_DB)
+def db(tmp_path):
+    # fresh DB for every test, never the live database/oms.db
+    conn = init_db(str(tmp_path / "oms.db"))
     tools = db_tools(conn)
 
     yield tools
 
     close_db(conn)
-    if os.path.exists(TEST_DB):
-        os.remove(TEST_DB)
 
 
 # ---------------- PRODUCTS ----------------
@@ -38,6 +30,22 @@ def test_duplicate_product_sku(db):
     assert res["status"] == "error"
 
 
+def test_products_by_sku(db):
+    db.add_products_bulk([
+        {"sku": f"SKU{i:03d}", "name": f"P{i}", "price": i, "description": ""} for i in range(1, 6)
+    ])
+    assert db.get_product_by_sku("SKU003")["data"]["id"] == 3
+    assert db.get_product_by_sku("sku003")["data"] is None
+
+    res = db.get_products_by_skus(["SKU005", "NOPE", "SKU001"])
+    assert [p["id"] for p in res["data"]] == [5, 1]
+    assert res["missing"] == ["NOPE"]
+
+    res = db.resolve_skus(["SKU002", "SKU004", "NOPE", "SKU002"])
+    assert res["data"] == {"SKU002": 2, "SKU004": 4}
+    assert res["missing"] == ["NOPE"]
+
+
 # ---------------- WAREHOUSES ----------------
 
 def test_add_warehouse(db):
@@ -122,3 +130,948 @@ def test_shipment_flow(db):
     ship = db.get_shipments_by_order(1)
     assert ship["data"][0]["tracking_number"] == "TRACK123"
 
+
+def test_shipment_by_tracking(db):
+    db.add_order("ORD004", "PAID")
+    db.add_shipment(1, "TRACK123", "SHIPPED")
+    db.add_shipment(1, "TRACK123", "PENDING")
+
+    # Tracking numbers are not unique; the most recent shipment wins.
+    assert db.get_shipment_by_tracking("TRACK123")["data"]["id"] == 2
+    assert db.get_shipment_by_tracking("TRACK999")["data"] is None
+
+
+# ---------------- BULK ----------------
+
+def test_bulk_products_partial_failure(db):
+    db.add_product("SKU001", "Laptop", 50000, "Gaming laptop")
+    res = db.add_products_bulk([
+        {"sku": "SKU002", "name": "Mouse", "price": 500, "description": "Wireless"},
+        {"sku": "SKU001", "name": "Dup", "price": 1, "description": "Duplicate"},
+        ("SKU003", "Keyboard", 1500, "Mechanical"),
+        {"sku": "SKU004"},
+    ], chunk_size=2)
+
+    assert res["status"] == "success"
+    assert res["inserted"] == 2
+    assert [r["status"] for r in res["results"]] == ["success", "error", "success", "error"]
+    assert len(db.get_all_products()["data"]) == 3
+
+
+def test_bulk_unbindable_row_fails_alone(db):
+    res = db.add_products_bulk([
+        ("SKU006", "Pen", 10, "Blue"),
+        ("SKU007", "Ink", 20, "Black"),
+        ("SKU008", ["x"], 1, "d"),
+        ("SKU009", "Pad", 30, "A4"),
+    ], chunk_size=2)
+
+    assert res["status"] == "success"
+    assert res["inserted"] == 3
+    assert [r.get("code") for r in res["results"]] == [None, None, "invalid", None]
+    assert [p["sku"] for p in db.get_all_products()["data"]] == ["SKU006", "SKU007", "SKU009"]
+
+
+def test_bulk_order_items(db):
+    db.add_product("SKU005", "Phone", 30000, "Smartphone")
+    db.add_order("ORD005", "CREATED")
+
+    res = db.add_order_items_bulk(
+        [{"order_id": 1, "product_id": 1, "quantity": i, "price": 30000} for i in range(1, 1001)],
+        chunk_size=300,
+    )
+    assert res["inserted"] == 1000
+    assert len(db.get_order_items(1)["data"]) == 1000
+
+
+# ---------------- INDEXES ----------------
+
+def test_lookup_queries_use_indexes(db):
+    db.verify_query_plans()
+
+
+def test_query_plan_check_detects_scan(db):
+    db.db.execute("DROP INDEX idx_order_items_order_totals")
+    with pytest.raises(RuntimeError, match="get_order_items"):
+        db.verify_query_plans()
+
+
+# ---------------- MIGRATIONS ----------------
+
+def test_fresh_db_is_at_latest_version(db):
+    from database.migrations import LATEST_VERSION, get_version, migrate
+
+    assert get_version(db.db) == LATEST_VERSION
+    assert migrate(db.db) == []
+
+
+def test_migrate_legacy_db(tmp_path):
+    import sqlite3
+    from database.migrations import LATEST_VERSION, MIGRATIONS, get_version, migrate
+
+    conn = sqlite3.connect(tmp_path / "legacy.db")
+    for sql in MIGRATIONS[0].statements:
+        conn.execute(sql)
+    conn.execute("INSERT INTO orders (order_number, status) VALUES ('ORD1', 'CREATED')")
+    conn.commit()
+
+    report = migrate(conn, dry_run=True)
+    assert get_version(conn) == 0
+    assert "orders" in report["tables"]
+
+    migrate(conn)
+    assert get_version(conn) == LATEST_VERSION
+    assert conn.execute("SELECT order_number FROM orders").fetchone()[0] == "ORD1"
+    conn.close()
+
+
+def test_concurrent_startup_migrates_once(tmp_path):
+    import os
+    import subprocess
+    import sys
+    from database.migrations import LATEST_VERSION, get_version
+
+    # Several short-lived processes opening the same fresh database at once.
+    script = "import sys; from database.db import init_db; sys.exit(init_db(sys.argv[1]) is None)"
+    for attempt in range(3):
+        path = str(tmp_path / f"race{attempt}.db")
+        procs = [subprocess.Popen([sys.executable, "-c", script, path], cwd=os.path.dirname(__file__),
+                                  stderr=subprocess.PIPE) for _ in range(6)]
+        failures = [p.stderr.read().decode() for p in procs if p.wait() != 0]
+        assert failures == []
+        conn = init_db(path)
+        assert get_version(conn) == LATEST_VERSION
+        close_db(conn)
+
+
+def test_split_migrations_are_idempotent():
+    from database.migrations import INDEX_RE, MIGRATIONS
+
+    # Only the last step of a split migration bumps user_version, so a racing
+    # process may repeat the others.
+    for migration in MIGRATIONS:
+        if any(INDEX_RE.match(s) for s in migration.statements):
+            assert all("IF NOT EXISTS" in s.upper() for s in migration.statements), migration.version
+
+
+# ---------------- CONNECTION POOL ----------------
+
+def test_pool_reads_and_writes(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    from database.db import ConnectionPool
+
+    pool = ConnectionPool(str(tmp_path / "pool.db"))
+    tools = db_tools(pool)
+
+    def create(i):
+        return tools.add_order(f"ORD{i}", "CREATED")["status"]
+
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        assert set(ex.map(create, range(200))) == {"success"}
+        orders = list(ex.map(lambda i: tools.get_order(i)["data"], range(1, 201)))
+
+    assert all(o is not None for o in orders)
+    assert tools.add_order("ORD1", "CREATED")["status"] == "error"
+    assert pool.reader() is not pool.writer
+    assert pool.close()
+
+
+def test_group_commit_batches_writes(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    from database.db import ConnectionPool
+
+    pool = ConnectionPool(str(tmp_path / "group.db"), group_commit=True, flush_interval_ms=20, max_batch_size=64)
+    tools = db_tools(pool)
+
+    # 100 distinct order numbers, each submitted twice
+    numbers = [f"ORD{i % 100}" for i in range(200)]
+    with ThreadPoolExecutor(max_workers=32) as ex:
+        results = list(ex.map(lambda n: tools.add_order(n, "CREATED")["status"], numbers))
+
+    assert results.count("success") == 100
+    assert results.count("error") == 100
+
+    stats = tools.get_write_stats()["data"]
+    assert stats["writes"] == 200
+    assert stats["commits"] < 200
+    assert stats["max_batch_size"] <= 64
+    pool.close()
+
+
+def test_http_worker_serves_tools_from_its_own_pool(tmp_path, monkeypatch):
+    import asyncio
+    pytest.importorskip("fastmcp")
+    uvicorn = pytest.importorskip("uvicorn")
+    from fastmcp import Client
+    from handler import server
+
+    path = str(tmp_path / "http.db")
+    close_db(init_db(path))
+    monkeypatch.setenv(server.DB_PATH_ENV, path)
+    http = uvicorn.Server(uvicorn.Config(server.create_app(), host="127.0.0.1", port=0, log_level="warning"))
+
+    async def call():
+        task = asyncio.create_task(http.serve())
+        while not http.started:
+            await asyncio.sleep(0.01)
+        port = http.servers[0].sockets[0].getsockname()[1]
+        try:
+            async with Client(f"http://127.0.0.1:{port}/mcp") as client:
+                assert "get_write_stats" in {t.name for t in await client.list_tools()}
+                await client.call_tool("add_order", {"order_number": "HTTP1", "status": "CREATED"})
+                return (await client.call_tool("get_write_stats", {})).structured_content
+        finally:
+            http.should_exit = True
+            await task
+
+    stats = asyncio.run(call())
+    assert stats["data"]["writes"] == 1
+    conn = init_db(path)
+    assert conn.execute("SELECT order_number FROM orders").fetchone()[0] == "HTTP1"
+    close_db(conn)
+
+
+def test_write_retries_while_another_process_holds_the_lock(tmp_path):
+    import sqlite3
+    import threading
+    from database.db import run_write
+
+    path = str(tmp_path / "busy.db")
+    close_db(init_db(path))
+    holder = sqlite3.connect(path, check_same_thread=False)
+    holder.execute("BEGIN IMMEDIATE")
+    # timeout=0: no busy handler, so only the write policy's own retries wait
+    writer = sqlite3.connect(path, timeout=0)
+
+    with pytest.raises(sqlite3.OperationalError, match="locked"):
+        run_write(writer, lambda conn: conn.execute("INSERT INTO warehouses (name, location) VALUES ('A', 'x')"))
+
+    threading.Timer(0.01, holder.commit).start()
+    run_write(writer, lambda conn: conn.execute("INSERT INTO warehouses (name, location) VALUES ('B', 'x')"))
+    assert [r[0] for r in writer.execute("SELECT name FROM warehouses")] == ["B"]
+    holder.close()
+    writer.close()
+
+
+def test_write_errors_carry_a_code_and_busy_writes_give_up_in_bounded_time(tmp_path):
+    import sqlite3
+    import time
+    from database.db import WritePolicy
+
+    path = str(tmp_path / "codes.db")
+    conn = init_db(path)
+    tools = db_tools(conn, write_policy=WritePolicy(busy_timeout=0.01, retries=2, backoff=0.01))
+    tools.add_order("ORD1", "CREATED")
+    assert tools.add_order("ORD1", "CREATED")["code"] == "constraint"
+    assert tools.update_inventory(1, 1, quantity=5)["code"] == "not_found"
+    assert tools.update_inventory(1, 1)["code"] == "invalid"
+
+    holder = sqlite3.connect(path)
+    holder.execute("BEGIN IMMEDIATE")
+    start = time.perf_counter()
+    res = tools.add_order("ORD2", "CREATED")
+    assert res["code"] == "busy"
+    assert time.perf_counter() - start < 1
+    holder.rollback()
+    holder.close()
+
+    stats = tools.get_write_stats()["data"]
+    assert stats["busy_retries"] == 2
+    assert stats["busy_failures"] == 1
+    assert tools.add_order("ORD2", "CREATED")["status"] == "success"
+    close_db(conn)
+
+
+def test_write_admission_rejects_when_saturated(tmp_path):
+    import threading
+    from database.db import ConnectionPool, WritePolicy
+
+    pool = ConnectionPool(str(tmp_path / "admit.db"), policy=WritePolicy(max_in_flight=1))
+    tools = db_tools(pool)
+    entered, release = threading.Event(), threading.Event()
+
+    def slow(conn):
+        entered.set()
+        release.wait(5)
+
+    blocker = threading.Thread(target=pool.write, args=(slow,))
+    blocker.start()
+    entered.wait(5)
+    res = tools.add_order("ORD1", "CREATED")
+    release.set()
+    blocker.join()
+
+    assert res["code"] == "overloaded"
+    assert tools.add_order("ORD1", "CREATED")["status"] == "success"
+    stats = tools.get_write_stats()["data"]
+    assert stats["rejected"] == 1
+    assert stats["in_flight"] == 0
+    pool.close()
+
+
+# ---------------- PLACE ORDER ----------------
+
+def test_place_order_splits_across_warehouses(db):
+    db.add_product("SKU010", "Monitor", 12000, "27 inch")
+    db.add_warehouse("WH1", "Bangalore")
+    db.add_warehouse("WH2", "Mumbai")
+    db.add_inventory(1, 1, 3)
+    db.add_inventory(1, 2, 5)
+
+    res = db.place_order("ORD010", "CREATED", [{"product_id": 1, "quantity": 6, "price": 12000}])
+    assert res["status"] == "success"
+    assert res["data"]["allocations"] == [
+        {"product_id": 1, "warehouse_id": 2, "quantity": 5},
+        {"product_id": 1, "warehouse_id": 1, "quantity": 1},
+    ]
+    assert db.get_inventory(1, 1)["data"]["quantity"] == 2
+    assert db.get_inventory(1, 2)["data"]["quantity"] == 0
+
+
+def test_place_order_is_atomic_on_insufficient_stock(db):
+    db.add_product("SKU011", "Webcam", 3000, "HD")
+    db.add_warehouse("WH1", "Bangalore")
+    db.add_inventory(1, 1, 2)
+
+    res = db.place_order("ORD011", "CREATED", [{"product_id": 1, "quantity": 3, "price": 3000}])
+    assert res["status"] == "error"
+    assert "Insufficient stock" in res["message"]
+    assert db.get_order_by_number("ORD011")["data"] is None
+    assert db.get_inventory(1, 1)["data"]["quantity"] == 2
+
+
+def test_place_order_leaves_reserved_stock_alone(db):
+    db.add_product("SKU013", "Router", 2500, "WiFi 6")
+    db.add_warehouse("WH1", "Bangalore")
+    db.add_warehouse("WH2", "Mumbai")
+    db.add_inventory(1, 1, 10)
+    db.add_inventory(1, 2, 4)
+    db.update_inventory(1, 1, reserved=8)
+
+    # 2 of WH1's 10 and all 4 in WH2 are available.
+    res = db.place_order("ORD013", "CREATED", [{"product_id": 1, "quantity": 6, "price": 2500}])
+    assert res["status"] == "success"
+    assert res["data"]["allocations"] == [
+        {"product_id": 1, "warehouse_id": 2, "quantity": 4},
+        {"product_id": 1, "warehouse_id": 1, "quantity": 2},
+    ]
+    assert db.get_stock_level(1)["data"]["available"] == 0
+
+    res = db.place_order("ORD014", "CREATED", [{"product_id": 1, "quantity": 1, "price": 2500}])
+    assert "Insufficient stock" in res["message"]
+    assert db.get_inventory(1, 1)["data"]["quantity"] == 8
+
+
+def test_update_inventory_rejects_impossible_reservations(db):
+    db.add_product("SKU014", "Mouse", 500, "USB")
+    db.add_warehouse("WH1", "Bangalore")
+    db.add_inventory(1, 1, 10)
+
+    assert db.update_inventory(1, 1, reserved=11)["code"] == "invalid"
+    assert db.update_inventory(1, 1, quantity=-1)["code"] == "invalid"
+    assert db.update_inventory(1, 1, reserved=6)["status"] == "success"
+    assert db.update_inventory(1, 1, quantity=5)["code"] == "invalid"
+    assert db.get_inventory(1, 1)["data"]["quantity"] == 10
+
+
+def test_place_order_never_oversells(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    from database.db import ConnectionPool
+
+    pool = ConnectionPool(str(tmp_path / "stock.db"), group_commit=True)
+    tools = db_tools(pool)
+    tools.add_product("SKU012", "Charger", 800, "65W")
+    tools.add_warehouse("WH1", "Bangalore")
+    tools.add_inventory(1, 1, 25)
+
+    def buy(i):
+        return tools.place_order(f"ORD{i}", "CREATED", [{"product_id": 1, "quantity": 1, "price": 800}])["status"]
+
+    with ThreadPoolExecutor(max_workers=16) as ex:
+        results = list(ex.map(buy, range(100)))
+
+    assert results.count("success") == 25
+    assert tools.get_inventory(1, 1)["data"]["quantity"] == 0
+    pool.close()
+
+
+# ---------------- PAGINATION ----------------
+
+def test_products_keyset_pagination(db):
+    db.add_products_bulk([(f"SKU{i:03}", f"P{i}", 10, "d") for i in range(25)])
+
+    seen, after_id = [], 0
+    while after_id is not None:
+        page = db.get_products_page(limit=10, after_id=after_id)
+        seen.extend(p["sku"] for p in page["data"])
+        after_id = page["next_after_id"]
+
+    assert seen == [f"SKU{i:03}" for i in range(25)]
+    assert db.get_products_page(limit=0)["status"] == "error"
+
+
+def test_iter_products_chunks(db):
+    db.add_products_bulk([(f"SKU{i:03}", f"P{i}", 10, "d") for i in range(25)])
+
+    chunks = list(db.iter_products(chunk_size=10))
+    assert [len(c) for c in chunks] == [10, 10, 5]
+    assert list(db.iter_warehouses()) == []
+
+
+def test_pages_and_chunks_in_compact_shapes(db):
+    import json
+    from handler.rows import wire
+
+    db.add_products_bulk([(f"SKU{i:03}", f"P{i}", 10, "d") for i in range(25)])
+    as_dicts = db.get_products_page(limit=10, after_id=5)
+
+    records = db.get_products_page(limit=10, after_id=5, shape="record")
+    assert [r._asdict() for r in records["data"]] == as_dicts["data"]
+    assert records["data"][0].sku == "SKU005"
+    assert records["next_after_id"] == as_dicts["next_after_id"] == 15
+
+    columns = db.get_products_page(limit=10, after_id=5, shape="columns")["data"]
+    assert columns["sku"] == [p["sku"] for p in as_dicts["data"]]
+    assert set(columns) == set(as_dicts["data"][0])
+
+    sent = json.loads(json.dumps(wire(records, "record")))["data"]
+    assert [dict(zip(sent["columns"], row)) for row in sent["rows"]] == as_dicts["data"]
+    assert wire(db.get_warehouses_page(shape="record"), "record")["data"] == {"columns": [], "rows": []}
+
+    assert [len(c["id"]) for c in db.iter_products(chunk_size=10, shape="columns")] == [10, 10, 5]
+    assert db.get_products_page(shape="tuples")["code"] == "invalid"
+
+
+# ---------------- CACHE ----------------
+
+def test_product_cache_hits_and_bypass(db):
+    db.add_product("SKU020", "Tablet", 20000, "10 inch")
+
+    db.get_product(1)
+    db.get_product(1)
+    db.get_product(1, use_cache=False)
+    stats = db.get_cache_stats()["data"]["products"]
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_cache_sees_changes_from_other_connections(db, tmp_path):
+    import sqlite3
+
+    db.add_product("SKU021", "Speaker", 4000, "Bluetooth")
+    db.add_warehouse("WH1", "Bangalore")
+    assert db.get_product(1)["data"]["price"] == 4000
+
+    other = sqlite3.connect(tmp_path / "oms.db")
+    other.execute("UPDATE products SET price = 3500 WHERE id = 1")
+    other.commit()
+    other.close()
+
+    assert db.get_product(1)["data"]["price"] == 3500
+    # unrelated writes keep the cache warm
+    db.get_warehouse(1)
+    db.add_order("ORD021", "CREATED")
+    db.get_warehouse(1)
+    assert db.get_cache_stats()["data"]["warehouses"]["hits"] == 1
+
+
+def test_cache_is_bounded():
+    from handler.cache import LRUCache
+
+    cache = LRUCache(maxsize=2)
+    for key in range(3):
+        cache.put(key, key, cache.generation)
+    assert cache.stats()["evictions"] == 1
+
+
+# ---------------- ASYNC ----------------
+
+def test_async_db_tools(tmp_path):
+    import asyncio
+    from database.db import ConnectionPool
+    from handler.async_schema import AsyncDbTools
+
+    pool = ConnectionPool(str(tmp_path / "async.db"))
+    adb = AsyncDbTools(db_tools(pool), max_workers=4, max_concurrency=8)
+
+    async def scenario():
+        added = await asyncio.gather(*(adb.add_order(f"ORD{i}", "CREATED") for i in range(50)))
+        fetched = await asyncio.gather(*(adb.get_order(i) for i in range(1, 51)))
+        return added, fetched
+
+    added, fetched = asyncio.run(scenario())
+    assert all(r["status"] == "success" for r in added)
+    assert sorted(r["data"]["order_number"] for r in fetched) == sorted(f"ORD{i}" for i in range(50))
+    with pytest.raises(AttributeError):
+        adb.iter_products
+
+    adb.close()
+    pool.close()
+
+
+# ---------------- METRICS ----------------
+
+def test_metrics_record_tools_and_statements(db, tmp_path):
+    from handler.metrics import METRICS
+
+    METRICS.reset()
+    db.add_order("ORD030", "CREATED")
+    db.add_order("ORD030", "CREATED")
+    db.get_order_items(1)
+
+    data = db.get_metrics()["data"]
+    assert data["tools"]["add_order"]["calls"] == 2
+    assert data["tools"]["add_order"]["errors"] == 1
+    assert data["statements"]["SELECT * FROM order_items WHERE order_id = ?"]["calls"] == 1
+
+    path = tmp_path / "metrics.prom"
+    assert db.dump_metrics(str(path))["status"] == "success"
+    assert 'oms_tool_calls_total{tool="add_order"} 2' in path.read_text()
+
+
+def test_metrics_tool_writes_only_the_configured_file(tmp_path):
+    import asyncio
+    import inspect
+    pytest.importorskip("fastmcp")
+    from handler.tools import MCPTools
+
+    conn = init_db(str(tmp_path / "oms.db"))
+    assert "path" not in inspect.signature(MCPTools.dump_metrics).parameters
+
+    unconfigured = MCPTools(conn)
+    unconfigured.metrics_path = None
+    assert asyncio.run(unconfigured.dump_metrics())["code"] == "forbidden"
+
+    path = tmp_path / "oms.prom"
+    tools = MCPTools(conn, metrics_path=str(path))
+    assert asyncio.run(tools.dump_metrics())["status"] == "success"
+    assert path.read_text().startswith("#")
+    tools.adb.close()
+    unconfigured.adb.close()
+    close_db(conn)
+
+
+def test_metrics_can_be_disabled(db):
+    from handler.metrics import METRICS
+
+    METRICS.reset()
+    METRICS.enabled = False
+    try:
+        db.get_order(1)
+    finally:
+        METRICS.enabled = True
+    assert METRICS.snapshot()["tools"] == {}
+
+
+# ---------------- AGENT ----------------
+
+def test_agent_routes_commands(db):
+    from agent import OMSAgent
+
+    agent = OMSAgent(db)
+    assert agent.handle("add product sku=SKU1 name=mouse price=500 desc=wireless")["status"] == "success"
+    assert agent.handle("please get product id=1")["data"]["name"] == "mouse"
+    assert agent.handle("create order number=ORD1 status=CREATED")["status"] == "success"
+    assert agent.handle("add item order_id=1 product_id=1 qty=2 price=500")["status"] == "success"
+    assert agent.handle("Find Product sku=SKU1")["data"]["id"] == 1
+    assert agent.handle("ship order order_id=1 tracking=Tr1 status=PENDING")["status"] == "success"
+    assert agent.handle("track shipment tracking=Tr1")["data"]["order_id"] == 1
+    assert agent.handle("launch rocket")["message"] == "Unknown command"
+
+
+def test_agent_reports_all_field_problems(db):
+    from agent import OMSAgent
+
+    res = OMSAgent(db).handle("add item order_id=x qty=2 price=abc")
+    assert res["status"] == "error"
+    assert res["message"] == "Missing product_id; Invalid order_id=x, price=abc"
+
+
+# ---------------- BATCH ----------------
+
+def test_batch_groups_writes_and_streams_jsonl(tmp_path):
+    import io
+    import json
+    from agent import OMSAgent
+    from batch import run_batch
+    from database.db import ConnectionPool
+
+    pool = ConnectionPool(str(tmp_path / "batch.db"))
+    tools = db_tools(pool)
+    lines = [
+        "add product sku=SKU1 name=mouse price=500 desc=wireless",
+        '{"id": "a", "command": "add product sku=SKU2 name=pad price=200 desc=cloth"}',
+        "add product sku=SKU1 name=dup price=1 desc=dup",
+        "",
+        "get product id=1",
+        "get product id=2",
+        '{"oops": 1}',
+    ]
+    out = io.StringIO()
+    summary = run_batch(OMSAgent(tools), tools, lines, out, workers=2, group_size=2)
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["line"] for r in records] == [1, 2, 3, 5, 6, 7]
+    assert records[1]["id"] == "a"
+    assert records[4]["result"]["data"]["name"] == "pad"
+    assert summary["commands"] == 6
+    assert summary["errors"] == 2
+    pool.close()
+
+
+def test_batch_reports_a_failed_write_group_and_continues(tmp_path):
+    import io
+    import json
+    import sqlite3
+    from agent import OMSAgent
+    from batch import run_batch
+    from database.db import ConnectionPool, WritePolicy
+
+    path = str(tmp_path / "batch.db")
+    pool = ConnectionPool(path, policy=WritePolicy(busy_timeout=0.01, retries=1, backoff=0.01))
+    tools = db_tools(pool)
+    tools.add_product("SKU1", "mouse", 500, "wireless")
+    holder = sqlite3.connect(path)
+    holder.execute("BEGIN IMMEDIATE")
+    lines = [
+        "get product id=1",
+        "add product sku=SKU2 name=pad price=200 desc=cloth",
+        "add product sku=SKU3 name=mat price=300 desc=desk",
+        "get product id=1",
+    ]
+    out = io.StringIO()
+    summary = run_batch(OMSAgent(tools), tools, lines, out, workers=2)
+    holder.rollback()
+    holder.close()
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["line"] for r in records] == [1, 2, 3, 4]
+    assert [r["result"].get("code") for r in records] == [None, "busy", "busy", None]
+    assert summary["commands"] == 4 and summary["errors"] == 2
+    assert tools.get_product_by_sku("SKU2")["data"] is None
+    pool.close()
+
+
+# ---------------- ORDER DETAILS ----------------
+
+def test_order_details(db):
+    db.add_product("SKU040", "Desk", 7000, "Standing desk")
+    db.add_product("SKU041", "Chair", 3000, "Ergonomic")
+    db.add_order("ORD040", "PAID")
+    db.add_order("ORD041", "CREATED")
+    db.add_order_item(1, 1, 1, 7000)
+    db.add_order_item(1, 2, 2, 3000)
+    db.add_payment(1, 10000, "UPI", "SUCCESS")
+    db.add_payment(1, 3000, "CARD", "FAILED")
+    db.add_shipment(1, "TRACK040", "SHIPPED")
+
+    order = db.get_order_details(order_number="ORD040")["data"]
+    assert [i["product_sku"] for i in order["items"]] == ["SKU040", "SKU041"]
+    assert order["shipments"][0]["tracking_number"] == "TRACK040"
+    assert order["totals"] == {"item_count": 2, "units": 3, "items_total": 13000, "paid": 10000, "outstanding": 3000}
+
+    res = db.get_orders_details(order_ids=[2, 99, 1])
+    assert [o["order_number"] for o in res["data"]] == ["ORD041", "ORD040"]
+    assert res["missing"] == [99]
+    assert res["data"][0]["totals"]["items_total"] == 0
+    assert db.get_orders_details()["status"] == "error"
+
+
+# ---------------- STOCK LEVELS ----------------
+
+def test_stock_levels_follow_inventory(db):
+    db.add_product("SKU050", "Cable", 200, "USB-C")
+    db.add_product("SKU051", "Hub", 1500, "4 port")
+    db.add_warehouse("WH1", "Bangalore")
+    db.add_warehouse("WH2", "Mumbai")
+    db.add_inventory(1, 1, 10)
+    db.add_inventory(1, 2, 5)
+    db.add_inventory(2, 1, 50)
+    db.update_inventory(1, 2, reserved=3)
+    db.place_order("ORD050", "CREATED", [{"product_id": 1, "quantity": 4, "price": 200}])
+
+    level = db.get_stock_level(1)["data"]
+    assert (level["on_hand"], level["reserved"], level["available"]) == (11, 3, 8)
+
+    db.set_reorder_level(1, 10)
+    db.set_reorder_level(2, 10)
+    low = db.get_low_stock()["data"]
+    assert [p["sku"] for p in low] == ["SKU050"]
+
+    assert db.check_stock_levels()["data"]["drifted"] == 0
+
+
+def test_stock_level_drift_detection(db):
+    db.add_product("SKU052", "Lamp", 900, "LED")
+    db.add_warehouse("WH1", "Bangalore")
+    db.add_inventory(1, 1, 10)
+    db.db.execute("UPDATE stock_levels SET on_hand = 99")
+    db.db.commit()
+
+    report = db.check_stock_levels(repair=True)["data"]
+    assert report["rows"][0]["expected_on_hand"] == 10
+    assert db.check_stock_levels()["data"]["drifted"] == 0
+
+
+def test_allocation_prefers_single_warehouse(db):
+    from handler.allocation import InventorySnapshot, allocate
+
+    # Warehouse 1 holds the most of product 1, but only warehouse 2 has both.
+    snapshot = InventorySnapshot([(1, 1, 50), (1, 2, 5), (2, 2, 5)])
+    allocated, unallocated = allocate(snapshot, [
+        (10, [(1, 3), (2, 2)]),
+        (11, [(1, 4), (2, 3)]),
+        (12, [(2, 9)]),
+    ])
+    assert allocated[10] == {2: {1: 3, 2: 2}}
+    # Warehouse 2 no longer covers order 11 alone; it ships what it can and
+    # warehouse 1 the rest.
+    assert allocated[11] == {2: {1: 2, 2: 3}, 1: {1: 2}}
+    assert unallocated == {12: {2: 9}}
+    assert snapshot.available(2, 2) == 0
+
+
+def test_allocate_orders_commit(db):
+    db.add_product("SKU060", "Desk", 5000, "Oak")
+    db.add_product("SKU061", "Chair", 2000, "Mesh")
+    db.add_warehouse("WH1", "Bangalore")
+    db.add_warehouse("WH2", "Mumbai")
+    db.add_inventory(1, 1, 10)
+    db.add_inventory(2, 1, 10)
+    db.add_inventory(1, 2, 10)
+    db.add_inventory(2, 2, 10)
+    db.add_order("ORD600", "CREATED")
+    db.add_order_item(1, 1, 2, 5000)
+    db.add_order_item(1, 2, 4, 2000)
+
+    plan = db.allocate_orders(location_costs={"Bangalore": 5})["data"]
+    assert plan["orders"][0]["shipments"][0]["warehouse_id"] == 2
+    assert db.get_inventory(1, 2)["data"]["quantity"] == 10
+
+    res = db.allocate_orders(location_costs={"Bangalore": 5}, commit=True)
+    assert res["data"]["shipment_count"] == 1
+    assert db.get_inventory(2, 2)["data"]["quantity"] == 6
+    assert [a["quantity"] for a in db.get_allocations(1)["data"]] == [2, 4]
+    assert db.allocate_orders(commit=True)["data"]["orders"] == []
+
+
+def test_allocate_orders_by_id_skips_closed_orders(db):
+    db.add_product("SKU062", "Shelf", 3000, "Pine")
+    db.add_warehouse("WH1", "Bangalore")
+    db.add_inventory(1, 1, 10)
+    for number, status in (("ORD610", "PAID"), ("ORD611", "CANCELLED"), ("ORD612", "SHIPPED")):
+        db.add_order(number, status)
+    for order_id in (1, 2, 3):
+        db.add_order_item(order_id, 1, 3, 3000)
+
+    res = db.allocate_orders(order_ids=iter([1, 2, 3]), commit=True)["data"]
+    assert [o["order_id"] for o in res["orders"]] == [1]
+    assert res["skipped"] == [2, 3]
+    assert db.get_inventory(1, 1)["data"]["quantity"] == 7
+    assert db.get_allocations(2)["data"] == []
+
+
+def test_reports(db):
+    db.add_products_bulk([("SKU070", "Pen", 10, "Blue"), ("SKU071", "Book", 100, "A5")])
+    db.add_warehouse("WH1", "Bangalore")
+    db.add_inventory(1, 1, 100)
+    db.add_inventory(2, 1, 100)
+    db.place_order("ORD700", "CREATED", [{"product_id": 1, "quantity": 5, "price": 10}])
+    db.place_order("ORD701", "CREATED", [{"product_id": 2, "quantity": 1, "price": 100},
+                                         {"product_id": 1, "quantity": 1, "price": 10}])
+    db.place_order("ORD702", "CREATED", [{"product_id": 2, "quantity": 2, "price": 100}])
+    db.db.execute("UPDATE orders SET created_at = '2025-03-03 10:00:00' WHERE id = 1")
+    db.db.execute("UPDATE orders SET created_at = '2025-03-05 18:30:00' WHERE id = 2")
+    db.db.execute("UPDATE orders SET created_at = '2025-04-01 09:00:00' WHERE id = 3")
+    db.db.commit()
+    db.add_payment(1, 50, "UPI", "SUCCESS")
+    db.add_payment(2, 110, "CARD", "SUCCESS")
+    db.add_payment(2, 110, "CARD", "FAILED")
+
+    days = db.get_revenue_by_day("2025-03-01", "2025-03-31")["data"]
+    assert len(days) == 31
+    assert days[2] == {"period_start": "2025-03-03", "orders": 1, "units": 5, "revenue": 50.0}
+    weeks = db.get_revenue_by_day(period="week")["data"]
+    assert [w["period_start"] for w in weeks][:2] == ["2025-03-03", "2025-03-10"]
+    assert weeks[0]["revenue"] == 160.0
+
+    top = db.get_top_skus(end="2025-03-31", limit=1)["data"]
+    assert top[0]["sku"] == "SKU071"
+    assert db.get_top_skus(limit=1, by="units")["data"][0]["units"] == 6
+    stats = db.get_order_value_stats()["data"]
+    assert (stats["orders"], stats["average_order_value"]) == (3, 120.0)
+    assert db.get_revenue_by_warehouse()["data"][0]["revenue"] == 360.0
+
+    mix = db.get_payment_mix(start="2025-03-01")["data"]
+    assert [(m["method"], m["payments"], m["paid_amount"]) for m in mix] == [("CARD", 2, 110.0), ("UPI", 1, 50.0)]
+    chunks = list(db.iter_report("revenue_by_product", chunk_size=1))
+    assert [c[0]["units"] for c in chunks] == [6, 3]
+
+
+def test_rollups_match_full_recompute(db):
+    db.add_products_bulk([("SKU080", "Pen", 10, "Blue"), ("SKU081", "Book", 100, "A5")])
+    db.add_orders_bulk([(f"ORD80{i}", "CREATED") for i in range(3)])
+    db.add_order_items_bulk([(1, 1, 2, 10), (1, 1, 1, 10), (1, 2, 1, 100), (2, 2, 3, 100), (3, 1, 4, 10)])
+    db.add_payments_bulk([(1, 130, "UPI", "success"), (2, 300, None, "PENDING"), (2, 300, "CARD", "SUCCESS")])
+    db.db.execute("UPDATE order_items SET quantity = 5 WHERE id = 2")
+    db.db.execute("UPDATE order_items SET order_id = 3 WHERE id = 3")
+    db.db.execute("DELETE FROM order_items WHERE id = 5")
+    db.db.execute("UPDATE payments SET status = 'SUCCESS' WHERE id = 2")
+    db.db.execute("UPDATE orders SET created_at = '2025-01-02 08:00:00' WHERE id = 2")
+    db.db.commit()
+
+    assert db.check_rollups()["data"]["drifted"] == 0
+    assert db.get_order_value_stats(end="2025-01-02")["data"]["revenue"] == 300.0
+
+    db.db.execute("UPDATE sales_daily SET revenue = revenue + 1")
+    db.db.execute("DELETE FROM payments_daily")
+    db.db.commit()
+    assert db.check_rollups()["data"]["drifted"] > 0
+    assert db.rebuild_rollups()["status"] == "success"
+    assert db.check_rollups()["data"]["drifted"] == 0
+
+
+# ---------------- SEARCH ----------------
+
+def test_search_products(db):
+    db.add_products_bulk([
+        ("MS-100", "Wireless Mouse", 900, "Ergonomic mouse with USB receiver"),
+        ("KB-200", "Mechanical Keyboard", 4500, "Wireless, hot-swappable switches"),
+        ("MS-101", "Gaming Mouse", 2500, "Wired, 16000 DPI"),
+    ])
+
+    res = db.search_products("wireless")
+    # A name match outranks a description match.
+    assert [p["sku"] for p in res["data"]] == ["MS-100", "KB-200"]
+    assert {p["sku"] for p in db.search_products("mou")["data"]} == {"MS-100", "MS-101"}
+    assert db.search_products("ms 101")["data"][0]["name"] == "Gaming Mouse"
+    page = db.search_products("mouse", limit=1)
+    assert page["next_offset"] == 1
+    assert db.search_products("mouse", limit=1, offset=1)["data"][0]["id"] != page["data"][0]["id"]
+    # FTS5 syntax in the input is searched for as plain words.
+    assert db.search_products('"OR (')["data"] == []
+    assert db.search_products("!!")["status"] == "error"
+
+    db.db.execute("UPDATE products SET name = 'Trackball' WHERE sku = 'MS-101'")
+    db.db.execute("DELETE FROM products WHERE sku = 'KB-200'")
+    db.db.commit()
+    assert [p["sku"] for p in db.search_products("trackball")["data"]] == ["MS-101"]
+    assert db.search_products("keyboard")["data"] == []
+
+
+def test_products_by_sku_prefix(db):
+    db.add_products_bulk([(sku, sku, 10, "d") for sku in ("MS-100", "MS-101", "MS-2", "MT-1", "M")])
+
+    first = db.get_products_by_sku_prefix("MS-", limit=2)
+    assert [p["sku"] for p in first["data"]] == ["MS-100", "MS-101"]
+    rest = db.get_products_by_sku_prefix("MS-", limit=2, after_sku=first["next_after_sku"])
+    assert [p["sku"] for p in rest["data"]] == ["MS-2"] and rest["next_after_sku"] is None
+
+
+# ---------------- STATUS ----------------
+
+def test_status_transitions_are_enforced(db):
+    import sqlite3
+    from handler.schema import ORDER_STATUS_CODES
+
+    for status, code in ORDER_STATUS_CODES.items():
+        db.add_order(f"ORD9{code}", status.lower())
+        assert db.db.execute("SELECT status_code FROM orders WHERE order_number = ?", (f"ORD9{code}",)).fetchone()[0] == code
+    assert db.add_order("ORD999", "LOST")["status"] == "error"
+
+    assert db.update_order_status(1, "paid")["data"] == {"id": 1, "from": "created", "to": "PAID"}
+    res = db.update_order_status(1, "CREATED")
+    assert res["status"] == "error" and "from PAID to CREATED" in res["message"]
+    with pytest.raises(sqlite3.IntegrityError):
+        db.db.execute("UPDATE orders SET status = 'CREATED' WHERE id = 1")
+
+    db.add_payment(1, 100, "UPI", "PENDING")
+    assert db.update_payment_status(1, "SUCCESS")["status"] == "success"
+    assert db.update_payment_status(1, "FAILED")["status"] == "error"
+    assert db.update_shipment_status(7, "SHIPPED")["message"] == "Shipment 7 not found"
+
+
+def test_status_update_rejects_non_string_status(db):
+    db.add_order("ORD990", "CREATED")
+
+    assert db.update_order_status(1, None)["code"] == "invalid"
+    assert db.update_shipment_status(1, 3)["code"] == "invalid"
+    assert db.get_order(1)["data"]["status"] == "CREATED"
+
+
+def test_claim_next_orders_leases(db):
+    db.add_orders_bulk([(f"ORD95{i}", "PAID") for i in range(5)])
+
+    first = db.claim_next_orders("PAID", 3, worker="w1")["data"]
+    second = db.claim_next_orders("PAID", 3, worker="w2")["data"]
+    assert [o["id"] for o in first["orders"]] == [1, 2, 3]
+    assert [o["id"] for o in second["orders"]] == [4, 5]
+    assert db.claim_next_orders("PAID", 3)["data"]["orders"] == []
+
+    assert db.update_order_status(1, "SHIPPED", worker="w2")["status"] == "error"
+    assert db.update_order_status(1, "SHIPPED", worker="w1")["status"] == "success"
+    assert db.release_orders([2, 3, 4], "w1")["data"]["released"] == 2
+    assert [o["id"] for o in db.claim_next_orders("PAID", 5, worker="w3")["data"]["orders"]] == [2, 3]
+
+    # An expired lease puts the order back in the queue.
+    db.release_orders([2, 3], "w3")
+    db.claim_next_orders("PAID", 2, worker="w4", lease_seconds=-1)
+    assert [o["id"] for o in db.claim_next_orders("PAID", 5, worker="w5")["data"]["orders"]] == [2, 3]
+
+
+# ---------------- BENCHMARKS ----------------
+
+def test_datagen_is_deterministic(tmp_path):
+    from benchmarks import datagen
+
+    dumps = []
+    for name in ("a.db", "b.db"):
+        conn = init_db(str(tmp_path / name))
+        counts = datagen.generate(conn, datagen.SCALES["tiny"], seed=7)
+        dumps.append([
+            conn.execute(f"SELECT * FROM {table} ORDER BY id").fetchall()
+            for table in ("products", "warehouses", "orders", "order_items", "payments", "inventory")
+        ])
+        close_db(conn)
+    assert counts["orders"] == 500 and counts["payments"] == 400 and counts["shipments"] == 300
+    assert [[tuple(r) for r in rows] for rows in dumps[0]] == [[tuple(r) for r in rows] for rows in dumps[1]]
+
+    with pytest.raises(ValueError):
+        datagen.check_scale(datagen.SCALES["tiny"]._replace(inventory=10 ** 6))
+
+
+def test_benchmark_suite_covers_every_method():
+    from benchmarks import datagen, suite
+
+    report = suite.run(datagen.SCALES["tiny"], calls=3)
+    assert report["uncovered"] == []
+    assert {r["path"] for r in report["results"].values()} >= {"db_tools", "agent"}
+    assert [name for name, r in report["results"].items() if r["errors"]] == []
+
+    faster_baseline = {"results": {name: dict(r, p50_us=r["p50_us"] / 10) for name, r in report["results"].items()}}
+    assert suite.compare(report, report["results"], 1.25) == []
+    assert suite.compare(faster_baseline, report["results"], 1.25, min_delta_us=0)
+
+
+# ---------------- STARTUP ----------------
+
+# Cumulative `python -X importtime -c "import main"` time; typically ~30 ms.
+STARTUP_IMPORT_BUDGET_MS = 150
+
+
+def test_cli_startup_import_budget():
+    import os
+    import subprocess
+    import sys
+
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True,
+    )
+    cumulative_us = {}
+    for line in out.stderr.splitlines():
+        _, _, cumulative, name = line.replace("|", ":").split(":")
+        if cumulative.strip().isdigit():
+            cumulative_us[name.strip()] = int(cumulative)
+
+    assert not {"fastmcp", "handler.tools", "numpy"} & cumulative_us.keys()
+    assert cumulative_us["main"] / 1000 < STARTUP_IMPORT_BUDGET_MS